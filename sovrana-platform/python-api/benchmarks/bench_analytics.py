@@ -0,0 +1,123 @@
+"""
+Benchmark: fill markouts via the columnar as-of join vs a per-fill lookup.
+
+Records a random-walk midpoint for every token at the service's polling
+interval, ingests synthetic trade-history fills spread over the same
+window, then resolves every arrival and horizon mark in one refresh. The
+baseline looks each (fill, horizon) up with bisect on per-token lists,
+which is what joining fill by fill costs. Also reports the cost of a
+grouped summary read. Run from python-api/:
+
+    python benchmarks/bench_analytics.py --tokens 1000 --fills 100000 --minutes 90
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from bisect import bisect_right
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from fill_analytics import HORIZONS, MAX_AGE, TIME_BITS, TIME_MASK, FillAnalytics
+
+POLL = 5.0  # seconds between midpoint samples, as main.POSITIONS_MARK_INTERVAL
+START = 1_760_000_000.0
+
+
+def _trades(fills: int, tokens: int, span: float, agents: int, seed: int) -> list:
+    rng = random.Random(seed)
+    out = []
+    for i in range(fills):
+        side = rng.choice(("BUY", "SELL"))
+        out.append({
+            "id": f"trade-{i}",
+            "asset_id": f"token-{rng.randrange(tokens)}",
+            "market": f"market-{rng.randrange(tokens // 2)}",
+            "side": side,
+            "price": f"{rng.uniform(0.1, 0.9):.2f}",
+            "size": f"{rng.uniform(5, 500):.2f}",
+            "fee_rate_bps": rng.choice(("0", "100", "200")),
+            "match_time": str(int(START + rng.uniform(0, span - 3600))),
+            "trader_side": rng.choice(("TAKER", "MAKER")),
+            "agent": f"agent-{rng.randrange(agents)}",
+        })
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=1000)
+    parser.add_argument("--fills", type=int, default=100000)
+    parser.add_argument("--minutes", type=int, default=90, help="history span; fills land in its first part")
+    parser.add_argument("--agents", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=9)
+    args = parser.parse_args()
+
+    span = args.minutes * 60
+    rng = np.random.default_rng(args.seed)
+    steps = int(span / POLL)
+    walk = np.clip(0.5 + np.cumsum(rng.normal(0, 0.003, (steps, args.tokens)), axis=0), 0.01, 0.99).round(3)
+    names = [f"token-{i}" for i in range(args.tokens)]
+
+    analytics = FillAnalytics(agent_of=lambda t: t["agent"], strategy_of=lambda a: f"strategy-{int(a[6:]) % 4}")
+    t0 = time.perf_counter()
+    for s in range(steps):
+        ts = START + s * POLL
+        row = walk[s].tolist()
+        for name, mid in zip(names, row):
+            analytics.record(name, ts, mid)
+    record_s = time.perf_counter() - t0
+    analytics.history.compact()
+
+    trades = _trades(args.fills, args.tokens, span, args.agents, args.seed)
+    t0 = time.perf_counter()
+    analytics.ingest_trades(trades)
+    ingest_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    resolved = analytics.refresh(START + span)
+    join_s = time.perf_counter() - t0
+
+    # baseline: per-token sorted lists, one bisect per (fill, mark)
+    times = {name: [] for name in names}
+    mids = {name: [] for name in names}
+    keys, values = analytics.history.keys, analytics.history.mids
+    for key, mid in zip(keys.tolist(), values.tolist()):
+        name = analytics.history.token_ids[key >> TIME_BITS]
+        times[name].append((key & TIME_MASK) / 1000)
+        mids[name].append(mid)
+    offsets = (0,) + tuple(HORIZONS.values())
+    t0 = time.perf_counter()
+    found = 0
+    for t in trades:
+        ts, name = float(t["match_time"]), t["asset_id"]
+        for offset in offsets:
+            i = bisect_right(times[name], ts + offset) - 1
+            if i >= 0 and ts + offset - times[name][i] <= MAX_AGE:
+                found += 1
+    loop_s = time.perf_counter() - t0
+
+    reads = []
+    for by in ("wallet", "agent", "strategy", "market"):
+        t0 = time.perf_counter()
+        summary = analytics.summary(by)
+        reads.append((by, (time.perf_counter() - t0) * 1000, len(summary["groups"])))
+
+    print(f"{len(analytics.history)} midpoint samples for {args.tokens} tokens over {args.minutes} min "
+          f"(recorded at {len(analytics.history) / record_s:,.0f}/s)")
+    print(f"{args.fills} fills ingested in {ingest_s * 1000:.0f} ms ({args.fills / ingest_s:,.0f}/s)\n")
+    print(f"{'join':<24} {'pairs':>9} {'ms':>9} {'pairs/s':>12}")
+    print(f"{'as-of searchsorted':<24} {resolved:>9} {join_s * 1000:>9.1f} {resolved / join_s:>12,.0f}")
+    print(f"{'per-fill bisect':<24} {len(trades) * len(offsets):>9} {loop_s * 1000:>9.1f} "
+          f"{len(trades) * len(offsets) / loop_s:>12,.0f}")
+    print(f"(marks with a midpoint: {found} by bisect)\n")
+    for by, ms, groups in reads:
+        print(f"summary by {by:<9} {ms:>7.2f} ms  ({groups} groups)")
+
+
+if __name__ == "__main__":
+    main()
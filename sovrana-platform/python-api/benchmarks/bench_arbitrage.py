@@ -0,0 +1,133 @@
+"""
+Benchmark: neg-risk event arbitrage scanning, incremental vs per-event recompute.
+
+Lays out thousands of synthetic neg-risk events, loads a full set of books,
+then replays rounds of book updates against a random subset of outcomes.
+Each round is applied through EventArbScanner.on_book and followed by a
+scan(); the baseline recomputes every event's basket sums and walks its
+books in Python after each round, which is what re-deriving the scan from
+scratch costs. Run from python-api/:
+
+    python benchmarks/bench_arbitrage.py --events 5000 --outcomes 2-12 --updates 2000 --rounds 20
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from event_arbitrage import LEVELS, MIN_EDGE, EventArbScanner
+
+
+def universe(events: int, low: int, high: int, seed: int) -> list:
+    rng = random.Random(seed)
+    records = []
+    for e in range(events):
+        for o in range(rng.randint(low, high)):
+            records.append(SimpleNamespace(
+                neg_risk=True, event_ids=[f"e{e}"], token_ids=[f"{e}:{o}:yes", f"{e}:{o}:no"], tags=[],
+                taker_fee_bps=rng.choice((0, 0, 100)), min_order_size=5.0,
+                condition_id=f"c{e}:{o}", question=f"event {e} outcome {o}",
+            ))
+    return records
+
+
+def book(rng: random.Random, fair: float, skew: float) -> tuple:
+    """Five levels a side around `fair`, occasionally mispriced by `skew`."""
+    mid = min(max(fair + skew, 0.02), 0.98)
+    asks = [(round(min(mid + 0.005 + 0.01 * i, 0.99), 3), round(rng.uniform(10, 400), 2)) for i in range(LEVELS)]
+    bids = [(round(max(mid - 0.005 - 0.01 * i, 0.01), 3), round(rng.uniform(10, 400), 2)) for i in range(LEVELS)]
+    return bids, asks
+
+
+def naive(groups: dict, books: dict, rates: dict) -> int:
+    """Sum each event's best asks and bids, then walk any crossed event level by level."""
+    found = 0
+    for tokens in groups.values():
+        for side in ("asks", "bids"):
+            payoff = 1.0 if side == "asks" else len(tokens) - 1.0
+            ladders = []
+            for t in tokens:
+                levels = books[t][1] if side == "asks" else [(1 - p, s) for p, s in books[t][0]]
+                ladders.append([[p + rates[t] * min(p, 1 - p), s] for p, s in levels])
+            size = 0.0
+            while all(ladders) and payoff - sum(l[0][0] for l in ladders) > MIN_EDGE:
+                q = min(l[0][1] for l in ladders)
+                size += q
+                for l in ladders:
+                    l[0][1] -= q
+                    if l[0][1] <= 1e-9:
+                        l.pop(0)
+            found += size > 0
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--outcomes", default="2-12", help="outcomes per event, low-high")
+    parser.add_argument("--updates", type=int, default=2000, help="book updates per round")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--mispriced", type=float, default=0.02, help="share of updates skewed off fair value")
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+
+    low, high = (int(x) for x in args.outcomes.split("-"))
+    records = universe(args.events, low, high, args.seed)
+    rng = random.Random(args.seed)
+    groups, fair, rates = {}, {}, {}
+    for r in records:
+        groups.setdefault(r.event_ids[0], []).append(r.token_ids[0])
+        rates[r.token_ids[0]] = r.taker_fee_bps / 1e4
+    for tokens in groups.values():
+        weights = [rng.random() for _ in tokens]
+        for t, w in zip(tokens, weights):
+            fair[t] = w / sum(weights)
+
+    scanner = EventArbScanner()
+    t0 = time.perf_counter()
+    scanner.rebuild(records)
+    rebuild_s = time.perf_counter() - t0
+    books = {t: book(rng, fair[t], 0.0) for t in fair}
+    now = time.time()
+    for t, (bids, asks) in books.items():
+        scanner.on_book(t, bids, asks, now)
+    scanner.scan(now)
+    print(f"{len(groups)} events, {len(fair)} outcomes (rebuild {rebuild_s * 1000:.0f} ms)\n")
+
+    tokens = list(fair)
+    update_s = scan_s = naive_s = 0.0
+    for _ in range(args.rounds):
+        now = time.time()
+        batch = []
+        for t in rng.sample(tokens, min(args.updates, len(tokens))):
+            skew = rng.uniform(-0.15, 0.15) if rng.random() < args.mispriced else 0.0
+            books[t] = book(rng, fair[t], skew)
+            batch.append(t)
+        t0 = time.perf_counter()
+        for t in batch:
+            bids, asks = books[t]
+            scanner.on_book(t, bids, asks, now)
+        update_s += time.perf_counter() - t0
+        t0 = time.perf_counter()
+        found = len(scanner.scan(now))
+        scan_s += time.perf_counter() - t0
+        t0 = time.perf_counter()
+        baseline = naive(groups, books, rates)
+        naive_s += time.perf_counter() - t0
+
+    updates = args.rounds * min(args.updates, len(tokens))
+    print(f"{'per round':<28} {'ms':>9}")
+    print(f"{'on_book x ' + str(min(args.updates, len(tokens))):<28} {update_s / args.rounds * 1000:>9.2f}"
+          f"   ({update_s / updates * 1e6:.1f} us/update)")
+    print(f"{'scan (dirty events)':<28} {scan_s / args.rounds * 1000:>9.2f}")
+    print(f"{'per-event Python recompute':<28} {naive_s / args.rounds * 1000:>9.2f}")
+    print(f"\nopportunities after the last round: {found} (baseline {baseline})")
+
+
+if __name__ == "__main__":
+    main()
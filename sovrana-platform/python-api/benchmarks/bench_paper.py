@@ -0,0 +1,127 @@
+"""
+Benchmark: paper-trading throughput with many shadow agents in one process.
+
+Every agent submits orders on random tokens against synthetic books that
+drift each tick; each fill goes through the same accounting the service
+wires up (paper PnL ledgers and the stop/take trigger engine). Reports the
+cost of a submit, of a process() pass, fills per second and the memory the
+simulation holds (peak RSS growth, Linux). Run from python-api/:
+
+    python benchmarks/bench_paper.py --agents 1000 --tokens 200 --ticks 400
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+import resource
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from paper_trading import PaperExchange
+from pnl_series import PnLSeriesEngine
+from price_triggers import TriggerEngine
+
+TICK = 0.25  # simulated seconds per process() pass, as main.PAPER_TICK
+LEVELS = 10
+
+
+def _book(mid: float, rng: random.Random) -> tuple:
+    bids = [(round(mid - 0.01 * (i + 1), 2), rng.uniform(20, 200)) for i in range(LEVELS)]
+    asks = [(round(mid + 0.01 * (i + 1), 2), rng.uniform(20, 200)) for i in range(LEVELS)]
+    return [b for b in bids if b[0] > 0], [a for a in asks if a[0] < 1]
+
+
+def _pct(values: list, pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def run(agents: int, tokens: int, ticks: int, orders_per_agent_tick: float, seed: int) -> dict:
+    rng = random.Random(seed)
+    exchange = PaperExchange(seed=seed)
+    pnl = PnLSeriesEngine()
+    triggers = TriggerEngine(lambda agent_id: (0.15, 0.25))
+    fills_seen = 0
+
+    def on_event(order, fill):
+        nonlocal fills_seen
+        if fill is not None:
+            fills_seen += 1
+            pnl.on_fill(fill)
+            triggers.on_fill(fill)
+
+    exchange.listeners.append(on_event)
+    names = [f"token-{i}" for i in range(tokens)]
+    mids = [rng.uniform(0.2, 0.8) for _ in range(tokens)]
+    agent_ids = [f"agent-{i:04d}" for i in range(agents)]
+    submits, passes = [], []
+    now = 0.0
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    for _ in range(ticks):
+        now += TICK
+        for t in range(tokens):
+            mids[t] = min(0.9, max(0.1, mids[t] + rng.gauss(0, 0.004)))
+        for agent_id in agent_ids:
+            if rng.random() >= orders_per_agent_tick:
+                continue
+            t = rng.randrange(tokens)
+            side = "BUY" if rng.random() < 0.6 else "SELL"
+            offset = rng.choice((-0.02, -0.01, 0.0, 0.01, 0.02))
+            price = round(min(0.99, max(0.01, mids[t] + (offset if side == "BUY" else -offset))), 2)
+            order_type = rng.choice(("GTC", "FAK", "FOK"))
+            t0 = time.perf_counter()
+            exchange.submit(names[t], side, price, rng.choice((5, 10, 25, 50)), order_type,
+                            agent_id=agent_id, fee_rate_bps=200, now=now)
+            submits.append(time.perf_counter() - t0)
+        books = {token_id: _book(mids[int(token_id[6:])], rng) for token_id in exchange.tokens()}
+        t0 = time.perf_counter()
+        exchange.process(books, now=now)
+        passes.append(time.perf_counter() - t0)
+        for token_id in list(triggers.tokens()):
+            triggers.on_price(token_id, mids[int(token_id[6:])])
+    elapsed = time.perf_counter() - started
+    return {
+        "orders": len(submits),
+        "fills": fills_seen,
+        "resting": len(exchange.open_orders()),
+        "paper_ledgers": len(pnl.keys("paper")),
+        "armed": len(triggers),
+        "submits": submits,
+        "passes": passes,
+        "elapsed": elapsed,
+        "rss_growth_mib": (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agents", type=int, default=1000)
+    parser.add_argument("--tokens", type=int, default=200)
+    parser.add_argument("--ticks", type=int, default=400)
+    parser.add_argument("--rate", type=float, default=0.2, help="orders per agent per tick")
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+
+    r = run(args.agents, args.tokens, args.ticks, args.rate, args.seed)
+    simulated = args.ticks * TICK
+    submit_us = [s * 1e6 for s in r["submits"]]
+    pass_ms = [s * 1e3 for s in r["passes"]]
+    print(f"{args.agents} paper agents, {args.tokens} tokens, {args.ticks} ticks ({simulated:.0f} s simulated at {TICK} s/tick)")
+    print(f"  orders submitted        {r['orders']:>10}   ({r['orders'] / simulated:,.0f}/s simulated)")
+    print(f"  fills (with PnL+triggers) {r['fills']:>8}   ({r['fills'] / r['elapsed']:,.0f}/s wall)")
+    print(f"  submit()                p50 {statistics.median(submit_us):.2f} µs   p99 {_pct(submit_us, 99):.2f} µs")
+    print(f"  process() per tick      p50 {statistics.median(pass_ms):.2f} ms   p99 {_pct(pass_ms, 99):.2f} ms   "
+          f"(budget {TICK * 1000:.0f} ms)")
+    print(f"  wall time               {r['elapsed']:.2f} s for {simulated:.0f} s simulated "
+          f"({simulated / r['elapsed']:.1f}x real time)")
+    print(f"  resting orders at end   {r['resting']}; paper ledgers {r['paper_ledgers']}; armed triggers {r['armed']}")
+    print(f"  peak RSS growth         {r['rss_growth_mib']:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark: per-token /api/price path vs the coalesced bulk /api/prices path.
+
+The CLOB is replaced by a stub that sleeps for a fixed round-trip time per
+request, so the numbers reflect request count and concurrency, not network
+noise. Run from python-api/:
+
+    python benchmarks/bench_prices.py --rtt-ms 10
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from price_batcher import PriceBatcher, to_columns
+
+
+class LatencyClient:
+    """CLOB stand-in: every call costs one round trip."""
+
+    def __init__(self, rtt: float):
+        self.rtt = rtt
+        self.requests = 0
+
+    def _rt(self):
+        self.requests += 1
+        time.sleep(self.rtt)
+
+    def get_price(self, token_id, side):
+        self._rt()
+        return {"price": "0.51"}
+
+    def get_midpoint(self, token_id):
+        self._rt()
+        return {"mid": "0.52"}
+
+    def get_prices(self, params):
+        self._rt()
+        return {p.token_id: {"BUY": "0.51", "SELL": "0.53"} for p in params}
+
+    def get_midpoints(self, params):
+        self._rt()
+        return {p.token_id: "0.52" for p in params}
+
+    def get_spreads(self, params):
+        self._rt()
+        return {p.token_id: "0.02" for p in params}
+
+
+def per_token(client, tokens):
+    """What the dashboard does today: /api/price once per token."""
+    return [(client.get_price(t, "BUY"), client.get_midpoint(t)) for t in tokens]
+
+
+async def bulk(client, tokens, callers: int):
+    batcher = PriceBatcher(client)
+    # Split the portfolio across concurrent callers to exercise coalescing
+    parts = [tokens[i::callers] for i in range(callers)]
+    results = await asyncio.gather(*(batcher.get(p) for p in parts))
+    return [to_columns(p, r) for p, r in zip(parts, results)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rtt-ms", type=float, default=10.0)
+    parser.add_argument("--sizes", default="10,100,1000")
+    parser.add_argument("--callers", type=int, default=4)
+    args = parser.parse_args()
+    rtt = args.rtt_ms / 1000
+
+    print(f"{'tokens':>7} {'path':>10} {'requests':>9} {'wall ms':>10}")
+    for n in (int(s) for s in args.sizes.split(",")):
+        tokens = [str(10**30 + i) for i in range(n)]
+
+        client = LatencyClient(rtt)
+        started = time.perf_counter()
+        per_token(client, tokens)
+        print(f"{n:>7} {'per-token':>10} {client.requests:>9} {(time.perf_counter() - started) * 1000:>10.1f}")
+
+        client = LatencyClient(rtt)
+        started = time.perf_counter()
+        asyncio.run(bulk(client, tokens, args.callers))
+        print(f"{n:>7} {'bulk':>10} {client.requests:>9} {(time.perf_counter() - started) * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark: Monte Carlo portfolio risk for a wallet and many agents.
+
+Builds a synthetic universe of binary markets, some of them grouped into
+neg-risk events and some into ordinary multi-market events, spreads
+positions across a wallet and a number of agents, then times
+RiskEngine.evaluate at increasing scenario counts, with and without the
+event copula, and the cached re-read. A per-scenario Python loop over the
+same holdings is timed on a small run for comparison. Run from python-api/:
+
+    python benchmarks/bench_risk.py --markets 500 --agents 20 --scenarios 100000,1000000
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import resource
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from risk_engine import RiskEngine
+
+
+def universe(markets: int, event_size: int, seed: int) -> tuple:
+    """describe/price_of callables over `markets` binary markets; every
+    third event is neg-risk."""
+    rng = random.Random(seed)
+    described, prices = {}, {}
+    for m in range(markets):
+        event = m // event_size
+        neg_risk = event % 3 == 0
+        yes, no = f"{m}:yes", f"{m}:no"
+        p = rng.uniform(0.02, 0.3) if neg_risk else rng.uniform(0.05, 0.95)
+        prices[yes], prices[no] = p, 1 - p
+        described[yes] = described[no] = (f"m{m}", (yes, no), f"e{event}", neg_risk)
+    return described.get, prices.get, list(described)
+
+
+def holdings(tokens: list, agents: int, per_holder: int, seed: int) -> dict:
+    rng = random.Random(seed + 1)
+
+    def book(n):
+        return {t: (rng.uniform(5, 500), rng.uniform(0.05, 0.95)) for t in rng.sample(tokens, n)}
+
+    holders = {("wallet", ""): book(min(len(tokens), per_holder * 4))}
+    for a in range(agents):
+        holders[("agent", f"agent-{a:03d}")] = book(per_holder)
+    return holders
+
+
+def naive(holders: dict, describe, price_of, scenarios: int, seed: int) -> float:
+    """Independent markets, one Python pass per scenario and holder."""
+    rng = random.Random(seed)
+    markets = {describe(t)[0]: describe(t)[1] for h in holders.values() for t in h}
+    started = time.perf_counter()
+    for _ in range(scenarios):
+        winners = {key: tokens[0] if rng.random() < price_of(tokens[0]) else tokens[1] for key, tokens in markets.items()}
+        for positions in holders.values():
+            sum(size for t, (size, _) in positions.items() if winners[describe(t)[0]] == t)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--markets", type=int, default=500)
+    parser.add_argument("--event-size", type=int, default=5)
+    parser.add_argument("--agents", type=int, default=20)
+    parser.add_argument("--per-holder", type=int, default=40, help="positions per agent (the wallet holds 4x)")
+    parser.add_argument("--scenarios", default="100000,1000000")
+    parser.add_argument("--naive-scenarios", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    describe, price_of, tokens = universe(args.markets, args.event_size, args.seed)
+    holders = holdings(tokens, args.agents, args.per_holder, args.seed)
+    held = {t for h in holders.values() for t in h}
+    print(f"{len(holders)} holders, {len(held)} distinct tokens over {args.markets} markets "
+          f"(events of {args.event_size}, every third neg-risk)\n")
+    print(f"{'scenarios':>10} {'copula':>7} {'ms':>9} {'scen/s':>12} {'cached ms':>10}")
+    for n in [int(s) for s in args.scenarios.split(",") if s]:
+        for rho in (0.0, 0.3):
+            engine = RiskEngine(describe, price_of)
+            rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            t0 = time.perf_counter()
+            result = engine.evaluate(holders, n, correlation=rho)
+            cold = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            again = engine.evaluate(holders, n, correlation=rho)
+            warm = time.perf_counter() - t0
+            assert again["cached"]
+            growth = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024
+            print(f"{n:>10} {rho:>7.1f} {cold * 1000:>9.1f} {n / cold:>12,.0f} {warm * 1000:>10.2f}"
+                  f"   (peak RSS +{growth:.0f} MiB)")
+        wallet = result["holders"][("wallet", "")]
+        print(f"{'':>10} wallet: mark {wallet['mark_value']:.0f}, VaR95 {wallet['var']:.0f}, "
+              f"CVaR95 {wallet['cvar']:.0f}, worst case {wallet['worst_case_loss']:.0f}")
+
+    elapsed = naive(holders, describe, price_of, args.naive_scenarios, args.seed)
+    print(f"\nper-scenario Python loop: {args.naive_scenarios} scenarios in {elapsed * 1000:.0f} ms "
+          f"({args.naive_scenarios / elapsed:,.0f} scen/s, independent markets only)")
+
+
+if __name__ == "__main__":
+    main()
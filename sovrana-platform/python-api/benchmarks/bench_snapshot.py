@@ -0,0 +1,200 @@
+"""
+Benchmark: shared-memory market snapshot vs per-worker copies.
+
+Measures, with synthetic markets:
+  * read latency of the zero-copy reader (view, quote lookups, a full-column scan)
+    next to the per-worker dict lookups it replaces
+  * memory per worker (PSS/USS from /proc) when every worker builds its own
+    catalogue and price map, versus attaching to one shared segment, with and
+    without hydrating a catalogue from it
+  * propagation delay from publish() in one process to visibility in another
+
+Linux only (reads /proc/<pid>/smaps_rollup). Run from python-api/:
+
+    python benchmarks/bench_snapshot.py --markets 20000 --workers 4
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import multiprocessing as mp
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from market_catalogue import MarketCatalogue
+from mock_polymarket import generate_markets
+from price_batcher import Quote
+from shared_snapshot import SnapshotReader, SnapshotWriter
+
+NAME = f"sovrana-bench-{os.getpid()}"
+
+
+def _memory_kib() -> dict:
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                values[parts[0][:-1]] = int(parts[1])
+    return {
+        "pss": values.get("Pss", 0),
+        "uss": values.get("Private_Clean", 0) + values.get("Private_Dirty", 0),
+        "rss": values.get("Rss", 0),
+    }
+
+
+def _pct(values: list, pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def _time(fn, runs: int) -> tuple:
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e6)
+    return statistics.median(samples), _pct(samples, 99)
+
+
+# ─── Read latency ────────────────────────────────────────────────────────────
+def bench_reads(writer: SnapshotWriter, tokens: list, quotes: dict, runs: int) -> None:
+    reader = SnapshotReader(NAME)
+    local = dict(quotes)
+    rng = np.random.default_rng(1)
+    print("\nRead latency (µs)                         p50        p99")
+    rows = [("view()", lambda: reader.view())]
+    for k in (1, 100, 1000):
+        sample = [tokens[i] for i in rng.choice(len(tokens), k, replace=False)]
+        rows.append((f"shared quotes({k})", lambda s=sample: reader.quotes(s)))
+        rows.append((f"per-worker dict lookups({k})", lambda s=sample: [local.get(t) for t in s]))
+    rows.append(("shared nanmean(mid) over all tokens", lambda: reader.read(lambda snap: np.nanmean(snap.columns["mid"]))))
+    rows.append(("per-worker mean(mid) over all tokens", lambda: statistics.fmean(q.mid for q in local.values())))
+    for label, fn in rows:
+        fn()
+        p50, p99 = _time(fn, runs)
+        print(f"  {label:<38} {p50:>9.1f}  {p99:>9.1f}")
+    reader.close()
+
+
+# ─── Memory ──────────────────────────────────────────────────────────────────
+def _worker_copy(markets: list, quotes: dict, out) -> None:
+    before = _memory_kib()
+    catalogue = MarketCatalogue("bench")
+    catalogue.load(markets)
+    prices = {t: Quote(q.buy, q.sell, q.mid, q.spread, q.as_of) for t, q in quotes.items()}
+    after = _memory_kib()
+    out.put({k: after[k] - before[k] for k in after} | {"items": len(catalogue) + len(prices)})
+
+
+def _worker_shared(name: str, hydrate: bool, out) -> None:
+    before = _memory_kib()
+    reader = SnapshotReader(name)
+    snap = reader.view()
+    reader._index(snap)
+    total = sum(float(np.nansum(v)) for k, v in snap.columns.items() if v.dtype.kind == "f")  # touch every page
+    catalogue = None
+    if hydrate:
+        catalogue = MarketCatalogue("bench")
+        reader.hydrate(catalogue, 0)
+    else:
+        # what a worker that never searches does instead: lookups off the columns
+        ids = snap.columns["token_id"][:2000].tolist()
+        records = [reader.by_token(t.decode()) for t in ids] + reader.top_by_volume(100)
+    after = _memory_kib()
+    out.put({k: after[k] - before[k] for k in after} | {"items": snap.n_tokens, "checksum": total})
+
+
+def bench_memory(markets: list, quotes: dict, workers: int) -> None:
+    # spawn, not fork: forked children share the parent's heap copy-on-write,
+    # which would hide what each worker really costs
+    ctx = mp.get_context("spawn")
+    print(f"\nMemory per worker, {workers} workers (MiB)     PSS      USS      RSS")
+    for label, target, args in (
+        ("per-worker catalogue + prices", _worker_copy, (markets, quotes)),
+        ("shared views + column lookups", _worker_shared, (NAME, False)),
+        ("shared views + hydrated catalogue", _worker_shared, (NAME, True)),
+    ):
+        out = ctx.Queue()
+        procs = [ctx.Process(target=target, args=(*args, out)) for _ in range(workers)]
+        for p in procs:
+            p.start()
+        results = [out.get() for _ in procs]
+        for p in procs:
+            p.join()
+        avg = {k: statistics.fmean(r[k] for r in results) / 1024 for k in ("pss", "uss", "rss")}
+        print(f"  {label:<38} {avg['pss']:>8.1f} {avg['uss']:>8.1f} {avg['rss']:>8.1f}")
+
+
+# ─── Propagation ─────────────────────────────────────────────────────────────
+def _follower(ready, publishes: int, out) -> None:
+    reader = SnapshotReader(NAME)
+    seen = reader.publishes
+    delays = []
+    ready.set()
+    while len(delays) < publishes:
+        count = reader.publishes
+        if count != seen:
+            seen = count
+            delays.append((time.monotonic() - reader.view().published_at) * 1e6)
+    out.put(delays)
+
+
+def bench_propagation(writer: SnapshotWriter, tokens: list, publishes: int, interval: float) -> None:
+    ctx = mp.get_context("fork")
+    ready, out = ctx.Event(), ctx.Queue()
+    proc = ctx.Process(target=_follower, args=(ready, publishes, out))
+    proc.start()
+    ready.wait()
+    publish_times = []
+    for i in range(publishes):
+        writer.update_quotes({t: Quote(0.49, 0.51, 0.5 + (i % 10) / 1000, 0.02, time.time()) for t in tokens[:1000]})
+        t0 = time.perf_counter()
+        writer.publish()
+        publish_times.append((time.perf_counter() - t0) * 1e6)
+        time.sleep(interval)
+    delays = out.get()
+    proc.join()
+    print(f"\nUpdate propagation over {publishes} publishes (µs)   p50        p99")
+    print(f"  {'publish() (price columns only)':<38} {statistics.median(publish_times):>9.1f}  {_pct(publish_times, 99):>9.1f}")
+    print(f"  {'publish -> visible in another process':<38} {statistics.median(delays):>9.1f}  {_pct(delays, 99):>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--markets", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--runs", type=int, default=500)
+    parser.add_argument("--publishes", type=int, default=200)
+    parser.add_argument("--interval-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    markets = generate_markets(args.markets)
+    catalogue = MarketCatalogue("bench")
+    catalogue.load(markets)
+    now = time.time()
+    tokens = [t for r in catalogue.records() for t in r.token_ids]
+    quotes = {t: Quote(0.49, 0.51, 0.5, 0.02, now) for t in tokens}
+
+    writer = SnapshotWriter(NAME, token_capacity=max(1024, len(tokens)), blob_capacity=64 * 1024 * 1024)
+    try:
+        t0 = time.perf_counter()
+        writer.publish(catalogue.records())
+        first = time.perf_counter() - t0
+        writer.update_quotes(quotes)
+        writer.publish()
+        print(f"{len(catalogue)} markets / {len(tokens)} tokens; first publish (encode + layout) {first * 1000:.1f} ms, "
+              f"segment {writer.layout.total_bytes / 2**20:.1f} MiB reserved")
+        bench_reads(writer, tokens, quotes, args.runs)
+        bench_memory(markets, quotes, args.workers)
+        bench_propagation(writer, tokens, args.publishes, args.interval_ms / 1000)
+    finally:
+        writer.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark: price-trigger evaluation with sorted per-token ladders vs polling.
+
+Arms a stop-loss / take-profit pair for every synthetic (agent, token)
+position, then drives a random-walk price feed through the engine. Fired
+positions are re-entered at the current price so the number of armed
+triggers stays constant; updates that fire are reported separately from
+the ones that only have to prove nothing crossed. The polling baseline checks every position on the
+updated token against the price, which is what evaluating the stored
+percentages without an index costs. Run from python-api/:
+
+    python benchmarks/bench_triggers.py --triggers 100000 --tokens 500 --updates 200000
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from price_triggers import TriggerEngine
+
+STOP_PCT = 0.15  # AgentConfig defaults
+TAKE_PCT = 0.25
+
+
+def _pct(values: list, pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def _feed(tokens: int, updates: int, seed: int) -> tuple:
+    """(token index, price) per update: each token random-walks around 0.5."""
+    rng = np.random.default_rng(seed)
+    which = rng.integers(0, tokens, updates)
+    steps = rng.normal(0, 0.002, updates)
+    prices = np.full(tokens, 0.5)
+    out = np.empty(updates)
+    for i, (t, step) in enumerate(zip(which.tolist(), steps.tolist())):
+        prices[t] = min(0.98, max(0.02, prices[t] + step))
+        out[i] = prices[t]
+    return which.tolist(), out.tolist()
+
+
+def _entries(triggers: int, tokens: int, seed: int) -> list:
+    rng = np.random.default_rng(seed + 1)
+    positions = triggers // 2
+    token_of = rng.integers(0, tokens, positions).tolist()
+    entry = (0.5 + rng.normal(0, 0.02, positions)).tolist()
+    return [(f"agent-{i}", f"token-{t}", e) for i, (t, e) in enumerate(zip(token_of, entry))]
+
+
+def bench_ladder(entries: list, feed: tuple) -> dict:
+    engine = TriggerEngine(lambda agent_id: (STOP_PCT, TAKE_PCT))
+    t0 = time.perf_counter()
+    for agent_id, token_id, entry in entries:
+        engine.arm(agent_id, token_id, entry, 10.0)
+    arm_s = time.perf_counter() - t0
+    armed = len(engine)
+
+    def reenter(fired: list) -> None:
+        for trigger in fired:
+            engine.arm(trigger.agent_id, trigger.token_id, trigger.fired_price, 10.0)
+
+    engine.listeners.append(reenter)
+    which, prices = feed
+    names = [f"token-{i}" for i in range(max(which) + 1)]
+    quiet, firing = [], []
+    started = time.perf_counter()
+    for t, price in zip(which, prices):
+        t0 = time.perf_counter()
+        fired = engine.on_price(names[t], price)
+        (firing if fired else quiet).append((time.perf_counter() - t0, len(fired)))
+    elapsed = time.perf_counter() - started
+    return {"arm_s": arm_s, "armed": armed, "armed_after": len(engine), "fired": engine.fired_count,
+            "elapsed": elapsed, "samples": [s for s, _ in quiet + firing], "quiet": [s for s, _ in quiet], "firing": firing}
+
+
+def bench_polling(entries: list, feed: tuple) -> dict:
+    """Per token, a list of [stop, take] per position checked on every update."""
+    by_token: dict = {}
+    for _, token_id, entry in entries:
+        by_token.setdefault(token_id, []).append([entry * (1 - STOP_PCT), entry * (1 + TAKE_PCT)])
+    which, prices = feed
+    names = [f"token-{i}" for i in range(max(which) + 1)]
+    fired = 0
+    samples = []
+    started = time.perf_counter()
+    for t, price in zip(which, prices):
+        t0 = time.perf_counter()
+        for pair in by_token.get(names[t], ()):
+            if price <= pair[0] or price >= pair[1]:
+                fired += 1
+                pair[0], pair[1] = price * (1 - STOP_PCT), price * (1 + TAKE_PCT)
+        samples.append(time.perf_counter() - t0)
+    return {"fired": fired, "elapsed": time.perf_counter() - started, "samples": samples}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--triggers", type=int, default=100000)
+    parser.add_argument("--tokens", type=int, default=500)
+    parser.add_argument("--updates", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    entries = _entries(args.triggers, args.tokens, args.seed)
+    feed = _feed(args.tokens, args.updates, args.seed)
+    ladder = bench_ladder(entries, feed)
+    polling = bench_polling(entries, feed)
+
+    print(f"{ladder['armed']} triggers on {args.tokens} tokens armed in {ladder['arm_s'] * 1000:.0f} ms "
+          f"({ladder['arm_s'] / ladder['armed'] * 1e6:.2f} µs each); {args.updates} price updates\n")
+    print(f"{'':<10} {'updates/s':>12} {'p50 µs':>8} {'p99 µs':>8} {'max µs':>9} {'fired':>9}")
+    for label, result in (("ladder", ladder), ("polling", polling)):
+        us = [s * 1e6 for s in result["samples"]]
+        print(f"{label:<10} {args.updates / result['elapsed']:>12,.0f} {statistics.median(us):>8.2f} "
+              f"{_pct(us, 99):>8.2f} {max(us):>9.1f} {result['fired']:>9}")
+    quiet = [s * 1e6 for s in ladder["quiet"]]
+    per_fire = sum(s for s, _ in ladder["firing"]) / max(1, ladder["fired"]) * 1e6
+    print(f"\nladder, updates that fired nothing: p50 {statistics.median(quiet):.2f} µs, p99 {_pct(quiet, 99):.2f} µs "
+          f"({len(quiet)} updates)")
+    print(f"ladder, updates that fired: {len(ladder['firing'])}, {per_fire:.2f} µs per fired trigger including re-entry")
+    print(f"\nArmed after the run: {ladder['armed_after']} (fired positions re-entered at the crossing price)")
+
+
+if __name__ == "__main__":
+    main()
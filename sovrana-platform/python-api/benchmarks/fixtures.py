@@ -0,0 +1,152 @@
+"""
+Benchmark fixtures: synthetic upstream payloads at any size, or recordings
+of real responses replayed (and repeated) up to the requested size.
+
+Record a fixture set from the live APIs (needs the usual credentials):
+
+    python benchmarks/fixtures.py record --out benchmarks/fixtures
+"""
+
+import os
+import sys
+import json
+import random
+import hashlib
+import argparse
+import itertools
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_polymarket import generate_markets
+
+KINDS = ("trades", "orders", "markets", "positions")
+
+
+def _hex(seed: str) -> str:
+    return "0x" + hashlib.sha256(seed.encode()).hexdigest()
+
+
+def synthetic_trades(n: int, markets: int = 200, seed: int = 1) -> list:
+    rng = random.Random(seed)
+    base = 1_760_000_000
+    out = []
+    for i in range(n):
+        m = rng.randrange(markets)
+        out.append({
+            "id": f"trade-{i}",
+            "taker_order_id": _hex(f"o{i}"),
+            "market": _hex(f"m{m}"),
+            "asset_id": str(10**30 + 2 * m + rng.randrange(2)),
+            "side": rng.choice(("BUY", "SELL")),
+            "size": f"{rng.uniform(5, 500):.2f}",
+            "fee_rate_bps": "0",
+            "price": f"{rng.uniform(0.02, 0.98):.2f}",
+            "status": "CONFIRMED",
+            "match_time": str(base + i * 30),
+            "last_update": str(base + i * 30),
+            "outcome": rng.choice(("Yes", "No")),
+            "owner": "bench-key",
+            "maker_address": "0x0000000000000000000000000000000000000b0b",
+            "transaction_hash": _hex(f"tx{i}"),
+            "trader_side": rng.choice(("TAKER", "MAKER")),
+        })
+    return out
+
+
+def synthetic_orders(n: int, markets: int = 200, seed: int = 2) -> list:
+    rng = random.Random(seed)
+    out = []
+    for i in range(n):
+        m = rng.randrange(markets)
+        out.append({
+            "id": _hex(f"order{i}"),
+            "status": "LIVE",
+            "owner": "bench-key",
+            "maker_address": "0x0000000000000000000000000000000000000b0b",
+            "market": _hex(f"m{m}"),
+            "asset_id": str(10**30 + 2 * m),
+            "side": rng.choice(("BUY", "SELL")),
+            "original_size": f"{rng.uniform(5, 500):.2f}",
+            "size_matched": "0",
+            "price": f"{rng.uniform(0.02, 0.98):.2f}",
+            "outcome": "Yes",
+            "created_at": 1_760_000_000 + i,
+            "order_type": "GTC",
+        })
+    return out
+
+
+def synthetic_positions(n: int, seed: int = 3) -> list:
+    rng = random.Random(seed)
+    out = []
+    for i in range(n):
+        size = rng.uniform(5, 1000)
+        avg = rng.uniform(0.05, 0.95)
+        cur = min(0.99, max(0.01, avg + rng.gauss(0, 0.1)))
+        out.append({
+            "proxyWallet": "0x0000000000000000000000000000000000000b0b",
+            "asset": str(10**30 + i),
+            "conditionId": _hex(f"m{i}"),
+            "size": round(size, 2),
+            "avgPrice": round(avg, 4),
+            "initialValue": round(size * avg, 4),
+            "currentValue": round(size * cur, 4),
+            "cashPnl": round(size * (cur - avg), 4),
+            "curPrice": round(cur, 4),
+            "outcome": "Yes",
+            "outcomeIndex": 0,
+            "title": f"Synthetic market {i}",
+        })
+    return out
+
+
+def synthetic(kind: str, n: int) -> list:
+    if kind == "trades":
+        return synthetic_trades(n)
+    if kind == "orders":
+        return synthetic_orders(n)
+    if kind == "markets":
+        return generate_markets(n)
+    if kind == "positions":
+        return synthetic_positions(n)
+    raise ValueError(f"Unknown fixture kind {kind}")
+
+
+def load(kind: str, n: int, directory: str = None) -> list:
+    """Recorded fixtures from `directory` when present (cycled to size n),
+    otherwise synthetic ones."""
+    path = os.path.join(directory, f"{kind}.json") if directory else None
+    if path and os.path.exists(path):
+        with open(path) as f:
+            recorded = json.load(f)
+        if recorded:
+            return list(itertools.islice(itertools.cycle(recorded), n))
+    return synthetic(kind, n)
+
+
+def record(out_dir: str) -> None:
+    """Capture real upstream responses into a fixture directory."""
+    import urllib.request
+    from main import DATA_HOST, GAMMA_HOST, client
+
+    os.makedirs(out_dir, exist_ok=True)
+    captured = {"trades": client.get_trades(), "orders": client.get_orders()}
+    for kind, url in (
+        ("markets", f"{GAMMA_HOST}/markets?limit=500&active=true&closed=false&order=volume24hr&ascending=false"),
+        ("positions", f"{DATA_HOST}/positions?user={client.get_address()}"),
+    ):
+        req = urllib.request.Request(url, headers={"User-Agent": "Sovrana/1.0"})
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            captured[kind] = json.loads(resp.read().decode())
+    for kind, rows in captured.items():
+        with open(os.path.join(out_dir, f"{kind}.json"), "w") as f:
+            json.dump(rows, f)
+        print(f"{kind}: {len(rows)} rows")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=("record",))
+    parser.add_argument("--out", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures"))
+    args = parser.parse_args()
+    record(args.out)
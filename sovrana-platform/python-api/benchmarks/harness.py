@@ -0,0 +1,171 @@
+"""
+Timing, memory and baseline comparison helpers for the benchmark suite.
+
+Wall-clock figures only compare across runs on the same machine, so the
+gate compares raw timings against a baseline recorded on the gate machine.
+Every case also times a fixed calibration workload; when those readings are
+far from the baseline's, the machine is not the one the baseline came from
+and the comparison is refused rather than rescaled, since sub-millisecond
+cases do not scale with a CPU-bound workload.
+"""
+
+import gc
+import json
+import time
+import platform
+import tracemalloc
+import subprocess
+from datetime import datetime, timezone
+
+GATED_METRICS = {
+    # metric: (True if higher is better, True if it is a timing gated even for sub-millisecond cases)
+    "throughput_rps": (True, False),
+    "p50_ms": (False, True),
+    "p99_ms": (False, False),
+    "peak_kib": (False, True),
+}
+NOISE_FLOOR_MS = 0.25  # per-call timing changes smaller than this are scheduler jitter, whatever the ratio
+SUB_MS = 1.0  # below this baseline p50, only p50 and memory are gated; the tail and rate are jitter
+MAX_SPEED_RATIO = 1.25  # calibration ratios beyond this (either way) mean a different machine
+
+
+def _percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[idx]
+
+
+def calibrate(rounds: int = 3) -> float:
+    """Milliseconds for a fixed CPU-bound workload of the kind the endpoints
+    do (building dicts, JSON round trips, sorting, float parsing). Best of
+    `rounds`, so a noisy moment does not set the scale."""
+    payload = [{"id": f"trade-{i}", "price": f"{i % 97 / 100:.2f}", "size": i * 1.5, "side": "BUY" if i % 2 else "SELL"}
+               for i in range(2000)]
+    best = float("inf")
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        for _ in range(5):
+            rows = json.loads(json.dumps(payload))
+            rows.sort(key=lambda r: (r["side"], float(r["price"])))
+            sum(float(r["price"]) * r["size"] for r in rows)
+        best = min(best, time.perf_counter() - t0)
+    return round(best * 1000, 4)
+
+
+def measure(fn, min_iterations: int = 5, max_iterations: int = 1000, budget: float = 0.5, rounds: int = 3) -> dict:
+    """Run `fn` repeatedly for about `budget` seconds, split into `rounds`
+    blocks. Each figure is the best block's, as with timeit: interference
+    from the machine only ever slows a block down. Peak memory comes from
+    one extra traced call so tracemalloc overhead stays out of the timings."""
+    fn()  # warm-up
+    blocks = []
+    for _ in range(rounds):
+        gc.collect()
+        timings = []
+        started = time.perf_counter()
+        while len(timings) < min_iterations or (time.perf_counter() - started < budget / rounds
+                                                 and len(timings) < max_iterations // rounds):
+            t0 = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - t0)
+        timings.sort()
+        blocks.append(timings)
+
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "iterations": sum(len(t) for t in blocks),
+        "throughput_rps": round(max(len(t) / sum(t) for t in blocks), 2),
+        "p50_ms": round(min(_percentile(t, 50) for t in blocks) * 1000, 4),
+        "p99_ms": round(min(_percentile(t, 99) for t in blocks) * 1000, 4),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def best(a: dict, b: dict) -> dict:
+    """Merge two measurements of one case, keeping the better of each figure."""
+    merged = dict(a)
+    for metric, (higher_is_better, _) in GATED_METRICS.items():
+        if metric in a and metric in b:
+            merged[metric] = max(a[metric], b[metric]) if higher_is_better else min(a[metric], b[metric])
+    if a.get("calibration_ms") and b.get("calibration_ms"):
+        merged["calibration_ms"] = min(a["calibration_ms"], b["calibration_ms"])
+    merged["iterations"] = a.get("iterations", 0) + b.get("iterations", 0)
+    return merged
+
+
+def metadata() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5).stdout.strip()
+    except Exception:
+        commit = ""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "commit": commit,
+    }
+
+
+def save(path: str, results: dict) -> None:
+    with open(path, "w") as f:
+        json.dump({"meta": metadata(), "results": results}, f, indent=2, sort_keys=True)
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f).get("results", {})
+
+
+def case_ratio(stats: dict, base: dict) -> float:
+    """A case's calibration_ms over the baseline's for it (> 1: slower now),
+    or 1.0 if either has none."""
+    old, new = base.get("calibration_ms"), stats.get("calibration_ms")
+    return new / old if old and new else 1.0
+
+
+def comparable(ratio: float) -> bool:
+    return 1 / MAX_SPEED_RATIO <= ratio <= MAX_SPEED_RATIO
+
+
+def speed_ratio(results: dict, baseline: dict) -> float:
+    """Median case_ratio over the cases both runs have, or 1.0 if none."""
+    ratios = sorted(case_ratio(stats, baseline[case]) for case, stats in results.items() if case in baseline)
+    return ratios[len(ratios) // 2] if ratios else 1.0
+
+
+def compare(results: dict, baseline: dict, threshold: float, p99_threshold: float) -> list:
+    """Regressions beyond `threshold` (fractional; `p99_threshold` for the
+    noisier tail) for every case present in both runs, on raw numbers.
+    Timing changes under NOISE_FLOOR_MS per call (throughput converted to
+    per-call ms) are ignored, for sub-millisecond cases only p50 and memory
+    are gated, and a timing's limit is widened to the case's baseline
+    spread. Check comparable(speed_ratio(...)) first. Returns (case, metric,
+    baseline, current, change) rows."""
+    regressions = []
+    for case, current in results.items():
+        base = baseline.get(case)
+        if not base:
+            continue
+        sub_ms = base.get("p50_ms", SUB_MS) < SUB_MS
+        for metric, (higher_is_better, gated_sub_ms) in GATED_METRICS.items():
+            old, new = base.get(metric), current.get(metric)
+            if not old or not new or (sub_ms and not gated_sub_ms):
+                continue
+            change = (new - old) / old
+            if metric == "throughput_rps" and abs(1000 / new - 1000 / old) < NOISE_FLOOR_MS:
+                continue
+            if metric.endswith("_ms") and abs(new - old) < NOISE_FLOOR_MS:
+                continue
+            limit = p99_threshold if metric == "p99_ms" else threshold
+            if metric != "peak_kib":
+                # a case whose own baseline passes disagreed by more cannot be gated tighter
+                limit = max(limit, base.get("spread", 1.0) - 1)
+            if (higher_is_better and change < -limit) or (not higher_is_better and change > limit):
+                regressions.append((case, metric, round(old, 4), new, change))
+    return regressions
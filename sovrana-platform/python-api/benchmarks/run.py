@@ -0,0 +1,357 @@
+"""
+Endpoint benchmark suite.
+
+Runs the FastAPI endpoints of main.py and polymarket_service.py, and the
+Vercel portfolio_* handlers, fully offline against synthetic or recorded
+fixtures at several data sizes. Reports throughput, p50/p99 latency and peak
+memory, writes JSON, and fails if a gated metric regresses past the
+threshold versus the stored baseline. Timings are compared raw, so the
+baseline must be recorded on the machine that runs the gate; a calibration
+workload timed next to every case (see harness.calibrate) detects a
+different machine, and the comparison is then refused (exit 2) instead of
+rescaled. Each case is timed once per pass through the suite (--passes) and
+keeps its best figures, so a slow spell on the host does not decide them,
+and cases flagged as regressed are re-measured (--confirm) before the run
+fails. Run from python-api/:
+
+    python benchmarks/run.py                      # compare to baseline.json
+    python benchmarks/run.py --only main.summary  # one case family
+    python benchmarks/run.py --update-baseline    # accept current numbers
+
+baseline.json is recorded with `python benchmarks/run.py --update-baseline`
+at the default sizes, on the gate machine.
+"""
+
+import io
+import os
+import json
+import sys
+import time
+import asyncio
+import argparse
+import importlib
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+import stubs
+import harness
+import fixtures
+
+stubs.install()
+
+import main  # noqa: E402  (must follow stubs.install)
+import polymarket_service  # noqa: E402
+from market_catalogue import MarketCatalogue  # noqa: E402
+from price_batcher import PriceBatcher, to_columns  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+BASELINE = os.path.join(HERE, "baseline.json")
+RESULTS = os.path.join(HERE, "results", "latest.json")
+CONFIRM_PAUSE = 5.0  # seconds between re-measures of flagged cases, so each lands in a different spell
+
+_loop = asyncio.new_event_loop()
+
+
+def _await(coro):
+    return _loop.run_until_complete(coro)
+
+
+def _render(result) -> bytes:
+    """Encode a route's return value the way FastAPI's JSONResponse would, so
+    in-process calls pay the same serialization cost as a real request."""
+    return json.dumps(jsonable_encoder(result), ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _fastapi(fn, *args, **kwargs):
+    if asyncio.iscoroutinefunction(fn):
+        return lambda: _render(_await(fn(*args, **kwargs)))
+    return lambda: _render(fn(*args, **kwargs))
+
+
+def _vercel(module_name: str):
+    """Invoke a BaseHTTPRequestHandler-style Vercel function in-process."""
+    handler_cls = importlib.import_module(module_name).handler
+
+    def call():
+        h = handler_cls.__new__(handler_cls)
+        h.wfile = io.BytesIO()
+        h.request_version = "HTTP/1.1"
+        h.requestline = "GET / HTTP/1.1"
+        h.command = "GET"
+        h.client_address = ("127.0.0.1", 0)
+        h.log_request = lambda *a, **k: None
+        h.do_GET()
+        return h.wfile.getvalue()
+    return call
+
+
+def _deploy_agents(count: int, strategy: str = "sentiment") -> list:
+    main.agents_state.clear()
+    for i in range(count):
+        _await(main.deploy_agent(main.AgentConfig(name=f"bench-{i}", strategy=strategy)))
+    return list(main.agents_state)
+
+
+# ─── Cases ───────────────────────────────────────────────────────────────────
+# name -> (dimension, setup(size) -> callable)
+def _with(kind: str, size: int, fixture_dir: str):
+    setattr(stubs.Upstream, kind, fixtures.load(kind, size, fixture_dir))
+
+
+def case_main_trades(n, fx):
+    _with("trades", n, fx)
+    return _fastapi(main.get_trades)
+
+
+def case_main_orders(n, fx):
+    _with("orders", n, fx)
+    return _fastapi(main.get_orders)
+
+
+def case_main_summary(n, fx):
+    _with("trades", n, fx)
+    _with("orders", 100, fx)
+    return _fastapi(main.get_portfolio_summary)
+
+
+def case_main_markets(n, fx):
+    _with("markets", n, fx)
+    return _fastapi(main.get_markets, limit=n)
+
+
+def case_main_search(n, fx):
+    _with("markets", n, fx)
+    main.catalogue = MarketCatalogue(main.GAMMA_HOST)
+    main.catalogue.load(stubs.Upstream.markets)
+    return _fastapi(main.search_markets, q="bitcoin fed", limit=20)
+
+
+def case_main_signals(n, fx):
+    _with("markets", n, fx)
+    main.catalogue = MarketCatalogue(main.GAMMA_HOST)
+    main.catalogue.load(stubs.Upstream.markets)
+    agent_id = _deploy_agents(1)[0]
+    return _fastapi(main.get_agent_signals, agent_id, limit=n, tag=None)
+
+
+def case_main_signals_agents(n, fx):
+    _with("markets", 500, fx)
+    main.catalogue = MarketCatalogue(main.GAMMA_HOST)
+    main.catalogue.load(stubs.Upstream.markets)
+    agent_ids = _deploy_agents(n)
+    return lambda: [_render(_await(main.get_agent_signals(a, limit=100, tag=None))) for a in agent_ids]
+
+
+def _positions_book(n, fx):
+    _with("positions", n, fx)
+    book = main.positions_book = main.PositionsBook(main.DATA_HOST, stubs.ADDRESS)
+    book.refresh()
+    main.price_batcher = PriceBatcher(stubs.StubClobClient(), window=0)
+    main.price_batcher.listeners.append(book.mark)
+    return book
+
+
+def case_main_positions(n, fx):
+    _positions_book(n, fx)
+    return _fastapi(main.get_positions)
+
+
+def case_main_positions_remark(n, fx):
+    book = _positions_book(n, fx)
+    tokens = book.tokens()
+
+    def call():
+        # what the background loop does: fetch marks, then revalue
+        _await(main.price_batcher.get(tokens))
+        return book.snapshot()
+    return call
+
+
+def case_main_pnl_build(n, fx):
+    _with("trades", n, fx)
+    return lambda: main.PnLSeriesEngine().build(stubs.Upstream.trades)
+
+
+def case_main_pnl_series(n, fx):
+    _with("trades", n, fx)
+    main.pnl_engine = main.PnLSeriesEngine()
+    main.pnl_engine.build(stubs.Upstream.trades)
+    return _fastapi(main.get_pnl_series, scope="wallet", key="", start=None, end=None,
+                    points=500, method="lttb", resolution="1m")
+
+
+def case_main_prices(n, fx):
+    tokens = [str(10**30 + i) for i in range(n)]
+
+    async def fetch():
+        batcher = PriceBatcher(stubs.StubClobClient(), window=0)
+        return to_columns(tokens, await batcher.get(tokens))
+    return lambda: _render(_await(fetch()))
+
+
+def case_service_summary(n, fx):
+    _with("trades", n, fx)
+    _with("orders", 100, fx)
+    return _fastapi(polymarket_service.portfolio_summary)
+
+
+def case_service_trades(n, fx):
+    _with("trades", n, fx)
+    return _fastapi(polymarket_service.portfolio_trades)
+
+
+def case_service_orders(n, fx):
+    _with("orders", n, fx)
+    return _fastapi(polymarket_service.portfolio_orders)
+
+
+def case_service_positions(n, fx):
+    _with("positions", n, fx)
+    polymarket_service._positions = None
+    return _fastapi(polymarket_service.portfolio_positions, closed=False)
+
+
+def case_vercel_summary(n, fx):
+    _with("trades", n, fx)
+    _with("orders", 100, fx)
+    return _vercel("portfolio_summary")
+
+
+def case_vercel_trades(n, fx):
+    _with("trades", n, fx)
+    return _vercel("portfolio_trades")
+
+
+def case_vercel_orders(n, fx):
+    _with("orders", n, fx)
+    return _vercel("portfolio_orders")
+
+
+def case_vercel_positions(n, fx):
+    _with("positions", n, fx)
+    return _vercel("portfolio_positions")
+
+
+CASES = {
+    "main.trades": ("trades", case_main_trades),
+    "main.orders": ("orders", case_main_orders),
+    "main.summary": ("trades", case_main_summary),
+    "main.markets": ("markets", case_main_markets),
+    "main.search": ("markets", case_main_search),
+    "main.signals": ("markets", case_main_signals),
+    "main.signals_agents": ("agents", case_main_signals_agents),
+    "main.positions": ("positions", case_main_positions),
+    "main.positions_remark": ("positions", case_main_positions_remark),
+    "main.pnl_build": ("trades", case_main_pnl_build),
+    "main.pnl_series": ("trades", case_main_pnl_series),
+    "main.prices": ("tokens", case_main_prices),
+    "service.summary": ("trades", case_service_summary),
+    "service.trades": ("trades", case_service_trades),
+    "service.orders": ("orders", case_service_orders),
+    "service.positions": ("positions", case_service_positions),
+    "vercel.summary": ("trades", case_vercel_summary),
+    "vercel.trades": ("trades", case_vercel_trades),
+    "vercel.orders": ("orders", case_vercel_orders),
+    "vercel.positions": ("positions", case_vercel_positions),
+}
+
+
+def _measure(setup, n: int, args) -> dict:
+    """One block of one case, with the calibration workload timed next to it."""
+    stats = harness.measure(setup(n, args.fixtures), budget=args.budget / args.passes, rounds=1)
+    stats["calibration_ms"] = harness.calibrate()
+    return stats
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Offline endpoint benchmarks")
+    parser.add_argument("--sizes", default="100,1000,10000", help="data sizes for trades/orders/markets/positions/tokens")
+    parser.add_argument("--agents", default="1,10,100", help="agent counts for main.signals_agents")
+    parser.add_argument("--only", default="", help="comma-separated case name prefixes")
+    parser.add_argument("--fixtures", default=os.path.join(HERE, "fixtures"), help="recorded fixture directory (synthetic if absent)")
+    parser.add_argument("--budget", type=float, default=0.5, help="seconds per case and size, over all passes")
+    parser.add_argument("--out", default=RESULTS)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed fractional regression")
+    parser.add_argument("--p99-threshold", type=float, default=0.5, help="allowed fractional p99 regression")
+    parser.add_argument("--passes", type=int, default=3, help="passes through the suite the budget is spread over")
+    parser.add_argument("--confirm", type=int, default=3, help="re-measure flagged cases up to this many times before failing")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    agent_counts = [int(s) for s in args.agents.split(",") if s]
+    prefixes = [p for p in args.only.split(",") if p]
+
+    # A shared host runs in slow and fast spells lasting seconds, so the
+    # blocks measure() keeps the best of are spread over passes through the
+    # whole suite rather than timed back to back. How far a case's passes
+    # disagree (slowest p50 over fastest) is kept as its spread: the
+    # comparison cannot be tighter than the case's own noise
+    results, setups, p50s = {}, {}, {}
+    for _ in range(args.passes):
+        for name, (dimension, setup) in CASES.items():
+            if prefixes and not any(name.startswith(p) for p in prefixes):
+                continue
+            for n in (agent_counts if dimension == "agents" else sizes):
+                key = f"{name}@{dimension}={n}"
+                setups[key] = (setup, n)
+                stats = _measure(setup, n, args)
+                results[key] = harness.best(results[key], stats) if key in results else stats
+                p50s.setdefault(key, []).append(stats["p50_ms"])
+    for key, values in p50s.items():
+        results[key]["spread"] = round(max(values) / min(values), 3) if min(values) else 1.0
+    print(f"{'case':<28} {'iters':>6} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'peak KiB':>10}")
+    for key, stats in results.items():
+        print(f"{key:<28} {stats['iterations']:>6} {stats['throughput_rps']:>10.1f} {stats['p50_ms']:>10.3f} "
+              f"{stats['p99_ms']:>10.3f} {stats['peak_kib']:>10.1f}")
+
+    os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    harness.save(args.out, results)
+    print(f"\nResults written to {args.out}")
+
+    if args.update_baseline:
+        merged = harness.load(args.baseline) if os.path.exists(args.baseline) else {}
+        merged.update(results)
+        harness.save(args.baseline, merged)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against; run with --update-baseline to create one")
+        return 0
+
+    baseline = harness.load(args.baseline)
+    ratio = harness.speed_ratio(results, baseline)
+    if not harness.comparable(ratio):
+        print(f"\nCalibration is {ratio:.2f}x the baseline's: this is not the machine the baseline was recorded on, "
+              f"or it is far busier now. Not comparing; re-run, or re-record on the gate machine with --update-baseline")
+        return 2
+    regressions = harness.compare(results, baseline, args.threshold, args.p99_threshold)
+    # a case timed in a slow spell throughout reads as a regression; a real
+    # one survives re-measuring after the host has had a moment
+    for attempt in range(args.confirm):
+        flagged = sorted({case for case, *_ in regressions})
+        if not flagged:
+            break
+        time.sleep(CONFIRM_PAUSE)
+        print(f"\nRe-measuring {len(flagged)} flagged case(s), attempt {attempt + 1}/{args.confirm}")
+        for key in flagged:
+            setup, n = setups[key]
+            results[key] = harness.best(results[key], _measure(setup, n, args))
+        regressions = harness.compare(results, baseline, args.threshold, args.p99_threshold)
+    harness.save(args.out, results)
+    if not regressions:
+        print(f"No regressions beyond {args.threshold:.0%} ({args.p99_threshold:.0%} at p99) versus baseline")
+        return 0
+    print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%} ({args.p99_threshold:.0%} at p99) "
+          f"versus baseline:")
+    for case, metric, old, new, change in regressions:
+        print(f"  {case:<28} {metric:<15} {old:>12} -> {new:<12} ({change:+.1%})")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,110 @@
+"""
+Offline stand-ins for every upstream the services call: the CLOB client,
+Gamma/Data API requests made with urllib or requests. `install()` must run
+before main.py / polymarket_service.py are imported, since both build their
+client at import time or on first request.
+"""
+
+import io
+import os
+import json
+import urllib.parse
+import urllib.request
+
+import py_clob_client.client
+
+ADDRESS = "0x0000000000000000000000000000000000000b0b"
+
+
+class Upstream:
+    """Fixture data the stubs serve; benchmark cases swap these per size."""
+    trades: list = []
+    orders: list = []
+    markets: list = []
+    positions: list = []
+
+
+class StubClobClient:
+    def __init__(self, *args, **kwargs):
+        self.builder = None
+
+    def create_or_derive_api_creds(self, nonce=None):
+        return None
+
+    def derive_api_key(self, nonce=None):
+        return None
+
+    def set_api_creds(self, creds):
+        pass
+
+    def get_address(self):
+        return ADDRESS
+
+    def get_trades(self, params=None, next_cursor="MA==", **kwargs):
+        return Upstream.trades
+
+    def get_orders(self, params=None, next_cursor="MA=="):
+        return Upstream.orders
+
+    def get_markets(self, next_cursor="MA=="):
+        return {"data": Upstream.markets[:1000], "next_cursor": "LTE="}
+
+    def get_market(self, condition_id):
+        return {"condition_id": condition_id}
+
+    def get_prices(self, params):
+        return {p.token_id: {"BUY": "0.49", "SELL": "0.51"} for p in params}
+
+    def get_midpoints(self, params):
+        return {p.token_id: "0.5" for p in params}
+
+    def get_spreads(self, params):
+        return {p.token_id: "0.02" for p in params}
+
+
+def _payload(url: str):
+    parsed = urllib.parse.urlparse(url)
+    query = urllib.parse.parse_qs(parsed.query)
+    if parsed.path.endswith("/markets"):
+        offset = int(query.get("offset", ["0"])[0])
+        limit = int(query.get("limit", ["100"])[0])
+        return Upstream.markets[offset:offset + limit]
+    if parsed.path.endswith("/closed-positions"):
+        return []
+    if parsed.path.endswith("/positions"):
+        return Upstream.positions
+    return []
+
+
+class _Response(io.BytesIO):
+    status = 200
+    ok = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def json(self):
+        return json.loads(self.getvalue())
+
+
+def stub_urlopen(req, timeout=None, **kwargs):
+    url = req.full_url if isinstance(req, urllib.request.Request) else req
+    return _Response(json.dumps(_payload(url)).encode())
+
+
+def stub_requests_get(url, headers=None, timeout=None, **kwargs):
+    return _Response(json.dumps(_payload(url)).encode())
+
+
+def install() -> None:
+    os.environ["POLY_ADDRESS"] = ADDRESS
+    py_clob_client.client.ClobClient = StubClobClient
+    urllib.request.urlopen = stub_urlopen
+    try:
+        import requests
+        requests.get = stub_requests_get
+    except ImportError:
+        pass
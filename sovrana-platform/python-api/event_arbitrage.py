@@ -0,0 +1,372 @@
+"""
+Event Arbitrage
+Scans neg-risk events, where exactly one outcome market resolves YES, for
+baskets priced away from 1. Buying YES on every outcome pays 1, so asks
+summing below 1 after fees is an arbitrage; buying NO on every outcome pays
+n - 1, which YES bids summing above 1 offer (on the CLOB, YES bids are the
+NO side's asks). Books are held as fixed-depth columns in event order: a
+book update adjusts its event's running sums in O(1), and a scan flags and
+sizes every changed event together. Sweeps only fetch the books of events
+near an edge, moved by a quote, or stalest, a budget at a time.
+"""
+
+import time
+import logging
+import threading
+from typing import Callable, Optional
+
+import numpy as np
+
+logger = logging.getLogger("sovrana-api")
+
+LEVELS = 5  # book levels kept per outcome
+MIN_EDGE = 0.005  # profit per basket, after fees, for a level to be worth taking
+MAX_BOOK_AGE = 30.0  # seconds; events with an older book on any outcome are skipped
+RESUM_EVERY = 100  # scans between full re-sums, so running sums cannot drift
+WATCH_MARGIN = 0.02  # events whose top-of-book edge is within this of min_edge are swept every time
+MID_TOLERANCE = 0.001  # a quoted midpoint this far off the held book marks its event as moved
+OUTCOMES_TTL = 600.0  # seconds an event's upstream outcome list is trusted before it is checked again
+DUST = 1e-9
+BUY_YES = "buy_yes"
+BUY_NO = "buy_no"
+
+
+class EventArbScanner:
+    """Neg-risk events from the market catalogue with the top LEVELS of each
+    outcome's YES book. Call refresh() when the catalogue syncs (it only
+    rebuilds when neg-risk membership changed), on_book() for every book
+    seen and scan() to refresh `opportunities`; due_tokens() says which
+    books the next sweep should fetch. A basket only pays out if it covers
+    every open outcome, so events are checked against the outcome list
+    `outcomes_of(event_ids)` returns and skipped if the catalogue is missing
+    any; without it the listed outcomes are taken as the complete set."""
+
+    def __init__(self, levels: int = LEVELS, min_edge: float = MIN_EDGE, max_age: float = MAX_BOOK_AGE,
+                 outcomes_of: Optional[Callable[[list], dict]] = None):
+        self.levels = levels
+        self.outcomes_of = outcomes_of
+        self.min_edge = min_edge
+        self.max_age = max_age
+        self.synced_at: Optional[float] = None  # catalogue sync the layout was checked against
+        self.members: dict = {}  # event_id -> condition ids the layout was built from
+        self.incomplete = 0  # events left out because the catalogue lacks some of their outcomes
+        self._outcomes: dict = {}  # event_id -> (checked_at, open condition ids upstream, or None)
+        self.opportunities: dict = {}  # (event_id, direction) -> opportunity
+        self.book_updates = 0
+        self.scans = 0
+        self.scanned_at: Optional[float] = None
+        self.scan_ms: Optional[float] = None
+        self._lock = threading.Lock()
+        self._layout([])
+
+    def __len__(self) -> int:
+        return len(self.event_ids)
+
+    # ── Layout ──
+    @staticmethod
+    def _events(records: list) -> dict:
+        """event_id -> member records of every neg-risk event with two or more live markets."""
+        by_event: dict = {}
+        for record in records:
+            if record.neg_risk and record.event_ids and len(record.token_ids) >= 2:
+                by_event.setdefault(record.event_ids[0], []).append(record)
+        return {event_id: members for event_id, members in by_event.items() if len(members) > 1}
+
+    @staticmethod
+    def _membership(by_event: dict) -> dict:
+        return {event_id: tuple(sorted(r.condition_id for r in members)) for event_id, members in by_event.items()}
+
+    def refresh(self, records: list, synced_at: Optional[float] = None) -> bool:
+        """Rebuild if the catalogue's neg-risk events or their outcomes have
+        changed since the last layout, or an event's upstream outcome list
+        is due a re-check; otherwise only note the sync. May block on
+        outcomes_of."""
+        members = self._membership(self._events(records))
+        now = time.time()
+        due = [e for e, m in members.items() if self.members.get(e) != m
+               or (self.outcomes_of and now - self._outcomes.get(e, (0.0,))[0] > OUTCOMES_TTL)]
+        if not due and members.keys() == self.members.keys() and self.synced_at is not None:
+            self.synced_at = synced_at
+            return False
+        self.rebuild(records, synced_at)
+        return True
+
+    def _check_outcomes(self, event_ids: list) -> None:
+        now = time.time()
+        due = [e for e in event_ids if now - self._outcomes.get(e, (0.0,))[0] > OUTCOMES_TTL]
+        if due:
+            fetched = self.outcomes_of(due)
+            for e in due:
+                self._outcomes[e] = (now, fetched.get(e))
+        live = set(event_ids)
+        self._outcomes = {e: v for e, v in self._outcomes.items() if e in live}
+
+    def _complete(self, by_event: dict) -> list:
+        """(event_id, members) for events whose every open outcome is listed,
+        restricted to those outcomes."""
+        events = []
+        for event_id, members in by_event.items():
+            expected = self._outcomes.get(event_id, (0.0, None))[1]
+            if expected is None or not expected <= {r.condition_id for r in members}:
+                continue
+            members = [r for r in members if r.condition_id in expected]
+            if len(members) > 1:
+                events.append((event_id, members))
+        return events
+
+    def rebuild(self, records: list, synced_at: Optional[float] = None) -> int:
+        """Lay out every neg-risk event with two or more live markets (and,
+        given outcomes_of, every open outcome listed). Books already held
+        for tokens that are still listed are kept."""
+        by_event = self._events(records)
+        if self.outcomes_of:
+            # an event whose membership changed is checked again now
+            for event_id, members in self._membership(by_event).items():
+                if self.members.get(event_id) != members:
+                    self._outcomes.pop(event_id, None)
+            self._check_outcomes(list(by_event))
+            events = self._complete(by_event)
+        else:
+            events = list(by_event.items())
+        with self._lock:
+            old_slot = self.slot_of
+            old = (self.ask_px, self.ask_sz, self.bid_px, self.bid_sz, self.updated_at)
+            self._layout(events)
+            carried = [(slot, old_slot[t]) for slot, t in enumerate(self.token_ids) if t in old_slot]
+            if carried:
+                new, prev = np.array(carried).T
+                for column, previous in zip((self.ask_px, self.ask_sz, self.bid_px, self.bid_sz, self.updated_at), old):
+                    column[new] = previous[prev]
+            self._resum()
+            self.opportunities = {k: v for k, v in self.opportunities.items() if k[0] in self.event_index}
+            self.members = self._membership(by_event)
+            self.incomplete = len(by_event) - len(events)
+            self.synced_at = synced_at
+        return len(events)
+
+    def _layout(self, events: list) -> None:
+        members = [record for _, group in events for record in group]
+        slots, levels = len(members), self.levels
+        self.event_ids = [event_id for event_id, _ in events]
+        self.event_index = {event_id: e for e, event_id in enumerate(self.event_ids)}
+        self.event_tags = [set().union(*(r.tags for r in group)) for _, group in events]
+        self.records = members
+        self.token_ids = [r.token_ids[0] for r in members]
+        self.slot_of = {t: slot for slot, t in enumerate(self.token_ids)}
+        self.counts = np.array([len(group) for _, group in events], dtype=np.int64)
+        self.starts = np.concatenate(([0], np.cumsum(self.counts)[:-1])).astype(np.int64) if events else np.zeros(0, np.int64)
+        self.event_of = np.repeat(np.arange(len(events)), self.counts)
+        self.rate = np.array([r.taker_fee_bps / 1e4 for r in members])
+        self.min_size = np.array([r.min_order_size or 0.0 for r in members], dtype=float)
+        # missing levels are padded so they can never look profitable:
+        # asks at 1 and bids at 0, both with no size
+        self.ask_px = np.ones((slots, levels))
+        self.ask_sz = np.zeros((slots, levels))
+        self.bid_px = np.zeros((slots, levels))
+        self.bid_sz = np.zeros((slots, levels))
+        self.updated_at = np.zeros(slots)
+        self._dirty = np.ones(len(events), dtype=bool)
+        self._moved = np.zeros(len(events), dtype=bool)
+
+    def _resum(self) -> None:
+        """Per-event sums of best ask, best bid and their per-share fees."""
+        if not len(self.starts):
+            self.sum_ask = self.fee_ask = self.sum_bid = self.fee_bid = np.zeros(0)
+            return
+        ask, bid = self.ask_px[:, 0], self.bid_px[:, 0]
+        self.sum_ask = np.add.reduceat(ask, self.starts)
+        self.fee_ask = np.add.reduceat(self.rate * np.minimum(ask, 1 - ask), self.starts)
+        self.sum_bid = np.add.reduceat(bid, self.starts)
+        self.fee_bid = np.add.reduceat(self.rate * np.minimum(bid, 1 - bid), self.starts)
+
+    def tokens(self) -> list:
+        return list(self.token_ids)
+
+    def due_tokens(self, budget: int) -> list:
+        """YES tokens whose books the next sweep should fetch, about `budget`
+        of them: events flagged by on_quotes() first, then those near an
+        edge, then the events whose oldest book is stalest."""
+        with self._lock:
+            if not len(self.starts):
+                return []
+            near = np.maximum(*self.edges()) > self.min_edge - WATCH_MARGIN
+            oldest = np.minimum.reduceat(self.updated_at, self.starts)
+            order = np.lexsort((oldest, ~near, ~self._moved))
+            order = order[np.cumsum(self.counts[order]) <= max(budget, int(self.counts[order[0]]))]
+            self._moved[order] = False
+            return [self.token_ids[s] for e in order.tolist()
+                    for s in range(int(self.starts[e]), int(self.starts[e] + self.counts[e]))]
+
+    # ── Book updates ──
+    def on_book(self, token_id: str, bids: list, asks: list, ts: Optional[float] = None) -> bool:
+        """Take a YES book, (price, size) levels best first. Returns False
+        for tokens outside the tracked events."""
+        slot = self.slot_of.get(token_id)
+        if slot is None:
+            return False
+        levels = self.levels
+        asks, bids = asks[:levels], bids[:levels]
+        with self._lock:
+            if self.slot_of.get(token_id) != slot:
+                return False  # the layout was rebuilt meanwhile
+            old_ask, old_bid = float(self.ask_px[slot, 0]), float(self.bid_px[slot, 0])
+            self.ask_px[slot] = [p for p, _ in asks] + [1.0] * (levels - len(asks))
+            self.ask_sz[slot] = [s for _, s in asks] + [0.0] * (levels - len(asks))
+            self.bid_px[slot] = [p for p, _ in bids] + [0.0] * (levels - len(bids))
+            self.bid_sz[slot] = [s for _, s in bids] + [0.0] * (levels - len(bids))
+            ask, bid = float(self.ask_px[slot, 0]), float(self.bid_px[slot, 0])
+            e, rate = self.event_of[slot], self.rate[slot]
+            self.sum_ask[e] += ask - old_ask
+            self.fee_ask[e] += rate * (min(ask, 1 - ask) - min(old_ask, 1 - old_ask))
+            self.sum_bid[e] += bid - old_bid
+            self.fee_bid[e] += rate * (min(bid, 1 - bid) - min(old_bid, 1 - old_bid))
+            self.updated_at[slot] = time.time() if ts is None else ts
+            self._dirty[e] = True
+            self.book_updates += 1
+        return True
+
+    def on_quotes(self, quotes: dict) -> int:
+        """price_batcher listener: flag events with an outcome whose quoted
+        midpoint has moved off the book held for it, so the next sweep
+        fetches them ahead of the rest."""
+        moved = 0
+        with self._lock:
+            for token_id, quote in quotes.items():
+                slot = self.slot_of.get(token_id)
+                if slot is None or quote is None or quote.mid is None:
+                    continue
+                held = (self.ask_px[slot, 0] + self.bid_px[slot, 0]) / 2
+                e = self.event_of[slot]
+                if abs(quote.mid - held) > MID_TOLERANCE and not self._moved[e]:
+                    self._moved[e] = True
+                    moved += 1
+        return moved
+
+    # ── Scanning ──
+    def edges(self) -> tuple:
+        """Top-of-book profit per basket after fees, (buy YES, buy NO), per event."""
+        return 1 - self.sum_ask - self.fee_ask, self.sum_bid - 1 - self.fee_bid
+
+    def scan(self, now: Optional[float] = None) -> list:
+        """Refresh opportunities for events whose books changed since the
+        last scan and drop those that no longer hold or have gone stale."""
+        now = time.time() if now is None else now
+        started = time.perf_counter()
+        with self._lock:
+            self.scans += 1
+            if not len(self.starts):
+                self.opportunities = {}
+                return []
+            if self.scans % RESUM_EVERY == 0:
+                self._resum()
+            fresh = np.logical_and.reduceat(self.updated_at >= now - self.max_age, self.starts)
+            dirty, self._dirty = self._dirty, np.zeros(len(self.starts), dtype=bool)
+            for direction, edge in zip((BUY_YES, BUY_NO), self.edges()):
+                live = fresh & (edge > self.min_edge)
+                for key in [k for k in self.opportunities if k[1] == direction]:
+                    if not live[self.event_index[key[0]]]:
+                        del self.opportunities[key]
+                todo = np.nonzero(live & dirty)[0]
+                for e, opportunity in zip(todo.tolist(), self._size(todo, direction, edge)):
+                    key = (self.event_ids[e], direction)
+                    if opportunity is None:
+                        self.opportunities.pop(key, None)
+                    else:
+                        self.opportunities[key] = opportunity
+            ranked = sorted(self.opportunities.values(), key=lambda o: o["profit"], reverse=True)
+        self.scanned_at = now
+        self.scan_ms = round((time.perf_counter() - started) * 1000, 3)
+        return ranked
+
+    def _size(self, events: np.ndarray, direction: str, top_edge: np.ndarray) -> list:
+        """Walk the books of many events at once. Each step takes the largest
+        basket every outcome's current level can fill, while the marginal
+        basket still clears min_edge after fees."""
+        if not len(events):
+            return []
+        counts = self.counts[events]
+        seg = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        slots = np.repeat(self.starts[events] - seg, counts) + np.arange(int(counts.sum()))
+        if direction == BUY_YES:
+            px, sz, payoff = self.ask_px[slots], self.ask_sz[slots], np.ones(len(events))
+        else:
+            px, sz, payoff = 1 - self.bid_px[slots], self.bid_sz[slots], counts - 1.0
+        fee = self.rate[slots, None] * np.minimum(px, 1 - px)
+        rows = np.arange(len(slots))
+        last = self.levels - 1
+        level = np.zeros(len(slots), dtype=np.int64)
+        deepest = np.zeros(len(slots), dtype=np.int64)
+        left = sz[:, 0].copy()
+        size, cost, fees = np.zeros(len(events)), np.zeros(len(events)), np.zeros(len(events))
+        active = np.ones(len(events), dtype=bool)
+        while True:
+            depth = level <= last
+            at = np.minimum(level, last)
+            unit_fee = np.where(depth, fee[rows, at], 0.0)
+            marginal = np.add.reduceat(np.where(depth, px[rows, at], np.inf) + unit_fee, seg)
+            q = np.minimum.reduceat(np.where(depth, left, 0.0), seg)
+            active &= (payoff - marginal > self.min_edge) & (q > DUST)
+            if not active.any():
+                break
+            take = np.where(active, q, 0.0)
+            size += take
+            cost += take * np.where(active, marginal, 0.0)
+            fees += take * np.add.reduceat(unit_fee, seg)
+            per_slot = np.repeat(take, counts)
+            left -= per_slot
+            deepest = np.where(per_slot > 0, level, deepest)
+            exhausted = (per_slot > 0) & (left <= DUST)
+            level += exhausted
+            left = np.where(exhausted, np.where(level <= last, sz[rows, np.minimum(level, last)], 0.0), left)
+
+        min_size = np.maximum.reduceat(self.min_size[slots], seg)
+        out = []
+        for i, e in enumerate(events.tolist()):
+            if size[i] <= DUST or size[i] < min_size[i]:
+                out.append(None)
+                continue
+            legs = []
+            for j in range(seg[i], seg[i] + counts[i]):
+                record = self.records[slots[j]]
+                legs.append({
+                    "token_id": record.token_ids[0] if direction == BUY_YES else record.token_ids[1],
+                    "condition_id": record.condition_id,
+                    "question": record.question,
+                    "outcome": "YES" if direction == BUY_YES else "NO",
+                    "side": "BUY",
+                    "limit_price": round(float(px[j, deepest[j]]), 4),  # deepest level taken
+                    "size": round(float(size[i]), 2),
+                })
+            out.append({
+                "event_id": self.event_ids[e],
+                "direction": direction,
+                "outcomes": int(counts[i]),
+                "size": round(float(size[i]), 2),
+                "cost": round(float(cost[i] - fees[i]), 6),
+                "fees": round(float(fees[i]), 6),
+                "payout": round(float(size[i] * payoff[i]), 6),
+                "profit": round(float(size[i] * payoff[i] - cost[i]), 6),
+                "edge": round(float(payoff[i] - cost[i] / size[i]), 6),
+                "top_edge": round(float(top_edge[e]), 6),
+                "legs": legs,
+            })
+        return out
+
+    # ── Queries ──
+    def ranked(self, limit: int = 50, tag: Optional[str] = None) -> list:
+        with self._lock:
+            found = [o for o in self.opportunities.values()
+                     if tag is None or tag.lower() in self.event_tags[self.event_index[o["event_id"]]]]
+        return sorted(found, key=lambda o: o["profit"], reverse=True)[:limit]
+
+    def stats(self) -> dict:
+        return {
+            "events": len(self.event_ids),
+            "outcomes": len(self.token_ids),
+            "incomplete_events": self.incomplete,
+            "live": len(self.opportunities),
+            "book_updates": self.book_updates,
+            "scans": self.scans,
+            "scan_ms": self.scan_ms,
+            "scanned_at": self.scanned_at,
+        }
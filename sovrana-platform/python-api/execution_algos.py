@@ -0,0 +1,364 @@
+"""
+Execution Algorithms
+Works a parent order as a schedule of child orders (TWAP, iceberg, or
+chasing the best bid/ask) in asyncio tasks, tracking parent fill progress.
+Child orders go through a gateway: the live CLOB order path or the
+in-process matching engine.
+"""
+
+import math
+import time
+import uuid
+import asyncio
+import logging
+import itertools
+from typing import Optional
+
+from py_clob_client.clob_types import TradeParams
+
+logger = logging.getLogger("sovrana-api")
+
+ALGOS = ("twap", "iceberg", "chase")
+SIZE_DECIMALS = 2
+POLL_INTERVAL = 1.0  # seconds between child status checks on the live CLOB
+PARENT_HISTORY = 10_000  # finished parents are pruned, oldest first, past this many
+
+
+def _order_part(t: dict, order_id: str) -> Optional[tuple]:
+    """(price, size) of one order's part in a CLOB trade: the top level when
+    it was the taker, its maker_orders entry when it rested."""
+    if t.get("taker_order_id") == order_id:
+        return float(t.get("price", 0) or 0), float(t.get("size", 0) or 0)
+    for m in t.get("maker_orders") or []:
+        if m.get("order_id") == order_id:
+            return float(m.get("price", 0) or 0), float(m.get("matched_amount", 0) or 0)
+    return None
+
+
+# ─── Gateways ────────────────────────────────────────────────────────────────
+class ClobGateway:
+    """Child orders through the service's own order path (token registry
+    validation, signing, posting)."""
+
+    def __init__(self, client, submit_order, poll_interval: float = POLL_INTERVAL):
+        self.client = client
+        self.submit_order = submit_order
+        self.poll_interval = poll_interval
+        self._parts: dict = {}  # order id -> {trade id: (price, size)}, while the order is open
+
+    async def place(self, token_id: str, side: str, price: float, size: float, order_type: str,
+                    agent_id: Optional[str] = None) -> str:
+        result = await asyncio.to_thread(self.submit_order, token_id, price, size, side, order_type, agent_id=agent_id)
+        if not result or not result.get("orderID"):
+            raise RuntimeError(f"Child order rejected: {result}")
+        return result["orderID"]
+
+    async def cancel(self, order_id: str) -> None:
+        await asyncio.to_thread(self.client.cancel, order_id)
+
+    async def status(self, order_id: str) -> dict:
+        order = await asyncio.to_thread(self.client.get_order, order_id) or {}
+        filled = float(order.get("size_matched", 0) or 0)
+        is_open = str(order.get("status", "")).upper() == "LIVE"
+        avg_price = None
+        if filled:
+            avg_price = await self._avg_price(order_id, order.get("associate_trades") or [])
+            if avg_price is None:
+                avg_price = float(order.get("price", 0) or 0)  # trades not indexed yet
+        if not is_open:
+            self._parts.pop(order_id, None)
+        return {"filled": filled, "avg_price": avg_price, "open": is_open}
+
+    async def _avg_price(self, order_id: str, trade_ids: list) -> Optional[float]:
+        """Size-weighted price over the order's trades. A marketable order
+        fills at the resting orders' prices, not at its own limit."""
+        parts = self._parts.setdefault(order_id, {})
+        for trade_id in [t for t in trade_ids if t not in parts]:
+            trades = await asyncio.to_thread(self.client.get_trades, TradeParams(id=trade_id))
+            for t in trades or []:
+                part = _order_part(t, order_id) if t.get("id") == trade_id else None
+                if part is not None:
+                    parts[trade_id] = part
+        size = sum(s for _, s in parts.values())
+        return sum(p * s for p, s in parts.values()) / size if size > 1e-9 else None
+
+    async def quote(self, token_id: str) -> tuple:
+        book = await asyncio.to_thread(self.client.get_order_book, token_id)
+        bids = [float(b.price) for b in (book.bids or [])]
+        asks = [float(a.price) for a in (book.asks or [])]
+        return (max(bids) if bids else None, min(asks) if asks else None)
+
+    async def wait_for_update(self, token_id: str, timeout: float) -> None:
+        await asyncio.sleep(min(timeout, self.poll_interval))
+
+
+class EngineGateway:
+    """Child orders against a local MatchingEngine."""
+
+    def __init__(self, engine, owner: str = "algo"):
+        self.engine = engine
+        self.owner = owner
+        self._events: dict = {}
+        engine.listeners.append(self._on_change)
+
+    def _on_change(self, token_id: str, fills: list) -> None:
+        event = self._events.get(token_id)
+        if event is not None:
+            event.set()
+
+    async def place(self, token_id: str, side: str, price: float, size: float, order_type: str,
+                    agent_id: Optional[str] = None) -> str:
+        return self.engine.place(token_id, side, price, size, order_type, self.owner)["orderID"]
+
+    async def cancel(self, order_id: str) -> None:
+        self.engine.cancel(order_id)
+
+    async def status(self, order_id: str) -> dict:
+        order = self.engine.get_order(order_id)
+        return {
+            "filled": order.filled,
+            "avg_price": order.notional / order.filled if order.filled else None,
+            "open": order.status == "live",
+        }
+
+    async def quote(self, token_id: str) -> tuple:
+        book = self.engine.book(token_id)
+        return (book.best_bid(), book.best_ask())
+
+    async def wait_for_update(self, token_id: str, timeout: float) -> None:
+        event = self._events.setdefault(token_id, asyncio.Event())
+        event.clear()
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+# ─── Parent orders ───────────────────────────────────────────────────────────
+class ParentOrder:
+    def __init__(self, token_id: str, side: str, size: float, limit_price: float, algo: str,
+                 params: Optional[dict] = None, agent_id: Optional[str] = None, tick: float = 0.01,
+                 max_child: Optional[float] = None):
+        if algo not in ALGOS:
+            raise ValueError(f"Unknown execution algorithm '{algo}', expected one of {', '.join(ALGOS)}")
+        self.id = f"parent-{uuid.uuid4().hex[:12]}"
+        self.token_id = token_id
+        self.side = side.upper()
+        self.size = size
+        self.limit_price = limit_price
+        self.algo = algo
+        self.params = params or {}
+        self.agent_id = agent_id
+        self.tick = tick
+        self.max_child = max_child  # cap on any one child order, e.g. an agent's max_order_size
+        self.filled = 0.0
+        self.notional = 0.0
+        self.children: list = []
+        self.status = "pending"
+        self.error: Optional[str] = None
+        self.arrival_mid: Optional[float] = None
+        self.created_at = time.time()
+        self.completed_at: Optional[float] = None
+
+    @property
+    def remaining(self) -> float:
+        return max(0.0, round(self.size - self.filled, SIZE_DECIMALS))
+
+    @property
+    def avg_price(self) -> Optional[float]:
+        return self.notional / self.filled if self.filled else None
+
+    @property
+    def slippage_bps(self) -> Optional[float]:
+        """Average fill versus the arrival midpoint; positive means worse."""
+        if self.avg_price is None or not self.arrival_mid:
+            return None
+        sign = 1 if self.side == "BUY" else -1
+        return sign * (self.avg_price - self.arrival_mid) / self.arrival_mid * 1e4
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "agent_id": self.agent_id,
+            "token_id": self.token_id,
+            "side": self.side,
+            "size": self.size,
+            "limit_price": self.limit_price,
+            "algo": self.algo,
+            "params": self.params,
+            "status": self.status,
+            "filled": round(self.filled, SIZE_DECIMALS),
+            "remaining": self.remaining,
+            "avg_price": round(self.avg_price, 6) if self.avg_price is not None else None,
+            "arrival_mid": self.arrival_mid,
+            "slippage_bps": round(self.slippage_bps, 2) if self.slippage_bps is not None else None,
+            "children": len(self.children),
+            "error": self.error,
+            "created_at": self.created_at,
+            "completed_at": self.completed_at,
+        }
+
+
+class ExecutionEngine:
+    """Runs each parent order as an asyncio task on a gateway."""
+
+    def __init__(self, gateway):
+        self.gateway = gateway
+        self.parents: dict = {}
+        self._tasks: dict = {}
+
+    def start(self, parent: ParentOrder) -> ParentOrder:
+        self.parents[parent.id] = parent
+        self._tasks[parent.id] = asyncio.create_task(self._run(parent))
+        return parent
+
+    async def wait(self, parent_id: str) -> ParentOrder:
+        parent = self.parents[parent_id]  # held, as a finished parent may be pruned meanwhile
+        task = self._tasks.get(parent_id)
+        if task is not None:
+            await asyncio.gather(task, return_exceptions=True)
+        return parent
+
+    def cancel(self, parent_id: str) -> bool:
+        task = self._tasks.get(parent_id)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        return True
+
+    def cancel_agent(self, agent_id: str) -> list:
+        return [pid for pid, p in self.parents.items() if p.agent_id == agent_id and self.cancel(pid)]
+
+    async def _run(self, parent: ParentOrder) -> None:
+        gw = self.gateway
+        try:
+            bid, ask = await gw.quote(parent.token_id)
+            if bid is not None and ask is not None:
+                parent.arrival_mid = (bid + ask) / 2
+            parent.status = "working"
+            algo = {"twap": self._twap, "iceberg": self._iceberg, "chase": self._chase}[parent.algo]
+            await algo(parent)
+            parent.status = "filled" if parent.remaining <= 0 else "expired"
+        except asyncio.CancelledError:
+            parent.status = "cancelled"
+        except Exception as e:
+            logger.error(f"Execution {parent.id} failed: {e}")
+            parent.status = "failed"
+            parent.error = str(e)
+        finally:
+            await asyncio.shield(self._cancel_children(parent))
+            parent.completed_at = time.time()
+            self._tasks.pop(parent.id, None)
+            if len(self.parents) > PARENT_HISTORY:
+                self._prune()
+
+    def _prune(self) -> None:
+        excess = len(self.parents) - int(PARENT_HISTORY * 0.9)
+        stale = list(itertools.islice((i for i, p in self.parents.items() if i not in self._tasks), excess))
+        for parent_id in stale:
+            del self.parents[parent_id]
+
+    # ── child bookkeeping ──
+    async def _child(self, parent: ParentOrder, price: float, size: float, order_type: str) -> Optional[dict]:
+        size = min(size, parent.remaining, parent.max_child or math.inf)
+        size = math.floor(size * 10 ** SIZE_DECIMALS) / 10 ** SIZE_DECIMALS
+        if size <= 0:
+            return None
+        order_id = await self.gateway.place(parent.token_id, parent.side, price, size, order_type, agent_id=parent.agent_id)
+        child = {"order_id": order_id, "price": price, "size": size, "filled": 0.0, "notional": 0.0, "open": True}
+        parent.children.append(child)
+        await self._refresh(parent, child)
+        return child
+
+    async def _refresh(self, parent: ParentOrder, child: dict) -> None:
+        status = await self.gateway.status(child["order_id"])
+        delta = status["filled"] - child["filled"]
+        if delta > 1e-9:
+            price = status["avg_price"] if status["avg_price"] is not None else child["price"]
+            notional = price * status["filled"]
+            parent.filled += delta
+            parent.notional += notional - child["notional"]
+            child["filled"], child["notional"] = status["filled"], notional
+        child["open"] = status["open"]
+
+    async def _cancel_child(self, parent: ParentOrder, child: dict) -> None:
+        if child["open"]:
+            await self.gateway.cancel(child["order_id"])
+            await self._refresh(parent, child)
+            child["open"] = False
+
+    async def _cancel_children(self, parent: ParentOrder) -> None:
+        for child in parent.children:
+            try:
+                await self._cancel_child(parent, child)
+            except Exception as e:
+                logger.error(f"Failed to cancel child {child['order_id']}: {e}")
+
+    def _marketable(self, parent: ParentOrder, bid, ask) -> float:
+        """Price that takes liquidity at the touch without crossing the limit."""
+        touch = ask if parent.side == "BUY" else bid
+        if touch is None:
+            return parent.limit_price
+        return min(touch, parent.limit_price) if parent.side == "BUY" else max(touch, parent.limit_price)
+
+    def _joins(self, parent: ParentOrder, bid, ask) -> float:
+        """Price that joins our own side of the book, capped by the limit."""
+        touch = bid if parent.side == "BUY" else ask
+        if touch is None:
+            return parent.limit_price
+        return min(touch, parent.limit_price) if parent.side == "BUY" else max(touch, parent.limit_price)
+
+    # ── algorithms ──
+    async def _twap(self, parent: ParentOrder) -> None:
+        """Equal slices over `duration` seconds; each slice takes what is
+        available at the touch up to the limit and carries the shortfall."""
+        duration = float(parent.params.get("duration", 300))
+        slices = max(1, int(parent.params.get("slices", 10)))
+        interval = duration / slices
+        started = time.monotonic()
+        for i in range(slices):
+            target = parent.size * (i + 1) / slices
+            bid, ask = await self.gateway.quote(parent.token_id)
+            await self._child(parent, self._marketable(parent, bid, ask), target - parent.filled, "FAK")
+            if parent.remaining <= 0:
+                return
+            next_slice = started + (i + 1) * interval
+            await asyncio.sleep(max(0.0, next_slice - time.monotonic()))
+
+    async def _iceberg(self, parent: ParentOrder) -> None:
+        """Rest one visible clip at the limit price; post the next clip once
+        the current one has filled."""
+        clip = float(parent.params.get("clip", max(parent.size / 10, 1)))
+        timeout = parent.params.get("timeout")
+        deadline = time.monotonic() + float(timeout) if timeout else None
+        child = None
+        while parent.remaining > 0:
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+            if child is None or not child["open"]:
+                child = await self._child(parent, parent.limit_price, clip, "GTC")
+                if child is None:
+                    return
+                continue
+            await self.gateway.wait_for_update(parent.token_id, POLL_INTERVAL)
+            await self._refresh(parent, child)
+
+    async def _chase(self, parent: ParentOrder) -> None:
+        """Peg to the best bid (buys) or ask (sells), cancelling and reposting
+        whenever the touch moves away from our price, never past the limit."""
+        timeout = parent.params.get("timeout")
+        deadline = time.monotonic() + float(timeout) if timeout else None
+        child = None
+        while parent.remaining > 0:
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+            bid, ask = await self.gateway.quote(parent.token_id)
+            target = self._joins(parent, bid, ask)
+            if child is not None and child["open"] and abs(child["price"] - target) > parent.tick / 2:
+                await self._cancel_child(parent, child)
+            if child is None or not child["open"]:
+                child = await self._child(parent, target, parent.remaining, "GTC")
+                if child is None:
+                    return
+            await self.gateway.wait_for_update(parent.token_id, POLL_INTERVAL)
+            await self._refresh(parent, child)
@@ -0,0 +1,468 @@
+"""
+Fill Analytics
+Execution quality of our fills: slippage against the midpoint at arrival,
+markouts against the midpoint 5s / 1m / 5m / 1h later, and the fee actually
+paid. Midpoints are recorded as columnar history sorted by (token, time) and
+fills are joined to it as of each horizon with one searchsorted. Totals per
+agent, strategy and market are accumulated as markouts come due, so reads
+never rescan the fills, and fills whose marks have all settled are dropped
+once they fall out of the recent window fills() serves.
+"""
+
+import time
+import logging
+import threading
+from typing import Callable, Optional
+
+import numpy as np
+
+from paper_trading import fee_for
+from pnl_series import our_side
+
+logger = logging.getLogger("sovrana-api")
+
+HORIZONS = {"5s": 5, "1m": 60, "5m": 300, "1h": 3600}
+BY = ("wallet", "agent", "strategy", "market")
+MODES = ("live", "paper")
+MAX_AGE = 30.0  # seconds a recorded midpoint still stands for the price
+HEARTBEAT = 15.0  # an unchanged midpoint is recorded again after this long
+ARRIVAL_GRACE = 10.0  # with no midpoint before a fill, the first one this soon after it is its arrival
+HISTORY_SECONDS = 3 * 3600  # midpoints kept; covers the longest horizon with room for late trades
+TIME_BITS = 42  # history key: token code above, milliseconds below
+TIME_MASK = (1 << TIME_BITS) - 1
+FILL_RETENTION = 20_000  # settled fills kept for fills(); the endpoint serves at most 5000
+PRUNE_BATCH = 5_000  # settled fills past the retention are dropped this many at a time
+SEEN_SECONDS = HISTORY_SECONDS  # trade ids remembered for de-duplication, by match time
+DUST = 1e-9
+
+# marks per fill: the arrival midpoint, then one per horizon
+JOIN_OFFSETS = np.array([0.0] + list(HORIZONS.values()))
+DUE_OFFSETS = np.array([ARRIVAL_GRACE] + list(HORIZONS.values()), dtype=float)
+# accumulated per group: fills, size, notional, fees, then for each mark
+# sum(size * edge), covered size, covered fills, fills with a positive edge
+BASE_METRICS = 4
+MARK_METRICS = 4
+
+
+def _float(value, default: float = 0.0) -> float:
+    try:
+        return float(value) if value not in (None, "") else default
+    except (TypeError, ValueError):
+        return default
+
+
+def _round(value: float, digits: int = 6) -> float:
+    return round(float(value), digits) + 0.0  # no negative zeros
+
+
+# ─── Price history ───────────────────────────────────────────────────────────
+class PriceHistory:
+    """Recorded midpoints as two flat columns sorted by an int64 key of
+    (token code, milliseconds). New samples are staged and merged in on the
+    next query; samples older than `retention` seconds are dropped."""
+
+    def __init__(self, retention: float = HISTORY_SECONDS, heartbeat: float = HEARTBEAT):
+        self.retention = retention
+        self.heartbeat = heartbeat
+        self.codes: dict = {}
+        self.token_ids: list = []
+        self.keys = np.empty(0, dtype=np.int64)
+        self.mids = np.empty(0)
+        self.latest_ms = 0
+        self._staged_keys: list = []
+        self._staged_mids: list = []
+        self._last: dict = {}  # code -> (ms, mid) of the last recorded sample
+        self._trimmed_ms = 0
+
+    def __len__(self) -> int:
+        return len(self.keys) + len(self._staged_keys)
+
+    def code(self, token_id: str) -> int:
+        code = self.codes.get(token_id)
+        if code is None:
+            code = self.codes[token_id] = len(self.token_ids)
+            self.token_ids.append(token_id)
+        return code
+
+    def record(self, token_id: str, ts: float, mid: float) -> bool:
+        """Stage a sample unless it repeats the last one within the heartbeat."""
+        code = self.code(token_id)
+        ms = int(ts * 1000)
+        last = self._last.get(code)
+        if last is not None and (ms <= last[0] or (mid == last[1] and ms - last[0] < self.heartbeat * 1000)):
+            return False
+        self._last[code] = (ms, mid)
+        self._staged_keys.append((code << TIME_BITS) | ms)
+        self._staged_mids.append(mid)
+        self.latest_ms = max(self.latest_ms, ms)
+        return True
+
+    def compact(self) -> None:
+        if self._staged_keys:
+            staged = np.array(self._staged_keys, dtype=np.int64)
+            order = np.argsort(staged, kind="stable")
+            staged, mids = staged[order], np.array(self._staged_mids)[order]
+            self._staged_keys, self._staged_mids = [], []
+            # staged samples are newer than anything held for their token, so
+            # this is a merge of two sorted runs rather than a full sort
+            at = np.searchsorted(self.keys, staged, side="right")
+            self.keys = np.insert(self.keys, at, staged)
+            self.mids = np.insert(self.mids, at, mids)
+        cutoff = self.latest_ms - int(self.retention * 1000)
+        if cutoff - self._trimmed_ms > self.retention * 100:  # every tenth of the retention
+            keep = (self.keys & TIME_MASK) >= cutoff
+            self.keys, self.mids = self.keys[keep], self.mids[keep]
+            self._trimmed_ms = cutoff
+
+    def asof(self, codes: np.ndarray, ms: np.ndarray, max_age: float = MAX_AGE, forward: float = 0.0) -> np.ndarray:
+        """Midpoint for each (token code, milliseconds) query: the last sample
+        at or before it and at most `max_age` seconds old, else the first
+        sample at most `forward` seconds after it, else NaN."""
+        self.compact()
+        out = np.full(len(ms), np.nan)
+        if not len(self.keys) or not len(ms):
+            return out
+        codes = codes.astype(np.int64)
+        query = (codes << TIME_BITS) | ms
+        # sorted queries walk the keys in order, which is several times faster
+        order = np.argsort(query)
+        i = np.empty(len(query), dtype=np.int64)
+        i[order] = np.searchsorted(self.keys, query[order], side="right") - 1
+        hit = i >= 0
+        sample = self.keys[np.maximum(i, 0)]
+        hit &= ((sample >> TIME_BITS) == codes) & (ms - (sample & TIME_MASK) <= max_age * 1000)
+        out[hit] = self.mids[i[hit]]
+        if forward > 0:
+            j = np.empty(len(query), dtype=np.int64)
+            j[order] = np.searchsorted(self.keys, query[order], side="left")
+            later = ~hit & (j < len(self.keys))
+            sample = self.keys[np.minimum(j, len(self.keys) - 1)]
+            later &= ((sample >> TIME_BITS) == codes) & ((sample & TIME_MASK) - ms <= forward * 1000)
+            out[later] = self.mids[j[later]]
+        return out
+
+
+# ─── Analytics ───────────────────────────────────────────────────────────────
+class FillAnalytics:
+    """Fill table with arrival and horizon midpoints, plus per-group totals
+    for each of BY. Live fills come from the CLOB trade history (which has
+    the fee rate and our liquidity side); paper fills from fill_listeners.
+    Groups are keyed by (mode, value) so paper never mixes with live."""
+
+    def __init__(self, address: str = "", agent_of: Optional[Callable] = None,
+                 strategy_of: Optional[Callable] = None, market_of: Optional[Callable] = None):
+        self.address = (address or "").lower()
+        self.agent_of = agent_of  # CLOB trade -> agent id
+        self.strategy_of = strategy_of  # agent id -> strategy name
+        self.market_of = market_of  # token id -> condition id, for paper fills
+        self.history = PriceHistory()
+        self.refreshed_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._seen: dict = {}  # trade id -> match time
+        self._seen_floor = 0.0  # trades older than this were forgotten by _seen and are not taken again
+        self._n = 0
+        self._cols = self._allocate(1024)
+        self._rows: list = []  # (fill id, token id, market, agent id, strategy, mode, liquidity)
+        self._groups = {dim: {} for dim in BY}  # (mode, value) -> group index
+        self._acc = {dim: np.zeros((16, BASE_METRICS + MARK_METRICS * len(JOIN_OFFSETS))) for dim in BY}
+        self._first_pending = 0
+        self._next_due = np.inf
+
+    def __len__(self) -> int:
+        return self._n
+
+    @staticmethod
+    def _allocate(capacity: int) -> dict:
+        cols = {
+            "ts": np.empty(capacity),
+            "code": np.empty(capacity, dtype=np.int64),
+            "sign": np.empty(capacity, dtype=np.int8),
+            "price": np.empty(capacity),
+            "size": np.empty(capacity),
+            "fee": np.empty(capacity),
+            "marks": np.empty((capacity, len(JOIN_OFFSETS))),
+            "pending": np.empty((capacity, len(JOIN_OFFSETS)), dtype=bool),
+        }
+        cols.update({f"group_{dim}": np.empty(capacity, dtype=np.int64) for dim in BY})
+        return cols
+
+    def _reserve(self, n: int) -> None:
+        capacity = len(self._cols["ts"])
+        if n <= capacity:
+            return
+        grown = self._allocate(max(n, capacity * 2))
+        for name, column in self._cols.items():
+            grown[name][:self._n] = column[:self._n]
+        self._cols = grown
+
+    def _group(self, dim: str, key: tuple) -> int:
+        groups = self._groups[dim]
+        g = groups.get(key)
+        if g is None:
+            g = groups[key] = len(groups)
+            acc = self._acc[dim]
+            if g >= len(acc):
+                self._acc[dim] = np.concatenate([acc, np.zeros_like(acc)])
+        return g
+
+    # ── Ingestion ──
+    def ingest_trades(self, trades: list) -> int:
+        """Add trade-history rows not seen yet. Makers pay their own order's
+        fee rate when the trade lists it, takers the trade's."""
+        rows = []
+        with self._lock:
+            for t in trades:
+                trade_id = t.get("id")
+                ts = _float(t.get("match_time")) or time.time()
+                if trade_id in self._seen or ts < self._seen_floor:
+                    continue
+                self._seen[trade_id] = ts
+                side, price, size, mine = our_side(t, self.address)
+                if size <= DUST or side not in ("BUY", "SELL"):
+                    continue
+                maker = str(t.get("trader_side", "")).upper() == "MAKER"
+                bps = _float(mine[0].get("fee_rate_bps")) if mine else 0.0 if maker else _float(t.get("fee_rate_bps"))
+                agent_id = self.agent_of(t) if self.agent_of else None
+                rows.append((trade_id, ts, str(t.get("asset_id", "")), side,
+                             price, size, fee_for(price, size, bps), agent_id, t.get("market") or "", "live",
+                             "maker" if maker else "taker"))
+            rows.sort(key=lambda r: r[1])
+            self._append(rows)
+        return len(rows)
+
+    def on_fill(self, fill: dict) -> None:
+        """fill_listeners hook for paper fills; live fills are taken from the
+        trade history instead, which carries their fee rate."""
+        if not fill.get("paper"):
+            return
+        token_id = fill["token_id"]
+        market = self.market_of(token_id) if self.market_of else None
+        with self._lock:
+            self._append([(fill.get("order_id"), fill.get("ts") or time.time(), token_id, fill["side"].upper(),
+                           float(fill["price"]), float(fill["size"]), float(fill.get("fee", 0.0)), fill.get("agent_id"),
+                           market or token_id, "paper", fill.get("liquidity"))])
+
+    def _append(self, rows: list) -> None:
+        if not rows:
+            return
+        lo, hi = self._n, self._n + len(rows)
+        self._reserve(hi)
+        cols = self._cols
+        ts, size, price = (np.array([r[i] for r in rows], dtype=float) for i in (1, 5, 4))
+        cols["ts"][lo:hi] = ts
+        cols["code"][lo:hi] = [self.history.code(r[2]) for r in rows]
+        cols["sign"][lo:hi] = [1 if r[3] == "BUY" else -1 for r in rows]
+        cols["price"][lo:hi] = price
+        cols["size"][lo:hi] = size
+        cols["fee"][lo:hi] = [r[6] for r in rows]
+        cols["marks"][lo:hi] = np.nan
+        cols["pending"][lo:hi] = True
+        base = np.column_stack([np.ones(len(rows)), size, size * price, cols["fee"][lo:hi]])
+        for r in rows:
+            agent_id = r[7]
+            if agent_id:
+                strategy = (self.strategy_of(agent_id) if self.strategy_of else None) or "unknown"
+            else:
+                strategy = "manual"
+            self._rows.append((r[0], r[2], r[8], agent_id, strategy, r[9], r[10]))
+        for dim in BY:
+            values = [self._dim_value(dim, row) for row in self._rows[lo:hi]]
+            groups = np.array([self._group(dim, (row[5], v)) for row, v in zip(self._rows[lo:hi], values)])
+            cols[f"group_{dim}"][lo:hi] = groups
+            self._add(dim, groups[:, None], np.arange(BASE_METRICS), base)
+        self._n = hi
+        self._next_due = min(self._next_due, float(ts.min()) + float(DUE_OFFSETS.min()))
+
+    @staticmethod
+    def _dim_value(dim: str, row: tuple) -> str:
+        if dim == "agent":
+            return row[3] or ""
+        if dim == "strategy":
+            return row[4]
+        if dim == "market":
+            return row[2]
+        return ""
+
+    # ── Markouts ──
+    def mark(self, quotes: dict) -> None:
+        """price_batcher listener: record midpoints, then resolve the marks
+        that have come due."""
+        now = time.time()
+        with self._lock:
+            for token_id, quote in quotes.items():
+                if quote is not None and quote.mid is not None:
+                    self.history.record(token_id, quote.as_of or now, quote.mid)
+        self.refresh(now)
+
+    def record(self, token_id: str, ts: float, mid: float) -> None:
+        with self._lock:
+            self.history.record(token_id, ts, mid)
+
+    def refresh(self, now: Optional[float] = None) -> int:
+        """Join every due (fill, horizon) pair against the history in one
+        pass and fold the results into the group totals. Pairs with no
+        usable midpoint are settled as not covered."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self.refreshed_at = now
+            if now < self._next_due:
+                return 0
+            cols = self._cols
+            lo, hi = self._first_pending, self._n
+            due_at = cols["ts"][lo:hi, None] + DUE_OFFSETS
+            pending = cols["pending"][lo:hi]
+            r, k = np.nonzero(pending & (due_at <= now))
+            if len(r):
+                rows = r + lo
+                query_ms = ((cols["ts"][rows] + JOIN_OFFSETS[k]) * 1000).astype(np.int64)
+                codes = cols["code"][rows]
+                mids = np.full(len(rows), np.nan)
+                arrival = k == 0
+                if arrival.any():
+                    mids[arrival] = self.history.asof(codes[arrival], query_ms[arrival], MAX_AGE, ARRIVAL_GRACE)
+                if (~arrival).any():
+                    mids[~arrival] = self.history.asof(codes[~arrival], query_ms[~arrival], MAX_AGE)
+                cols["marks"][rows, k] = mids
+                cols["pending"][rows, k] = False
+                self._accumulate(rows, k, mids)
+            open_rows = pending.any(axis=1)
+            if open_rows.any():
+                self._first_pending = lo + int(open_rows.argmax())
+                self._next_due = float(due_at[pending].min())
+            else:
+                self._first_pending = hi
+                self._next_due = np.inf
+            self._prune()
+            return len(r)
+
+    def _prune(self) -> None:
+        """Drop the oldest fills once every mark on them has settled and they
+        are past FILL_RETENTION; their totals are already in the groups."""
+        cut = min(self._first_pending, self._n - FILL_RETENTION)
+        if cut < PRUNE_BATCH:
+            return
+        keep = self._n - cut
+        for column in self._cols.values():
+            column[:keep] = column[cut:self._n]
+        del self._rows[:cut]
+        self._n, self._first_pending = keep, self._first_pending - cut
+        if self._seen:
+            self._seen_floor = max(self._seen.values()) - SEEN_SECONDS
+            self._seen = {i: ts for i, ts in self._seen.items() if ts >= self._seen_floor}
+
+    def _accumulate(self, rows: np.ndarray, k: np.ndarray, mids: np.ndarray) -> None:
+        covered = ~np.isnan(mids)
+        rows, k, mids = rows[covered], k[covered], mids[covered]
+        if not len(rows):
+            return
+        cols = self._cols
+        size = cols["size"][rows]
+        edge = cols["sign"][rows] * (mids - cols["price"][rows])  # > 0: the fill beat the midpoint
+        at = (BASE_METRICS + MARK_METRICS * k)[:, None] + np.arange(MARK_METRICS)
+        values = np.column_stack([size * edge, size, np.ones(len(rows)), edge > 0])
+        for dim in BY:
+            self._add(dim, cols[f"group_{dim}"][rows][:, None], at, values)
+
+    def _add(self, dim: str, groups: np.ndarray, metrics: np.ndarray, values: np.ndarray) -> None:
+        """acc[groups, metrics] += values, with repeated cells summed."""
+        acc = self._acc[dim]
+        cells = (groups * acc.shape[1] + metrics).ravel()
+        acc.reshape(-1)[:] += np.bincount(cells, weights=np.broadcast_to(values, np.broadcast(groups, metrics).shape).ravel(),
+                                          minlength=acc.size)
+
+    def tokens(self) -> list:
+        """Tokens with marks still to come, which need to keep being priced."""
+        with self._lock:
+            lo, hi = self._first_pending, self._n
+            codes = np.unique(self._cols["code"][lo:hi][self._cols["pending"][lo:hi].any(axis=1)])
+            return [self.history.token_ids[c] for c in codes.tolist()]
+
+    # ── Queries ──
+    def summary(self, by: str = "agent", mode: str = "live") -> dict:
+        if by not in BY:
+            raise ValueError(f"Unknown grouping '{by}', expected one of {', '.join(BY)}")
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode '{mode}', expected one of {', '.join(MODES)}")
+        self.refresh()
+        with self._lock:
+            acc = self._acc[by]
+            groups = [_render(value, acc[g]) for (m, value), g in self._groups[by].items() if m == mode]
+            lo, hi = self._first_pending, self._n
+            pending = int(self._cols["pending"][lo:hi].any(axis=1).sum())
+        groups.sort(key=lambda g: g["notional"], reverse=True)
+        return {
+            "by": by,
+            "mode": mode,
+            "horizons": list(HORIZONS),
+            "groups": groups,
+            "fills": sum(g["fills"] for g in groups),
+            "pending_fills": pending,
+            "history_samples": len(self.history),
+            "refreshed_at": self.refreshed_at,
+        }
+
+    def fills(self, agent_id: Optional[str] = None, mode: Optional[str] = None, limit: int = 100) -> list:
+        """Most recent fills first, with their arrival and horizon midpoints."""
+        if mode is not None and mode not in MODES:
+            raise ValueError(f"Unknown mode '{mode}', expected one of {', '.join(MODES)}")
+        out = []
+        with self._lock:
+            cols = self._cols
+            for i in range(self._n - 1, -1, -1):
+                if len(out) >= limit:
+                    break
+                fill_id, token_id, market, agent, strategy, fill_mode, liquidity = self._rows[i]
+                if (agent_id is not None and agent != agent_id) or (mode is not None and fill_mode != mode):
+                    continue
+                sign, price, size, fee = int(cols["sign"][i]), cols["price"][i], cols["size"][i], cols["fee"][i]
+                marks, pending = cols["marks"][i], cols["pending"][i]
+                edges = [None if np.isnan(m) else _round(sign * (m - price)) for m in marks]
+                out.append({
+                    "id": fill_id,
+                    "ts": float(cols["ts"][i]),
+                    "token_id": token_id,
+                    "market": market,
+                    "agent_id": agent,
+                    "strategy": strategy,
+                    "mode": fill_mode,
+                    "liquidity": liquidity,
+                    "side": "BUY" if sign > 0 else "SELL",
+                    "price": _round(price),
+                    "size": _round(size),
+                    "fee": _round(fee),
+                    "fee_bps": _round(fee / (price * size) * 1e4, 2) if price * size > DUST else None,
+                    "arrival_mid": None if np.isnan(marks[0]) else _round(marks[0]),
+                    "slippage": None if edges[0] is None else -edges[0],
+                    "markouts": dict(zip(HORIZONS, edges[1:])),
+                    "pending": [label for label, p in zip(("arrival",) + tuple(HORIZONS), pending) if p],
+                })
+        return out
+
+
+def _render(value: str, a: np.ndarray) -> dict:
+    """Per-share figures are in price points (0-1 scale): slippage is paid
+    over the arrival midpoint, markouts are gained against the later one."""
+    fills, size, notional, fees = a[:BASE_METRICS]
+    marks = a[BASE_METRICS:].reshape(len(JOIN_OFFSETS), MARK_METRICS)
+    arrival = marks[0]
+    return {
+        "key": value or None,
+        "fills": int(fills),
+        "volume": _round(size),
+        "notional": _round(notional),
+        "avg_price": _round(notional / size) if size > DUST else None,
+        "fees": _round(fees),
+        "fee_bps": _round(fees / notional * 1e4, 2) if notional > DUST else None,
+        "slippage": _round(-arrival[0] / arrival[1]) if arrival[1] > DUST else None,
+        "slippage_cost": _round(-arrival[0]),
+        "arrival_coverage": _round(arrival[2] / fills, 4) if fills else None,
+        "markouts": {
+            label: {
+                "per_share": _round(total / covered) if covered > DUST else None,
+                "total": _round(total),
+                "positive_rate": _round(positive / count, 4) if count else None,
+                "coverage": _round(count / fills, 4) if fills else None,
+            }
+            for label, (total, covered, count, positive) in zip(HORIZONS, marks[1:])
+        },
+    }
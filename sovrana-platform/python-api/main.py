@@ -5,26 +5,58 @@ FastAPI service providing real portfolio data and live trading execution.
 
 import os
 import json
+import math
 import time
 import asyncio
 import logging
+import threading
 from datetime import datetime, timezone
 from typing import Optional
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from py_clob_client.client import ClobClient
-from py_clob_client.clob_types import ApiCreds, OrderArgs, OrderType
+from py_clob_client.clob_types import ApiCreds, BookParams, CreateOrderOptions, OrderArgs, OrderType, TradeParams
 from py_clob_client.order_builder.constants import BUY, SELL
 
+from event_arbitrage import EventArbScanner
+from execution_algos import ALGOS, ClobGateway, ExecutionEngine, ParentOrder
+from fill_analytics import FillAnalytics
+from market_catalogue import MarketCatalogue
+from paper_trading import PaperExchange
+from pnl_series import PnLSeriesEngine
+from positions_service import PositionsBook, fill_from_order_result
+from price_batcher import CHUNK_SIZE, PriceBatcher, to_columns
+from price_triggers import TriggerEngine
+from risk_engine import CONFIDENCE, SCENARIOS, RiskEngine
+from shared_snapshot import SnapshotReader, claim_role
+from token_registry import OrderValidationError, TokenRegistry
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("sovrana-api")
 
 # ─── Configuration ───────────────────────────────────────────────────────────
-HOST = "https://clob.polymarket.com"
-GAMMA_HOST = "https://gamma-api.polymarket.com"
+# POLYMARKET_MOCK_URL points every upstream at a local mock_polymarket.py server
+MOCK_URL = os.environ.get("POLYMARKET_MOCK_URL", "").rstrip("/")
+HOST = f"{MOCK_URL}/clob" if MOCK_URL else os.environ.get("CLOB_API_URL", "https://clob.polymarket.com")
+GAMMA_HOST = f"{MOCK_URL}/gamma" if MOCK_URL else os.environ.get("GAMMA_API_URL", "https://gamma-api.polymarket.com")
+DATA_HOST = f"{MOCK_URL}/data" if MOCK_URL else os.environ.get("DATA_API_URL", "https://data-api.polymarket.com")
 CHAIN_ID = 137
 PRIVATE_KEY = os.environ.get("PRIVATE_KEY", "0x7eb24f67779a00768c848f47e277e042e1859972825d56557208c3c69baca585")
+CATALOGUE_SYNC_INTERVAL = 30  # seconds between incremental Gamma syncs
+POSITIONS_MARK_INTERVAL = 5  # seconds between midpoint re-marks of held tokens
+PNL_SYNC_INTERVAL = 60  # seconds between trade-history catch-ups for the PnL series
+# SOVRANA_SNAPSHOT names a shared_snapshot.py publisher segment; workers then read
+# markets and prices from it instead of syncing Gamma themselves
+SNAPSHOT_NAME = os.environ.get("SOVRANA_SNAPSHOT", "")
+SNAPSHOT_POLL_INTERVAL = 1.0  # seconds between checks for a new markets version
+SNAPSHOT_PRICE_MAX_AGE = 10.0  # seconds a shared quote is served without refetching
+TRIGGER_SLIPPAGE = 0.05  # how far below the trigger price a stop/take close may sell
+PAPER_TICK = 0.25  # seconds between paper-trading fill passes
+ARB_SCAN_INTERVAL = 2.0  # seconds between neg-risk event book sweeps
+ARB_BOOK_BUDGET = 1000  # outcome books fetched per sweep; near-edge and moved events first
+ARB_SCAN_ROLE = "arb-scan"  # with SOVRANA_SNAPSHOT, only the worker holding this role sweeps books
+EXECUTION_MODES = ("live", "paper")
 
 # ─── Initialize Client ───────────────────────────────────────────────────────
 def create_client():
@@ -34,6 +66,97 @@ def create_client():
     return ClobClient(HOST, key=PRIVATE_KEY, chain_id=CHAIN_ID, creds=creds)
 
 client = create_client()
+catalogue = MarketCatalogue(GAMMA_HOST)
+token_registry = TokenRegistry(client)
+catalogue.listeners.append(token_registry.update_from_records)
+price_batcher = PriceBatcher(client)
+snapshot_reader: Optional[SnapshotReader] = None
+snapshot_version = 0  # markets version the worker's catalogue was hydrated to
+_hydrate_lock = threading.Lock()
+# With SOVRANA_SNAPSHOT, lookups read the shared columns and the catalogue is
+# only hydrated in a worker that needs its indexes: on its first text/tag
+# search, or when it becomes the arb scanner
+catalogue_wanted = not SNAPSHOT_NAME
+_pnl_sync_lock = threading.Lock()
+arb_scan_lease: Optional[int] = None  # claim_role lock held while this worker is the arb scanner
+
+
+def _markets():
+    """Where token and market lookups go: the shared snapshot until this
+    worker has a catalogue of its own."""
+    if snapshot_reader is not None and catalogue.synced_at is None:
+        return snapshot_reader
+    return catalogue
+
+
+def _describe_token(token_id: str) -> dict:
+    """Data API style market fields for a position opened by our own fill."""
+    record = _markets().by_token(token_id)
+    if record is None:
+        return {}
+    index = record.token_ids.index(token_id)
+    return {
+        "conditionId": record.condition_id,
+        "title": record.question,
+        "slug": record.slug,
+        "outcome": record.outcomes[index] if index < len(record.outcomes) else None,
+        "outcomeIndex": index,
+        "negativeRisk": record.neg_risk,
+    }
+
+
+def _market_of(token_id: str) -> Optional[str]:
+    record = _markets().by_token(token_id)
+    return record.condition_id if record is not None else None
+
+
+def _agent_strategy(agent_id: str) -> Optional[str]:
+    agent = agents_state.get(agent_id)
+    return agent["strategy"] if agent is not None else None
+
+
+def _trigger_limits(agent_id: str) -> Optional[tuple]:
+    agent = agents_state.get(agent_id)
+    return (agent["stop_loss_pct"], agent["take_profit_pct"]) if agent is not None else None
+
+
+def _risk_describe(token_id: str) -> Optional[tuple]:
+    """(condition id, outcome token ids, event id, neg_risk) for the risk model."""
+    record = _markets().by_token(token_id)
+    if record is None:
+        return None
+    return record.condition_id, record.token_ids, record.event_ids[0] if record.event_ids else None, record.neg_risk
+
+
+def _implied_price(token_id: str) -> Optional[float]:
+    """Latest midpoint, else the catalogue's outcome price."""
+    quote = price_batcher.latest.get(token_id)
+    if quote is not None and quote.mid is not None:
+        return quote.mid
+    record = _markets().by_token(token_id)
+    if record is None:
+        return None
+    index = record.token_ids.index(token_id)
+    return record.prices[index] if index < len(record.prices) else None
+
+
+positions_book = PositionsBook(DATA_HOST, client.get_address(), describe=_describe_token)
+pnl_engine = PnLSeriesEngine(client.get_address(), market_of=_market_of)
+trigger_engine = TriggerEngine(_trigger_limits, client.get_address(), agent_of=pnl_engine.agent_for)
+paper_exchange = PaperExchange()
+risk_engine = RiskEngine(_risk_describe, _implied_price)
+event_arb = EventArbScanner(outcomes_of=catalogue.event_outcomes)
+fill_analytics = FillAnalytics(client.get_address(), agent_of=pnl_engine.agent_for,
+                               strategy_of=_agent_strategy, market_of=_market_of)
+price_batcher.listeners.append(positions_book.mark)
+price_batcher.listeners.append(pnl_engine.mark)
+price_batcher.listeners.append(trigger_engine.mark)
+price_batcher.listeners.append(fill_analytics.mark)
+price_batcher.listeners.append(event_arb.on_quotes)
+# Called with {"order_id", "token_id", "side", "price", "size", "agent_id", "ts"}
+# for every fill known at submit time (before it reaches the trade history).
+# Paper fills carry "paper": True, "fee" and "liquidity" as well.
+fill_listeners = [positions_book.on_fill, pnl_engine.on_fill, trigger_engine.on_fill, fill_analytics.on_fill]
 
 # ─── FastAPI App ─────────────────────────────────────────────────────────────
 app = FastAPI(title="Sovrana Polymarket API", version="1.0.0")
@@ -46,6 +169,165 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+async def _catalogue_sync_loop():
+    while True:
+        try:
+            await asyncio.to_thread(catalogue.sync)
+        except Exception as e:
+            logger.error(f"Market catalogue sync failed: {e}")
+        await asyncio.sleep(CATALOGUE_SYNC_INTERVAL)
+
+
+async def _mark_prices(tokens: list) -> None:
+    """Re-mark tokens from the shared snapshot where it has a fresh quote and
+    from the CLOB for the rest."""
+    quotes = snapshot_reader.quotes(tokens, SNAPSHOT_PRICE_MAX_AGE) if snapshot_reader else {}
+    if quotes:
+        price_batcher.publish(quotes)
+    missing = [t for t in tokens if t not in quotes]
+    if missing:
+        await price_batcher.get(missing)
+
+
+async def _positions_loop():
+    while True:
+        try:
+            if positions_book.stale:
+                await asyncio.to_thread(positions_book.refresh)
+            tokens = list(dict.fromkeys(positions_book.tokens() + pnl_engine.tokens() + trigger_engine.tokens()
+                                        + fill_analytics.tokens()))
+            if tokens:
+                await _mark_prices(tokens)
+        except Exception as e:
+            logger.error(f"Positions refresh failed: {e}")
+        await asyncio.sleep(POSITIONS_MARK_INTERVAL)
+
+
+def _hydrate_catalogue() -> None:
+    global snapshot_version
+    with _hydrate_lock:
+        snapshot_version = snapshot_reader.hydrate(catalogue, snapshot_version)
+
+
+async def _snapshot_follow_loop():
+    """Attach to the shared snapshot and, once this worker wants a catalogue,
+    keep it in step with the snapshot."""
+    global snapshot_reader
+    while True:
+        try:
+            if snapshot_reader is None:
+                snapshot_reader = SnapshotReader(SNAPSHOT_NAME)
+                logger.info(f"Attached to shared snapshot '{SNAPSHOT_NAME}'")
+            if catalogue_wanted:
+                await asyncio.to_thread(_hydrate_catalogue)
+        except (FileNotFoundError, LookupError):
+            logger.info(f"Waiting for shared snapshot '{SNAPSHOT_NAME}' to be published")
+        except Exception as e:
+            logger.error(f"Shared snapshot follow failed: {e}")
+        await asyncio.sleep(SNAPSHOT_POLL_INTERVAL)
+
+
+def _sync_pnl() -> int:
+    """Catch the PnL series, then the fill analytics, up with the trade history.
+    Single-flight: the loop and the endpoints that need fresh fills call it
+    from worker threads, and only one catch-up (or first build) runs at a time."""
+    with _pnl_sync_lock:
+        if pnl_engine.built_at is None:
+            trades = client.get_trades()
+            applied = pnl_engine.build(trades)
+        else:
+            trades = client.get_trades(TradeParams(after=int(pnl_engine.watermark)))
+            applied = pnl_engine.ingest_trades(trades)
+        # after the PnL engine, so fills of agent orders are attributed the same way
+        fill_analytics.ingest_trades(trades)
+        trigger_engine.ingest_trades(trades)
+        return applied
+
+
+async def _pnl_sync_loop():
+    while True:
+        try:
+            await asyncio.to_thread(_sync_pnl)
+        except Exception as e:
+            logger.error(f"PnL series sync failed: {e}")
+        await asyncio.sleep(PNL_SYNC_INTERVAL)
+
+
+def _fetch_books(token_ids: list) -> dict:
+    """(bids, asks) per token as (price, size) floats, best first."""
+    books = {}
+    for i in range(0, len(token_ids), CHUNK_SIZE):
+        chunk = [BookParams(token_id=t) for t in token_ids[i:i + CHUNK_SIZE]]
+        for book in client.get_order_books(chunk) or []:
+            bids = sorted(((float(b.price), float(b.size)) for b in book.bids or []), reverse=True)
+            asks = sorted((float(a.price), float(a.size)) for a in book.asks or [])
+            books[book.asset_id] = (bids, asks)
+    return books
+
+
+async def _paper_loop():
+    while True:
+        try:
+            tokens = paper_exchange.tokens()
+            if tokens:
+                books = await asyncio.to_thread(_fetch_books, tokens)
+                paper_exchange.process(books)
+                for token_id, (bids, asks) in books.items():
+                    event_arb.on_book(token_id, bids, asks)
+        except Exception as e:
+            logger.error(f"Paper trading pass failed: {e}")
+        await asyncio.sleep(PAPER_TICK)
+
+
+def _is_arb_scanner() -> bool:
+    """Without a snapshot every worker scans; with one, the role holder does."""
+    global arb_scan_lease, catalogue_wanted
+    if not SNAPSHOT_NAME:
+        return True
+    if arb_scan_lease is None:
+        arb_scan_lease = claim_role(SNAPSHOT_NAME, ARB_SCAN_ROLE)
+        if arb_scan_lease is not None:
+            logger.info(f"This worker is the event arbitrage scanner for '{SNAPSHOT_NAME}'")
+            catalogue_wanted = True  # the scanner walks events, so it hydrates
+    return arb_scan_lease is not None
+
+
+async def _arb_scan_loop():
+    while True:
+        try:
+            if not _is_arb_scanner():
+                await asyncio.sleep(ARB_SCAN_INTERVAL)
+                continue
+            if catalogue.synced_at is not None and catalogue.synced_at != event_arb.synced_at:
+                await asyncio.to_thread(event_arb.refresh, catalogue.records(), catalogue.synced_at)
+            if snapshot_reader is not None:
+                event_arb.on_quotes(snapshot_reader.quotes(event_arb.tokens(), SNAPSHOT_PRICE_MAX_AGE))
+            tokens = event_arb.due_tokens(ARB_BOOK_BUDGET)
+            if tokens:
+                books = await asyncio.to_thread(_fetch_books, tokens)
+                for token_id, (bids, asks) in books.items():
+                    event_arb.on_book(token_id, bids, asks)
+                event_arb.scan()
+        except Exception as e:
+            logger.error(f"Event arbitrage scan failed: {e}")
+        await asyncio.sleep(ARB_SCAN_INTERVAL)
+
+
+@app.on_event("startup")
+async def start_background_sync():
+    # With SOVRANA_SNAPSHOT set, markets and marks come from the publisher and
+    # the book sweep for event arbitrage runs in one elected worker; only that
+    # worker and ones that serve searches hydrate a catalogue. The PnL
+    # trade catch-up and paper fill passes stay per worker: they serve this
+    # worker's own engines, the first is one incremental call a minute and the
+    # second only polls tokens this worker has resting paper orders on.
+    asyncio.create_task(_snapshot_follow_loop() if SNAPSHOT_NAME else _catalogue_sync_loop())
+    asyncio.create_task(_positions_loop())
+    asyncio.create_task(_pnl_sync_loop())
+    asyncio.create_task(_paper_loop())
+    asyncio.create_task(_arb_scan_loop())
+
 # ─── Models ──────────────────────────────────────────────────────────────────
 class PlaceOrderRequest(BaseModel):
     token_id: str
@@ -53,8 +335,23 @@ class PlaceOrderRequest(BaseModel):
     size: float
     side: str  # "BUY" or "SELL"
     order_type: str = "GTC"  # GTC, GTD, FOK, FAK
-    tick_size: str = "0.01"
-    neg_risk: bool = False
+    tick_size: Optional[str] = None  # resolved from the token registry when omitted
+    neg_risk: Optional[bool] = None
+
+class PricesRequest(BaseModel):
+    token_ids: list[str]
+
+class ExecutionRequest(BaseModel):
+    token_id: str
+    side: str  # "BUY" or "SELL"
+    size: float
+    limit_price: float
+    algo: str = "twap"  # twap, iceberg, chase
+    duration: float = 300.0  # twap: seconds to spread the parent over
+    slices: int = 10  # twap: number of child orders
+    clip: Optional[float] = None  # iceberg: visible size per child
+    timeout: Optional[float] = None  # iceberg/chase: give up after this many seconds
+    agent_id: Optional[str] = None
 
 class CancelOrderRequest(BaseModel):
     order_id: str
@@ -67,6 +364,7 @@ class AgentConfig(BaseModel):
     stop_loss_pct: float = 0.15
     take_profit_pct: float = 0.25
     enabled: bool = True
+    execution_mode: str = "live"  # "live" or "paper" (simulated fills, no CLOB orders)
 
 # ─── In-Memory Agent State ───────────────────────────────────────────────────
 agents_state = {}
@@ -173,6 +471,139 @@ async def get_portfolio_summary():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/portfolio/positions")
+async def get_positions(closed: bool = False):
+    """Open or closed positions from memory, marked to the latest midpoints."""
+    try:
+        if positions_book.snapshot_at is None:
+            await asyncio.to_thread(positions_book.refresh)
+        return positions_book.snapshot(closed)
+    except Exception as e:
+        logger.error(f"Error fetching positions: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ─── PnL Series ──────────────────────────────────────────────────────────────
+@app.get("/api/pnl/series")
+async def get_pnl_series(
+    scope: str = "wallet",
+    key: str = "",
+    start: Optional[float] = Query(None, description="Unix seconds; defaults to the first sample"),
+    end: Optional[float] = Query(None, description="Unix seconds; defaults to now"),
+    points: int = Query(500, ge=3, le=5000),
+    method: str = "lttb",
+    resolution: Optional[str] = None,
+):
+    """Cumulative realized/unrealized PnL for the wallet, a market (condition
+    id), an agent or a paper agent, downsampled to at most `points` samples."""
+    try:
+        if pnl_engine.built_at is None:
+            await asyncio.to_thread(_sync_pnl)
+        series = pnl_engine.series(scope, key, start, end, points, method, resolution)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error building PnL series: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    if series is None:
+        raise HTTPException(status_code=404, detail=f"No PnL history for {scope} '{key}'")
+    return series
+
+
+@app.get("/api/pnl/summary")
+async def get_pnl_summary():
+    """Current realized/unrealized PnL for the wallet, every agent and every
+    market, plus paper agents' simulated PnL."""
+    try:
+        if pnl_engine.built_at is None:
+            await asyncio.to_thread(_sync_pnl)
+        return {
+            "wallet": pnl_engine.current("wallet"),
+            "agents": {k: pnl_engine.current("agent", k) for k in pnl_engine.keys("agent")},
+            "paper": {k: pnl_engine.current("paper", k) for k in pnl_engine.keys("paper")},
+            "markets": {k: pnl_engine.current("market", k) for k in pnl_engine.keys("market")},
+            "built_at": pnl_engine.built_at,
+        }
+    except Exception as e:
+        logger.error(f"Error fetching PnL summary: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ─── Fill Analytics ──────────────────────────────────────────────────────────
+@app.get("/api/analytics/markouts")
+async def get_markouts(by: str = "agent", mode: str = "live"):
+    """Slippage against the arrival midpoint, 5s / 1m / 5m / 1h markouts
+    and effective fees, totalled per agent, strategy, market or wallet."""
+    try:
+        if pnl_engine.built_at is None:
+            await asyncio.to_thread(_sync_pnl)
+        return fill_analytics.summary(by, mode)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error fetching markouts: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/analytics/fills")
+async def get_fill_analytics(agent_id: Optional[str] = None, mode: Optional[str] = None, limit: int = Query(100, le=5000)):
+    """Most recent fills with their arrival midpoint, slippage, fee and markouts."""
+    try:
+        if pnl_engine.built_at is None:
+            await asyncio.to_thread(_sync_pnl)
+        fills = fill_analytics.fills(agent_id, mode, limit)
+        return {"fills": fills, "count": len(fills)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error fetching fill analytics: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ─── Portfolio Risk ──────────────────────────────────────────────────────────
+@app.get("/api/risk")
+async def get_risk(
+    scenarios: int = Query(SCENARIOS, ge=1000, le=1_000_000),
+    confidence: float = CONFIDENCE,
+    correlation: float = Query(0.0, description="Pairwise correlation of binary markets in the same event"),
+    paper: bool = False,
+):
+    """Monte Carlo VaR, CVaR and worst-case loss at resolution for the wallet
+    and every agent (and paper agent), priced at market-implied probabilities."""
+    try:
+        if positions_book.snapshot_at is None:
+            await asyncio.to_thread(positions_book.refresh)
+        if pnl_engine.built_at is None:
+            await asyncio.to_thread(_sync_pnl)
+        holders = {("wallet", ""): positions_book.holdings()}
+        scopes = ("agent", "paper") if paper else ("agent",)
+        for scope in scopes:
+            for key in pnl_engine.keys(scope):
+                holders[(scope, key)] = pnl_engine.holdings(scope, key)
+        result = await asyncio.to_thread(risk_engine.evaluate, holders, scenarios, confidence, correlation)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error computing portfolio risk: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    stats = result.pop("holders")
+    result["wallet"] = stats[("wallet", "")]
+    result["agents"] = {k: v for (scope, k), v in stats.items() if scope == "agent"}
+    if paper:
+        result["paper"] = {k: v for (scope, k), v in stats.items() if scope == "paper"}
+    return result
+
+
+# ─── Event Arbitrage ─────────────────────────────────────────────────────────
+@app.get("/api/arbitrage/events")
+async def get_event_arbitrage(limit: int = Query(50, le=5000), tag: Optional[str] = None):
+    """Neg-risk event baskets whose outcome asks sum below 1 (buy every YES)
+    or whose bids sum above 1 (buy every NO), sized to book depth after fees."""
+    opportunities = event_arb.ranked(limit, tag)
+    scanner = not SNAPSHOT_NAME or arb_scan_lease is not None
+    return {"opportunities": opportunities, "count": len(opportunities), "scanner": scanner, **event_arb.stats()}
+
+
 # ─── Market Data ─────────────────────────────────────────────────────────────
 @app.get("/api/markets")
 async def get_markets(limit: int = 50, active: bool = True):
@@ -190,9 +621,49 @@ async def get_markets(limit: int = 50, active: bool = True):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def _want_catalogue() -> None:
+    """Hydrate this worker's catalogue on its first search, if it reads a snapshot."""
+    global catalogue_wanted
+    if catalogue_wanted:
+        return
+    catalogue_wanted = True
+    if snapshot_reader is not None:
+        try:
+            await asyncio.to_thread(_hydrate_catalogue)
+        except Exception as e:
+            logger.error(f"Catalogue hydration for search failed: {e}")
+
+
+@app.get("/api/markets/search")
+async def search_markets(q: str = "", tag: Optional[str] = None, event: Optional[str] = None, limit: int = Query(20, le=500)):
+    """Search the local market catalogue by question text, tag and event."""
+    await _want_catalogue()
+    started = time.perf_counter()
+    results = catalogue.search(q, tag=tag, event_id=event, limit=limit)
+    return {
+        "markets": [r.to_dict() for r in results],
+        "count": len(results),
+        "indexed": len(catalogue),
+        "synced_at": catalogue.synced_at,
+        "took_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+
+
+@app.get("/api/markets/by-token/{token_id}")
+async def get_market_by_token(token_id: str):
+    """Resolve the market a CLOB token belongs to."""
+    record = _markets().by_token(token_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Token not found in market catalogue")
+    return record.to_dict()
+
+
 @app.get("/api/markets/{condition_id}")
 async def get_market(condition_id: str):
     """Get a single market by condition ID."""
+    record = _markets().get(condition_id)
+    if record is not None:
+        return record.to_dict()
     try:
         market = client.get_market(condition_id)
         return market
@@ -221,32 +692,159 @@ async def get_price(token_id: str, side: str = "BUY"):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/prices")
+async def get_prices(req: PricesRequest):
+    """Bulk best prices, midpoints and spreads as columns aligned with token_ids."""
+    try:
+        token_ids = list(dict.fromkeys(req.token_ids))
+        quotes = snapshot_reader.quotes(token_ids, SNAPSHOT_PRICE_MAX_AGE) if snapshot_reader else {}
+        missing = [t for t in token_ids if t not in quotes]
+        if missing:
+            quotes.update(await price_batcher.get(missing))
+        return to_columns(token_ids, quotes)
+    except Exception as e:
+        logger.error(f"Error fetching bulk prices: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/snapshot")
+async def get_snapshot_stats():
+    """Shared snapshot this worker reads from, if any."""
+    if snapshot_reader is None:
+        return {"attached": False, "name": SNAPSHOT_NAME or None}
+    try:
+        return {"attached": True, **snapshot_reader.stats()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/prices")
+async def get_prices_query(token_ids: str = Query(..., description="Comma-separated token IDs")):
+    """GET form of /api/prices for small token lists."""
+    return await get_prices(PricesRequest(token_ids=[t for t in token_ids.split(",") if t]))
+
+
 # ─── Order Execution ────────────────────────────────────────────────────────
+ORDER_TYPES = {
+    "GTC": OrderType.GTC,
+    "GTD": OrderType.GTD,
+    "FOK": OrderType.FOK,
+    "FAK": OrderType.FAK,
+}
+
+
+def submit_order(token_id: str, price: float, size: float, side: str, order_type: str = "GTC",
+                 tick_size: Optional[str] = None, neg_risk: Optional[bool] = None, agent_id: Optional[str] = None):
+    """Sign and post an order. Tick size, neg-risk and fee rate come from the
+    token registry, so no per-order lookups hit the CLOB before signing."""
+    meta = token_registry.prepare(token_id, price, size, tick_size, neg_risk)
+    order_args = OrderArgs(
+        token_id=token_id,
+        price=price,
+        size=size,
+        side=BUY if side.upper() == "BUY" else SELL,
+        fee_rate_bps=meta.fee_rate_bps,
+    )
+    signed = client.builder.create_order(
+        order_args,
+        CreateOrderOptions(tick_size=meta.tick_size, neg_risk=meta.neg_risk),
+    )
+    result = client.post_order(signed, ORDER_TYPES.get(order_type.upper(), OrderType.GTC))
+    if agent_id and isinstance(result, dict) and result.get("orderID"):
+        # resting orders fill later, so attribution cannot wait for a fill
+        pnl_engine.register_order(result["orderID"], agent_id)
+    _publish_fill(token_id, side, result, agent_id)
+    return result
+
+
+def _publish_fill(token_id: str, side: str, result, agent_id: Optional[str] = None) -> None:
+    fill = fill_from_order_result(side, result)
+    if fill is None:
+        return
+    event = {
+        "order_id": result.get("orderID"),
+        "token_id": token_id,
+        "side": side.upper(),
+        "price": fill[0],
+        "size": fill[1],
+        "agent_id": agent_id,
+        "ts": time.time(),
+    }
+    _notify_fill(event)
+
+
+def _notify_fill(event: dict) -> None:
+    for listener in fill_listeners:
+        try:
+            listener(event)
+        except Exception as e:
+            logger.error(f"Fill listener failed: {e}")
+
+
+def _route_order(agent_id: Optional[str], token_id: str, price: float, size: float, side: str, order_type: str = "GTC",
+                 tick_size: Optional[str] = None, neg_risk: Optional[bool] = None, source: str = "agent"):
+    """Send an agent's order to the live CLOB or, for paper agents, to the
+    paper exchange after the same registry validation."""
+    agent = agents_state.get(agent_id) if agent_id else None
+    if agent is None or agent.get("execution_mode") != "paper":
+        return submit_order(token_id, price, size, side, order_type, tick_size, neg_risk, agent_id=agent_id)
+    meta = token_registry.prepare(token_id, price, size, tick_size, neg_risk)
+    return paper_exchange.submit(token_id, side, price, size, order_type, agent_id=agent_id,
+                                 fee_rate_bps=meta.fee_rate_bps, source=source)
+
+
+def _check_position_limit(agent: dict, token_id: str, side: str, size: float) -> None:
+    """Reject a buy that would take the agent past its max_position_size in the token."""
+    if side.upper() != "BUY":
+        return
+    scope = "paper" if agent.get("execution_mode") == "paper" else "agent"
+    held = pnl_engine.holdings(scope, agent["id"]).get(token_id, (0.0, 0.0))[0]
+    if held + size > agent["max_position_size"]:
+        raise HTTPException(status_code=400, detail=f"Position {held + size:g} in {token_id} would exceed max {agent['max_position_size']}")
+
+
+def _on_paper_event(order, fill: Optional[dict]) -> None:
+    if fill is None:
+        # a paper stop/take close that found nothing to fill retries on the next mark
+        if order.source == "trigger" and order.agent_id:
+            trigger_engine.rearm(order.agent_id, order.token_id)
+        return
+    _notify_fill(fill)
+    agent_trades.append({
+        "timestamp": datetime.fromtimestamp(fill["ts"], timezone.utc).isoformat(),
+        "agent_id": order.agent_id,
+        "agent_name": agents_state.get(order.agent_id, {}).get("name"),
+        "token_id": order.token_id,
+        "side": order.side,
+        "price": round(fill["price"], 6),
+        "size": round(fill["size"], 6),
+        "fee": round(fill["fee"], 6),
+        "order_id": order.order_id,
+        "result": order.status,
+        "source": f"paper_{order.source}",
+        "mode": "paper",
+    })
+
+
+paper_exchange.listeners.append(_on_paper_event)
+
+
+@app.get("/api/tokens/{token_id}")
+async def get_token_meta(token_id: str):
+    """Order parameters for a token as the order path will use them."""
+    try:
+        return token_registry.resolve(token_id).to_dict()
+    except OrderValidationError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/api/orders/place")
 async def place_order(req: PlaceOrderRequest):
     """Place a real order on Polymarket."""
     try:
-        side = BUY if req.side.upper() == "BUY" else SELL
-        order_type_map = {
-            "GTC": OrderType.GTC,
-            "GTD": OrderType.GTD,
-            "FOK": OrderType.FOK,
-            "FAK": OrderType.FAK,
-        }
-        ot = order_type_map.get(req.order_type.upper(), OrderType.GTC)
-
-        order_args = OrderArgs(
-            token_id=req.token_id,
-            price=req.price,
-            size=req.size,
-            side=side,
-            order_type=ot,
-        )
-
-        result = client.create_and_post_order(
-            order_args,
-            {"tick_size": req.tick_size, "neg_risk": req.neg_risk},
-        )
+        result = submit_order(req.token_id, req.price, req.size, req.side, req.order_type, req.tick_size, req.neg_risk)
 
         # Log the trade
         agent_trades.append({
@@ -257,14 +855,80 @@ async def place_order(req: PlaceOrderRequest):
             "size": req.size,
             "result": str(result),
             "source": "manual",
+            "mode": "live",
         })
 
         return {"success": True, "result": result}
+    except OrderValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error placing order: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ─── Execution Algorithms ────────────────────────────────────────────────────
+execution_engine = ExecutionEngine(ClobGateway(client, submit_order))
+
+
+@app.post("/api/execution/orders")
+async def start_execution(req: ExecutionRequest):
+    """Work a parent order with TWAP, iceberg or best-price chasing."""
+    if req.algo not in ALGOS:
+        raise HTTPException(status_code=400, detail=f"algo must be one of {', '.join(ALGOS)}")
+    if req.agent_id is not None:
+        agent = agents_state.get(req.agent_id)
+        if agent is None:
+            raise HTTPException(status_code=404, detail="Agent not found")
+        if not agent["enabled"]:
+            raise HTTPException(status_code=400, detail="Agent is disabled")
+        if agent.get("execution_mode") == "paper":
+            raise HTTPException(status_code=400, detail="Execution algorithms run live only; paper agents trade through /api/agents/{agent_id}/execute")
+        # children are the agent's orders; the parent as a whole is its position
+        _check_position_limit(agent, req.token_id, req.side, req.size)
+    try:
+        # Validate the parent against the registry once; children reuse the same parameters
+        meta = token_registry.prepare(req.token_id, req.limit_price, req.size)
+    except OrderValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    params = {
+        "twap": {"duration": req.duration, "slices": req.slices},
+        "iceberg": {"clip": req.clip, "timeout": req.timeout},
+        "chase": {"timeout": req.timeout},
+    }[req.algo]
+    parent = ParentOrder(
+        req.token_id, req.side, req.size, req.limit_price, req.algo,
+        {k: v for k, v in params.items() if v is not None},
+        agent_id=req.agent_id, tick=float(meta.tick_size),
+        max_child=agents_state[req.agent_id]["max_order_size"] if req.agent_id is not None else None,
+    )
+    execution_engine.start(parent)
+    return {"success": True, "parent": parent.to_dict()}
+
+
+@app.get("/api/execution/orders")
+async def list_executions():
+    """List parent orders and their fill progress."""
+    parents = [p.to_dict() for p in execution_engine.parents.values()]
+    return {"parents": parents, "count": len(parents)}
+
+
+@app.get("/api/execution/orders/{parent_id}")
+async def get_execution(parent_id: str):
+    parent = execution_engine.parents.get(parent_id)
+    if parent is None:
+        raise HTTPException(status_code=404, detail="Parent order not found")
+    return {"parent": parent.to_dict(), "children": parent.children}
+
+
+@app.post("/api/execution/orders/{parent_id}/cancel")
+async def cancel_execution(parent_id: str):
+    """Stop scheduling children and cancel any that are still resting."""
+    if parent_id not in execution_engine.parents:
+        raise HTTPException(status_code=404, detail="Parent order not found")
+    return {"success": execution_engine.cancel(parent_id)}
+
+
 @app.post("/api/orders/cancel")
 async def cancel_order(req: CancelOrderRequest):
     """Cancel an open order."""
@@ -275,6 +939,95 @@ async def cancel_order(req: CancelOrderRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ─── Price Triggers ──────────────────────────────────────────────────────────
+_trigger_tasks: set = set()
+
+
+def _close_price(token_id: str, price: float) -> float:
+    """Marketable sell limit for a triggered close, on the token's tick grid."""
+    tick = float(token_registry.resolve(token_id).tick_size)
+    limit = math.floor(price * (1 - TRIGGER_SLIPPAGE) / tick + 1e-9) * tick
+    return round(max(tick, limit), 6)
+
+
+async def _fire_trigger(trigger) -> None:
+    """Cancel the agent's working parents on the token, then sell the
+    position fill-and-kill through the normal order path. If nothing fills
+    the pair is re-armed, so the close is retried on the next mark."""
+    agent_id, token_id = trigger.agent_id, trigger.token_id
+    action = trigger.kind.upper()
+    for parent_id, parent in list(execution_engine.parents.items()):
+        if parent.agent_id == agent_id and parent.token_id == token_id:
+            execution_engine.cancel(parent_id)
+    position = trigger_engine.position(agent_id, token_id)
+    size = math.floor((position[0] if position else trigger.size) * 100) / 100
+    try:
+        price = _close_price(token_id, trigger.fired_price)
+        args = (agent_id, token_id, price, size, "SELL", "FAK")
+        if agents_state.get(agent_id, {}).get("execution_mode") == "paper":
+            # the paper exchange is only touched from the event loop
+            result = _route_order(*args, source="trigger")
+        else:
+            result = await asyncio.to_thread(_route_order, *args, source="trigger")
+        # paper closes fill later; _on_paper_event re-arms them if they miss
+        if not result.get("paper") and fill_from_order_result("SELL", result) is None:
+            trigger_engine.rearm(agent_id, token_id)
+        agent_trades.append({
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "agent_id": agent_id,
+            "agent_name": agents_state.get(agent_id, {}).get("name"),
+            "token_id": token_id,
+            "side": "SELL",
+            "price": price,
+            "size": size,
+            "result": str(result),
+            "source": "trigger",
+            "mode": "paper" if result.get("paper") else "live",
+        })
+        agent_logs.append({
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "agent_id": agent_id,
+            "action": action,
+            "details": f"{trigger.kind} at {trigger.threshold:.4f} crossed by {trigger.fired_price}: SELL {size} @ {price} on {token_id[:20]}...",
+        })
+    except Exception as e:
+        logger.error(f"Trigger {trigger.id} close failed: {e}")
+        if not isinstance(e, OrderValidationError):
+            trigger_engine.rearm(agent_id, token_id)
+        agent_logs.append({
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "agent_id": agent_id,
+            "action": f"{action}_FAILED",
+            "details": str(e),
+        })
+
+
+def _on_triggers(fired: list) -> None:
+    loop = asyncio.get_running_loop()
+    for trigger in fired:
+        task = loop.create_task(_fire_trigger(trigger))
+        _trigger_tasks.add(task)
+        task.add_done_callback(_trigger_tasks.discard)
+
+
+trigger_engine.listeners.append(_on_triggers)
+
+
+@app.get("/api/paper/orders")
+async def list_paper_orders(agent_id: Optional[str] = None, open_only: bool = False, limit: int = Query(100, le=5000)):
+    """Paper-trading orders, newest first."""
+    orders = paper_exchange.open_orders(agent_id) if open_only else [
+        o for o in paper_exchange.orders.values() if agent_id is None or o.agent_id == agent_id]
+    return {"orders": [o.to_dict() for o in orders[::-1][:limit]], "count": len(orders), "fills": paper_exchange.fill_count}
+
+
+@app.get("/api/triggers")
+async def list_triggers(agent_id: Optional[str] = None):
+    """Armed stop-loss / take-profit triggers, optionally for one agent."""
+    triggers = [t.to_dict() for t in trigger_engine.armed(agent_id)]
+    return {"triggers": triggers, "count": len(triggers), "fired": trigger_engine.fired_count}
+
+
 # ─── Agent Management ────────────────────────────────────────────────────────
 @app.get("/api/agents")
 async def list_agents():
@@ -285,6 +1038,8 @@ async def list_agents():
 @app.post("/api/agents/deploy")
 async def deploy_agent(config: AgentConfig):
     """Deploy a new trading agent."""
+    if config.execution_mode not in EXECUTION_MODES:
+        raise HTTPException(status_code=400, detail=f"execution_mode must be one of {', '.join(EXECUTION_MODES)}")
     agent_id = f"agent-{len(agents_state) + 1:03d}"
     agent = {
         "id": agent_id,
@@ -296,6 +1051,7 @@ async def deploy_agent(config: AgentConfig):
         "stop_loss_pct": config.stop_loss_pct,
         "take_profit_pct": config.take_profit_pct,
         "enabled": config.enabled,
+        "execution_mode": config.execution_mode,
         "created_at": datetime.now(timezone.utc).isoformat(),
         "trades_executed": 0,
         "total_pnl": 0.0,
@@ -307,7 +1063,7 @@ async def deploy_agent(config: AgentConfig):
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "agent_id": agent_id,
         "action": "DEPLOYED",
-        "details": f"Agent '{config.name}' deployed with {config.strategy} strategy",
+        "details": f"Agent '{config.name}' deployed with {config.strategy} strategy ({config.execution_mode})",
     })
 
     return {"success": True, "agent": agent}
@@ -342,6 +1098,9 @@ async def kill_agent(agent_id: str):
     agent = agents_state[agent_id]
     agent["enabled"] = False
     agent["status"] = "stopped"
+    execution_engine.cancel_agent(agent_id)
+    paper_exchange.cancel_agent(agent_id)
+    trigger_engine.disarm_agent(agent_id)
 
     agent_logs.append({
         "timestamp": datetime.now(timezone.utc).isoformat(),
@@ -360,6 +1119,9 @@ async def delete_agent(agent_id: str):
         raise HTTPException(status_code=404, detail="Agent not found")
 
     del agents_state[agent_id]
+    execution_engine.cancel_agent(agent_id)
+    paper_exchange.cancel_agent(agent_id)
+    trigger_engine.disarm_agent(agent_id)
     return {"success": True}
 
 
@@ -378,7 +1140,7 @@ async def get_agent_trades(limit: int = 100):
 
 # ─── Agent Signal Generation (AI-powered) ───────────────────────────────────
 @app.get("/api/agents/{agent_id}/signals")
-async def get_agent_signals(agent_id: str):
+async def get_agent_signals(agent_id: str, limit: int = Query(10, le=5000), tag: Optional[str] = None):
     """Generate trading signals for an agent based on its strategy."""
     if agent_id not in agents_state:
         raise HTTPException(status_code=404, detail="Agent not found")
@@ -387,15 +1149,57 @@ async def get_agent_signals(agent_id: str):
     strategy = agent["strategy"]
 
     try:
-        import urllib.request
-        url = f"{GAMMA_HOST}/markets?limit=20&active=true&closed=false&order=volume24hr&ascending=false"
-        req = urllib.request.Request(url)
-        req.add_header("User-Agent", "Sovrana/1.0")
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            markets = json.loads(resp.read().decode())
+        if tag:
+            await _want_catalogue()
+        markets_source = catalogue if tag else _markets()
+        if len(markets_source):
+            # Scan the local catalogue instead of only the upstream top 20
+            records = catalogue.search(tag=tag, limit=limit) if tag else markets_source.top_by_volume(limit)
+            markets = [r.to_dict() for r in records]
+        else:
+            import urllib.request
+            url = f"{GAMMA_HOST}/markets?limit={limit}&active=true&closed=false&order=volume24hr&ascending=false"
+            req = urllib.request.Request(url)
+            req.add_header("User-Agent", "Sovrana/1.0")
+            with urllib.request.urlopen(req, timeout=10) as resp:
+                markets = json.loads(resp.read().decode())
 
         signals = []
-        for m in markets[:10]:
+        if strategy == "arbitrage":
+            # complete-set baskets across the outcomes of neg-risk events, one
+            # signal per leg; legs of a basket share basket_id and only pay
+            # off together, so the basket's expected profit is on its first leg
+            for opp in event_arb.ranked(limit, tag):
+                size = min(opp["size"], agent["max_order_size"])
+                try:
+                    metas = [token_registry.get(leg["token_id"])
+                             or await asyncio.to_thread(token_registry.resolve, leg["token_id"]) for leg in opp["legs"]]
+                except Exception as e:
+                    logger.warning(f"Skipping basket for event {opp['event_id']}: {e}")
+                    continue
+                if size < max(m.min_order_size for m in metas):
+                    continue  # some leg could not be placed, leaving the agent legged in
+                basket_id = f"{opp['event_id']}:{opp['direction']}"
+                for i, leg in enumerate(opp["legs"]):
+                    signals.append({
+                        "market": leg["question"],
+                        "condition_id": leg["condition_id"],
+                        "token_id": leg["token_id"],
+                        "event_id": opp["event_id"],
+                        "basket_id": basket_id,
+                        "basket_legs": opp["outcomes"],
+                        "direction": "BUY",
+                        "token": leg["outcome"],
+                        "price": leg["limit_price"],
+                        "size": size,
+                        "neg_risk": True,
+                        "confidence": 0.9,
+                        "reason": f"Event basket arbitrage: buy {leg['outcome']} on all {opp['outcomes']} outcomes of event "
+                                  f"{opp['event_id']}, {opp['edge']:.4f} per basket after fees over {opp['size']:.0f} baskets of depth",
+                        "edge": opp["edge"],
+                        "expected_profit": round(size * opp["edge"], 6) if i == 0 else 0.0,
+                    })
+        for m in markets[:limit]:
             question = m.get("question", "")
             tokens = m.get("tokens", [])
             if not tokens:
@@ -446,7 +1250,7 @@ async def get_agent_signals(agent_id: str):
 
 # ─── Agent Auto-Trade (execute a signal) ─────────────────────────────────────
 @app.post("/api/agents/{agent_id}/execute")
-async def execute_signal(agent_id: str, token_id: str, price: float, size: float, side: str = "BUY", tick_size: str = "0.01", neg_risk: bool = False):
+async def execute_signal(agent_id: str, token_id: str, price: float, size: float, side: str = "BUY", tick_size: Optional[str] = None, neg_risk: Optional[bool] = None):
     """Execute a trading signal for an agent."""
     if agent_id not in agents_state:
         raise HTTPException(status_code=404, detail="Agent not found")
@@ -457,21 +1261,10 @@ async def execute_signal(agent_id: str, token_id: str, price: float, size: float
 
     if size > agent["max_order_size"]:
         raise HTTPException(status_code=400, detail=f"Order size {size} exceeds max {agent['max_order_size']}")
+    _check_position_limit(agent, token_id, side, size)
 
     try:
-        side_val = BUY if side.upper() == "BUY" else SELL
-        order_args = OrderArgs(
-            token_id=token_id,
-            price=price,
-            size=size,
-            side=side_val,
-            order_type=OrderType.GTC,
-        )
-
-        result = client.create_and_post_order(
-            order_args,
-            {"tick_size": tick_size, "neg_risk": neg_risk},
-        )
+        result = _route_order(agent_id, token_id, price, size, side, "GTC", tick_size, neg_risk)
 
         agent["trades_executed"] = agent.get("trades_executed", 0) + 1
         agents_state[agent_id] = agent
@@ -486,6 +1279,7 @@ async def execute_signal(agent_id: str, token_id: str, price: float, size: float
             "size": size,
             "result": str(result),
             "source": "agent",
+            "mode": agent.get("execution_mode", "live"),
         }
         agent_trades.append(trade_record)
 
@@ -493,7 +1287,7 @@ async def execute_signal(agent_id: str, token_id: str, price: float, size: float
             "timestamp": datetime.now(timezone.utc).isoformat(),
             "agent_id": agent_id,
             "action": "TRADE_EXECUTED",
-            "details": f"{side} {size} @ {price} on {token_id[:20]}...",
+            "details": f"{'[paper] ' if trade_record['mode'] == 'paper' else ''}{side} {size} @ {price} on {token_id[:20]}...",
         })
 
         return {"success": True, "result": result, "trade": trade_record}
@@ -505,7 +1299,8 @@ async def execute_signal(agent_id: str, token_id: str, price: float, size: float
             "action": "TRADE_FAILED",
             "details": str(e),
         })
-        raise HTTPException(status_code=500, detail=str(e))
+        status = 400 if isinstance(e, OrderValidationError) else 500
+        raise HTTPException(status_code=status, detail=str(e))
 
 
 if __name__ == "__main__":
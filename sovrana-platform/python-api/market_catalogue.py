@@ -0,0 +1,492 @@
+"""
+Market Catalogue
+Locally maintained index of every active Polymarket market, synced incrementally
+from the Gamma API and queried in-process instead of round-tripping upstream.
+"""
+
+import re
+import sys
+import json
+import time
+import heapq
+import bisect
+import logging
+import threading
+import urllib.parse
+import urllib.request
+from datetime import datetime, timezone
+from typing import Optional
+
+logger = logging.getLogger("sovrana-api")
+
+PAGE_SIZE = 500
+EVENT_BATCH = 50  # event ids per Gamma /events request
+FULL_RESYNC_INTERVAL = 3600  # seconds between full re-walks of the active set
+PREFIX_UNION_LIMIT = 16  # past this many expansions a prefix is checked per record
+SMALL_CANDIDATE_SET = 4096  # below this, intersect and rank instead of scanning by volume
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset({
+    "a", "an", "and", "at", "be", "by", "for", "in", "is", "it", "of", "on",
+    "or", "the", "to", "will", "with",
+})
+
+
+def tokenize(text: str) -> list:
+    """Split free text into lowercase index terms."""
+    return [w for w in _WORD_RE.findall(text.lower()) if w not in _STOPWORDS]
+
+
+def _json_list(value) -> list:
+    """Gamma encodes several list fields as JSON strings."""
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str) and value:
+        try:
+            parsed = json.loads(value)
+            return parsed if isinstance(parsed, list) else []
+        except ValueError:
+            return []
+    return []
+
+
+def _float(value, default: float = 0.0) -> float:
+    try:
+        return float(value) if value not in (None, "") else default
+    except (TypeError, ValueError):
+        return default
+
+
+def _timestamp(value) -> float:
+    if not value:
+        return 0.0
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return 0.0
+
+
+def _intern(value) -> str:
+    return sys.intern(str(value)) if value is not None else ""
+
+
+# ─── Record ──────────────────────────────────────────────────────────────────
+class MarketRecord:
+    """Compact market row. Identifier strings are interned so the token, event
+    and tag values shared between records and indexes are stored once."""
+
+    __slots__ = (
+        "slot", "market_id", "condition_id", "question", "slug", "event_ids",
+        "tags", "token_ids", "outcomes", "prices", "volume_24hr", "volume",
+        "liquidity", "best_bid", "best_ask", "end_date", "updated_at",
+        "neg_risk", "tick_size", "min_order_size", "taker_fee_bps",
+    )
+
+    @classmethod
+    def from_gamma(cls, m: dict) -> "MarketRecord":
+        r = cls()
+        r.slot = -1
+        r.market_id = _intern(m.get("id", ""))
+        r.condition_id = _intern(m.get("conditionId") or m.get("condition_id") or "")
+        r.question = m.get("question", "") or ""
+        r.slug = m.get("slug", "") or ""
+
+        events = m.get("events") or []
+        r.event_ids = tuple(_intern(e.get("id")) for e in events if e.get("id") is not None)
+
+        tags = list(m.get("tags") or [])
+        for e in events:
+            tags.extend(e.get("tags") or [])
+        r.tags = tuple(dict.fromkeys(
+            _intern((t.get("slug") or t.get("label") or "").lower()) if isinstance(t, dict) else _intern(str(t).lower())
+            for t in tags
+        ))
+
+        if m.get("tokens"):
+            # CLOB-shaped payload
+            tokens = m["tokens"]
+            r.token_ids = tuple(_intern(t.get("token_id")) for t in tokens)
+            r.outcomes = tuple(_intern(t.get("outcome", "")) for t in tokens)
+            r.prices = tuple(_float(t.get("price"), 0.5) for t in tokens)
+        else:
+            r.token_ids = tuple(_intern(t) for t in _json_list(m.get("clobTokenIds")))
+            r.outcomes = tuple(_intern(o) for o in _json_list(m.get("outcomes")))
+            r.prices = tuple(_float(p, 0.5) for p in _json_list(m.get("outcomePrices")))
+
+        r.volume_24hr = _float(m.get("volume24hr"))
+        r.volume = _float(m.get("volumeNum", m.get("volume")))
+        r.liquidity = _float(m.get("liquidityNum", m.get("liquidity")))
+        r.best_bid = _float(m.get("bestBid"), -1.0)
+        r.best_ask = _float(m.get("bestAsk"), -1.0)
+        r.end_date = m.get("endDate") or m.get("end_date_iso") or ""
+        r.updated_at = _timestamp(m.get("updatedAt"))
+        r.neg_risk = bool(m.get("negRisk", m.get("neg_risk", False)))
+        r.tick_size = _float(m.get("orderPriceMinTickSize", m.get("minimum_tick_size")), 0.01)
+        r.min_order_size = _float(m.get("orderMinSize", m.get("minimum_order_size")), 0.0)
+        r.taker_fee_bps = int(_float(m.get("takerBaseFee", m.get("taker_base_fee"))))
+        return r
+
+    def is_live(self) -> bool:
+        return bool(self.condition_id and self.token_ids)
+
+    def to_dict(self) -> dict:
+        """Serialize to the Gamma field names plus the CLOB-style `tokens` list
+        the signal code consumes."""
+        return {
+            "id": self.market_id,
+            "condition_id": self.condition_id,
+            "conditionId": self.condition_id,
+            "question": self.question,
+            "slug": self.slug,
+            "event_ids": list(self.event_ids),
+            "tags": list(self.tags),
+            "tokens": [
+                {
+                    "token_id": tid,
+                    "outcome": self.outcomes[i] if i < len(self.outcomes) else "",
+                    "price": self.prices[i] if i < len(self.prices) else None,
+                }
+                for i, tid in enumerate(self.token_ids)
+            ],
+            "volume24hr": self.volume_24hr,
+            "volume": self.volume,
+            "liquidity": self.liquidity,
+            "bestBid": self.best_bid if self.best_bid >= 0 else None,
+            "bestAsk": self.best_ask if self.best_ask >= 0 else None,
+            "endDate": self.end_date,
+            "negRisk": self.neg_risk,
+            "orderPriceMinTickSize": self.tick_size,
+            "orderMinSize": self.min_order_size,
+        }
+
+    def to_gamma(self) -> dict:
+        """Minimal Gamma-shaped payload that from_gamma() turns back into an
+        identical record (used to ship records between processes)."""
+        return {
+            "id": self.market_id,
+            "conditionId": self.condition_id,
+            "question": self.question,
+            "slug": self.slug,
+            "events": [{"id": e} for e in self.event_ids],
+            "tags": list(self.tags),
+            "clobTokenIds": list(self.token_ids),
+            "outcomes": list(self.outcomes),
+            "outcomePrices": list(self.prices),
+            "volume24hr": self.volume_24hr,
+            "volumeNum": self.volume,
+            "liquidityNum": self.liquidity,
+            "bestBid": self.best_bid if self.best_bid >= 0 else None,
+            "bestAsk": self.best_ask if self.best_ask >= 0 else None,
+            "endDate": self.end_date,
+            "updatedAt": datetime.fromtimestamp(self.updated_at, timezone.utc).isoformat() if self.updated_at else None,
+            "negRisk": self.neg_risk,
+            "orderPriceMinTickSize": self.tick_size,
+            "orderMinSize": self.min_order_size,
+            "takerBaseFee": self.taker_fee_bps,
+        }
+
+
+# ─── Catalogue ───────────────────────────────────────────────────────────────
+class MarketCatalogue:
+    """All active markets with hash indexes by condition, token, event and tag,
+    and an inverted index over question text."""
+
+    def __init__(self, gamma_host: str):
+        self.gamma_host = gamma_host
+        self._lock = threading.RLock()
+        self._records: list = []
+        self._free: list = []
+        self._by_condition: dict = {}
+        self._by_token: dict = {}
+        self._by_event: dict = {}
+        self._by_tag: dict = {}
+        self._postings: dict = {}
+        self._vocab: list = []
+        self._vocab_dirty = False
+        self._rank: list = []
+        self._rank_dirty = False
+        self.watermark = 0.0
+        self._at_watermark: set = set()  # condition ids already applied at the watermark's updatedAt
+        self.synced_at: Optional[float] = None
+        self.last_full_sync: Optional[float] = None
+        self.listeners: list = []
+
+    def __len__(self) -> int:
+        return len(self._by_condition)
+
+    # ── Upstream ──
+    def _get(self, path: str) -> list:
+        req = urllib.request.Request(f"{self.gamma_host}{path}")
+        req.add_header("User-Agent", "Sovrana/1.0")
+        with urllib.request.urlopen(req, timeout=15) as resp:
+            data = json.loads(resp.read().decode())
+        return data if isinstance(data, list) else []
+
+    def _fetch_page(self, params: str, offset: int) -> list:
+        return self._get(f"/markets?limit={PAGE_SIZE}&offset={offset}&{params}")
+
+    def event_outcomes(self, event_ids: list) -> dict:
+        """event_id -> condition ids of the event's open markets as Gamma
+        lists them, including any this catalogue has not kept. Events Gamma
+        does not return are left out."""
+        outcomes = {}
+        for i in range(0, len(event_ids), EVENT_BATCH):
+            batch = event_ids[i:i + EVENT_BATCH]
+            query = "&".join(f"id={urllib.parse.quote(str(e))}" for e in batch)
+            for event in self._get(f"/events?limit={len(batch)}&{query}"):
+                outcomes[str(event.get("id"))] = frozenset(
+                    m.get("conditionId") for m in event.get("markets") or []
+                    if m.get("conditionId") and m.get("active", True) and not m.get("closed"))
+        return outcomes
+
+    def full_sync(self) -> int:
+        """Walk the complete active set and replace the catalogue with it."""
+        fresh = []
+        offset = 0
+        while True:
+            page = self._fetch_page("active=true&closed=false&include_tag=true", offset)
+            fresh.extend(page)
+            if len(page) < PAGE_SIZE:
+                break
+            offset += PAGE_SIZE
+
+        with self._lock:
+            upserted = [rec for rec in map(self._upsert, fresh) if rec is not None]
+            seen = {rec.condition_id for rec in upserted}
+            for cid in [c for c in self._by_condition if c not in seen]:
+                self._remove(cid)
+            self.last_full_sync = self.synced_at = time.time()
+        logger.info(f"Market catalogue full sync: {len(self)} active markets")
+        self._notify(upserted)
+        return len(fresh)
+
+    def incremental_sync(self) -> int:
+        """Pull markets updated since the watermark, newest first, stopping at
+        the first page that reaches already-seen updates. Closed markets show
+        up here too and are evicted."""
+        changed = {}
+        offset = 0
+        watermark, applied = self.watermark, set(self._at_watermark)
+        while True:
+            page = self._fetch_page("order=updatedAt&ascending=false&include_tag=true", offset)
+            # >= so markets updated in the watermark's own second are not
+            # skipped; the ones already applied are recognised by condition id
+            newer = [m for m in page if _timestamp(m.get("updatedAt")) > watermark
+                     or (_timestamp(m.get("updatedAt")) == watermark and m.get("conditionId") not in applied)]
+            for m in newer:
+                # pages shift while walking them, so keep the newest copy only
+                key = m.get("conditionId")
+                if key not in changed or _timestamp(m.get("updatedAt")) > _timestamp(changed[key].get("updatedAt")):
+                    changed[key] = m
+            if len(newer) < len(page) or len(page) < PAGE_SIZE:
+                break
+            offset += PAGE_SIZE
+        changed = sorted(changed.values(), key=lambda m: _timestamp(m.get("updatedAt")))
+
+        with self._lock:
+            upserted = [rec for rec in map(self._upsert, changed) if rec is not None]
+            self.synced_at = time.time()
+        if changed:
+            logger.info(f"Market catalogue incremental sync: {len(changed)} updated markets")
+            self._notify(upserted)
+        return len(changed)
+
+    def sync(self) -> int:
+        """Incremental sync, falling back to a full walk on first run and
+        periodically thereafter."""
+        if self.last_full_sync is None or time.time() - self.last_full_sync > FULL_RESYNC_INTERVAL:
+            return self.full_sync()
+        return self.incremental_sync()
+
+    def load(self, markets: list) -> None:
+        """Upsert already-fetched market payloads (fixtures, CLOB responses)."""
+        with self._lock:
+            upserted = [rec for rec in map(self._upsert, markets) if rec is not None]
+            self.synced_at = time.time()
+        self._notify(upserted)
+
+    def _notify(self, records: list) -> None:
+        """Hand freshly upserted records to subscribers (token registry etc.)."""
+        for listener in self.listeners:
+            try:
+                listener(records)
+            except Exception as e:
+                logger.error(f"Market catalogue listener failed: {e}")
+
+    # ── Index maintenance ──
+    def _upsert(self, m: dict) -> Optional[MarketRecord]:
+        rec = MarketRecord.from_gamma(m)
+        if rec.updated_at > self.watermark:
+            self.watermark = rec.updated_at
+            self._at_watermark = set()
+        if rec.updated_at == self.watermark:
+            self._at_watermark.add(rec.condition_id)
+        if not rec.condition_id:
+            return None
+        if m.get("closed") or m.get("active") is False or m.get("archived") or not rec.is_live():
+            self._remove(rec.condition_id)
+            return None
+
+        old = self._by_condition.get(rec.condition_id)
+        if old is not None:
+            self._unindex(old)
+            rec.slot = old.slot
+        elif self._free:
+            rec.slot = self._free.pop()
+        else:
+            rec.slot = len(self._records)
+            self._records.append(None)
+
+        self._records[rec.slot] = rec
+        self._index(rec)
+        self._rank_dirty = True
+        return rec
+
+    def _remove(self, condition_id: str) -> None:
+        rec = self._by_condition.get(condition_id)
+        if rec is None:
+            return
+        self._unindex(rec)
+        self._records[rec.slot] = None
+        self._free.append(rec.slot)
+        self._rank_dirty = True
+
+    def _index(self, rec: MarketRecord) -> None:
+        slot = rec.slot
+        self._by_condition[rec.condition_id] = rec
+        for tid in rec.token_ids:
+            self._by_token[tid] = rec
+        for eid in rec.event_ids:
+            self._by_event.setdefault(eid, set()).add(slot)
+        for tag in rec.tags:
+            self._by_tag.setdefault(tag, set()).add(slot)
+        for term in set(tokenize(rec.question)):
+            postings = self._postings.get(term)
+            if postings is None:
+                self._postings[sys.intern(term)] = {slot}
+                self._vocab_dirty = True
+            else:
+                postings.add(slot)
+
+    def _unindex(self, rec: MarketRecord) -> None:
+        slot = rec.slot
+        self._by_condition.pop(rec.condition_id, None)
+        for tid in rec.token_ids:
+            if self._by_token.get(tid) is rec:
+                del self._by_token[tid]
+        for index, keys in ((self._by_event, rec.event_ids), (self._by_tag, rec.tags)):
+            for key in keys:
+                bucket = index.get(key)
+                if bucket is not None:
+                    bucket.discard(slot)
+                    if not bucket:
+                        del index[key]
+        for term in set(tokenize(rec.question)):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.discard(slot)
+                if not postings:
+                    del self._postings[term]
+                    self._vocab_dirty = True
+
+    def _prefix_terms(self, prefix: str) -> list:
+        if self._vocab_dirty:
+            self._vocab = sorted(self._postings)
+            self._vocab_dirty = False
+        i = bisect.bisect_left(self._vocab, prefix)
+        j = bisect.bisect_left(self._vocab, prefix + "\uffff")
+        return self._vocab[i:j]
+
+    def _volume_rank(self) -> list:
+        """Slots ordered by 24h volume, rebuilt lazily after syncs."""
+        if self._rank_dirty:
+            self._rank = sorted(
+                (r.slot for r in self._by_condition.values()),
+                key=lambda s: self._records[s].volume_24hr,
+                reverse=True,
+            )
+            self._rank_dirty = False
+        return self._rank
+
+    # ── Lookups ──
+    def get(self, condition_id: str) -> Optional[MarketRecord]:
+        return self._by_condition.get(condition_id)
+
+    def by_token(self, token_id: str) -> Optional[MarketRecord]:
+        return self._by_token.get(token_id)
+
+    def records(self) -> list:
+        """Every live record in slot order, which is stable for unchanged markets."""
+        with self._lock:
+            return [r for r in self._records if r is not None]
+
+    def by_event(self, event_id: str) -> list:
+        with self._lock:
+            return [self._records[s] for s in self._by_event.get(event_id, ())]
+
+    def by_tag(self, tag: str) -> list:
+        with self._lock:
+            return [self._records[s] for s in self._by_tag.get(tag.lower(), ())]
+
+    def events(self) -> dict:
+        """Snapshot of event_id -> member records."""
+        with self._lock:
+            return {eid: [self._records[s] for s in slots] for eid, slots in self._by_event.items()}
+
+    def top_by_volume(self, limit: int = 20) -> list:
+        with self._lock:
+            return [self._records[s] for s in self._volume_rank()[:limit]]
+
+    def search(self, q: str = "", tag: Optional[str] = None, event_id: Optional[str] = None, limit: int = 20) -> list:
+        """Match all query terms (the last one as a prefix, for type-ahead),
+        filtered by tag/event, ranked by 24h volume."""
+        terms = tokenize(q)
+        with self._lock:
+            sets = [self._postings.get(term, set()) for term in terms[:-1]]
+            prefix = None
+            if terms:
+                expansions = self._prefix_terms(terms[-1])
+                if len(expansions) <= PREFIX_UNION_LIMIT:
+                    merged = set()
+                    for term in expansions:
+                        merged |= self._postings[term]
+                    sets.append(merged)
+                else:
+                    prefix = terms[-1]
+            if tag:
+                sets.append(self._by_tag.get(tag.lower(), set()))
+            if event_id:
+                sets.append(self._by_event.get(event_id, set()))
+
+            def matches_prefix(rec):
+                return prefix is None or any(w.startswith(prefix) for w in tokenize(rec.question))
+
+            records = self._records
+            sets.sort(key=len)
+            if sets and len(sets[0]) <= SMALL_CANDIDATE_SET:
+                rest = sets[1:]
+                hits = (
+                    records[s] for s in sets[0]
+                    if all(s in other for other in rest) and matches_prefix(records[s])
+                )
+                return heapq.nlargest(limit, hits, key=lambda r: r.volume_24hr)
+
+            # Broad query: walk markets in volume order and stop once filled
+            out = []
+            for s in self._volume_rank():
+                if all(s in other for other in sets) and matches_prefix(records[s]):
+                    out.append(records[s])
+                    if len(out) >= limit:
+                        break
+            return out
+
+    def stats(self) -> dict:
+        return {
+            "markets": len(self._by_condition),
+            "tokens": len(self._by_token),
+            "events": len(self._by_event),
+            "tags": len(self._by_tag),
+            "terms": len(self._postings),
+            "synced_at": self.synced_at,
+            "watermark": self.watermark,
+        }
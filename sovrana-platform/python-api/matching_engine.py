@@ -0,0 +1,358 @@
+"""
+Matching Engine
+In-process price-time-priority limit order book, used as a stand-in for the
+Polymarket CLOB when testing execution logic and simulating markets.
+"""
+
+import time
+import bisect
+import random
+import itertools
+import threading
+from collections import deque
+from typing import Optional
+
+PRICE_DECIMALS = 6
+
+
+def _key(price: float) -> float:
+    return round(price, PRICE_DECIMALS)
+
+
+class RestingOrder:
+    __slots__ = ("order_id", "owner", "token_id", "side", "price", "size", "filled", "notional", "status", "created_at")
+
+    def __init__(self, order_id: str, owner: str, token_id: str, side: str, price: float, size: float):
+        self.order_id = order_id
+        self.owner = owner
+        self.token_id = token_id
+        self.side = side
+        self.price = price
+        self.size = size
+        self.filled = 0.0
+        self.notional = 0.0
+        self.status = "live"
+        self.created_at = time.time()
+
+    @property
+    def remaining(self) -> float:
+        return self.size - self.filled
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.order_id,
+            "owner": self.owner,
+            "asset_id": self.token_id,
+            "side": self.side,
+            "price": str(self.price),
+            "original_size": str(self.size),
+            "size_matched": str(round(self.filled, 6)),
+            "avg_price": round(self.notional / self.filled, 6) if self.filled else None,
+            "status": self.status,
+            "created_at": int(self.created_at),
+        }
+
+
+class Fill:
+    __slots__ = ("fill_id", "token_id", "price", "size", "taker_side", "maker_order_id", "taker_order_id", "maker_owner", "taker_owner", "ts")
+
+    def __init__(self, fill_id, token_id, price, size, taker_side, maker, taker):
+        self.fill_id = fill_id
+        self.token_id = token_id
+        self.price = price
+        self.size = size
+        self.taker_side = taker_side
+        self.maker_order_id = maker.order_id
+        self.taker_order_id = taker.order_id
+        self.maker_owner = maker.owner
+        self.taker_owner = taker.owner
+        self.ts = time.time()
+
+    def to_dict(self) -> dict:
+        """CLOB /data/trades shape, from the taker's point of view."""
+        return {
+            "id": self.fill_id,
+            "asset_id": self.token_id,
+            "side": self.taker_side,
+            "price": str(self.price),
+            "size": str(round(self.size, 6)),
+            "status": "MATCHED",
+            "match_time": str(int(self.ts)),
+            "taker_order_id": self.taker_order_id,
+            "maker_orders": [{"order_id": self.maker_order_id, "owner": self.maker_owner}],
+            "owner": self.taker_owner,
+            "trader_side": "TAKER",
+        }
+
+
+class _Side:
+    """One side of a book: sorted price keys plus a FIFO queue per level."""
+
+    def __init__(self, descending: bool):
+        self.descending = descending
+        self.prices: list = []  # ascending
+        self.levels: dict = {}
+
+    def best(self) -> Optional[float]:
+        if not self.prices:
+            return None
+        return self.prices[-1] if self.descending else self.prices[0]
+
+    def add(self, order: RestingOrder) -> None:
+        key = _key(order.price)
+        level = self.levels.get(key)
+        if level is None:
+            level = self.levels[key] = deque()
+            bisect.insort(self.prices, key)
+        level.append(order)
+
+    def drop_level(self, key: float) -> None:
+        del self.levels[key]
+        i = bisect.bisect_left(self.prices, key)
+        if i < len(self.prices) and self.prices[i] == key:
+            self.prices.pop(i)
+
+    def depth(self, levels: int) -> list:
+        keys = reversed(self.prices) if self.descending else iter(self.prices)
+        out = []
+        for key in keys:
+            size = sum(o.remaining for o in self.levels[key] if o.status == "live")
+            if size > 0:
+                out.append({"price": str(key), "size": str(round(size, 6))})
+                if len(out) >= levels:
+                    break
+        return out
+
+
+class OrderBook:
+    def __init__(self, token_id: str):
+        self.token_id = token_id
+        self.bids = _Side(descending=True)
+        self.asks = _Side(descending=False)
+        self.last_trade_price: Optional[float] = None
+
+    def best_bid(self) -> Optional[float]:
+        return self.bids.best()
+
+    def best_ask(self) -> Optional[float]:
+        return self.asks.best()
+
+    def midpoint(self) -> Optional[float]:
+        bid, ask = self.best_bid(), self.best_ask()
+        if bid is None or ask is None:
+            return None
+        return round((bid + ask) / 2, PRICE_DECIMALS)
+
+    def available(self, side: str, limit: float) -> float:
+        """Size a taker on `side` could fill at or better than `limit`."""
+        book = self.asks if side == "BUY" else self.bids
+        total = 0.0
+        for key in (book.prices if side == "BUY" else reversed(book.prices)):
+            if (side == "BUY" and key > limit) or (side == "SELL" and key < limit):
+                break
+            total += sum(o.remaining for o in book.levels[key] if o.status == "live")
+        return total
+
+
+class MatchingEngine:
+    """Books for many tokens. Orders cross against the opposite side in
+    price-time priority; GTC/GTD remainders rest, FAK remainders cancel, FOK
+    orders only execute if they can fill completely."""
+
+    def __init__(self):
+        self.books: dict = {}
+        self.orders: dict = {}
+        self.fills: list = []
+        self.listeners: list = []
+        self.version = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.RLock()
+
+    def book(self, token_id: str) -> OrderBook:
+        book = self.books.get(token_id)
+        if book is None:
+            book = self.books[token_id] = OrderBook(token_id)
+        return book
+
+    def place(self, token_id: str, side: str, price: float, size: float, order_type: str = "GTC", owner: str = "") -> dict:
+        side = side.upper()
+        order_type = order_type.upper()
+        with self._lock:
+            book = self.book(token_id)
+            order = RestingOrder(f"0x{next(self._ids):064x}", owner, token_id, side, _key(price), size)
+            self.orders[order.order_id] = order
+
+            if order_type == "FOK" and book.available(side, order.price) + 1e-9 < size:
+                order.status = "unmatched"
+                return self._result(order, [])
+
+            fills = self._match(book, order)
+            if order.remaining <= 1e-9:
+                order.status = "matched"
+            elif order_type in ("FAK", "FOK"):
+                order.status = "matched" if fills else "unmatched"
+            else:
+                (book.bids if side == "BUY" else book.asks).add(order)
+            self._changed(token_id, fills)
+            return self._result(order, fills)
+
+    def _match(self, book: OrderBook, taker: RestingOrder) -> list:
+        opposite = book.asks if taker.side == "BUY" else book.bids
+        fills = []
+        while taker.remaining > 1e-9:
+            best = opposite.best()
+            if best is None or (taker.side == "BUY" and best > taker.price) or (taker.side == "SELL" and best < taker.price):
+                break
+            level = opposite.levels[best]
+            while level and taker.remaining > 1e-9:
+                maker = level[0]
+                if maker.status != "live":
+                    level.popleft()
+                    continue
+                qty = min(maker.remaining, taker.remaining)
+                for o in (maker, taker):
+                    o.filled += qty
+                    o.notional += qty * best
+                fill = Fill(f"fill-{next(self._ids)}", book.token_id, best, qty, taker.side, maker, taker)
+                fills.append(fill)
+                self.fills.append(fill)
+                if maker.remaining <= 1e-9:
+                    maker.status = "matched"
+                    level.popleft()
+            if not level:
+                opposite.drop_level(best)
+        if fills:
+            book.last_trade_price = fills[-1].price
+        return fills
+
+    def cancel(self, order_id: str) -> bool:
+        with self._lock:
+            order = self.orders.get(order_id)
+            if order is None or order.status != "live":
+                return False
+            order.status = "canceled"
+            side = self.books[order.token_id].bids if order.side == "BUY" else self.books[order.token_id].asks
+            key = _key(order.price)
+            level = side.levels.get(key)
+            if level is not None:
+                try:
+                    level.remove(order)
+                except ValueError:
+                    pass
+                if not level:
+                    side.drop_level(key)
+            self._changed(order.token_id, [])
+            return True
+
+    def cancel_all(self, owner: Optional[str] = None) -> list:
+        with self._lock:
+            ids = [o.order_id for o in self.orders.values() if o.status == "live" and (owner is None or o.owner == owner)]
+            return [i for i in ids if self.cancel(i)]
+
+    def get_order(self, order_id: str) -> Optional[RestingOrder]:
+        return self.orders.get(order_id)
+
+    def open_orders(self, owner: Optional[str] = None) -> list:
+        return [o for o in self.orders.values() if o.status == "live" and (owner is None or o.owner == owner)]
+
+    def snapshot(self, token_id: str, levels: int = 50) -> dict:
+        """Order book in the CLOB /book response shape."""
+        with self._lock:
+            book = self.book(token_id)
+            return {
+                "asset_id": token_id,
+                "timestamp": str(int(time.time() * 1000)),
+                "bids": list(reversed(book.bids.depth(levels))),
+                "asks": list(reversed(book.asks.depth(levels))),
+                "last_trade_price": str(book.last_trade_price) if book.last_trade_price is not None else None,
+            }
+
+    def _changed(self, token_id: str, fills: list) -> None:
+        self.version += 1
+        for listener in self.listeners:
+            listener(token_id, fills)
+
+    def _result(self, order: RestingOrder, fills: list) -> dict:
+        matched = sum(f.size for f in fills)
+        cash = sum(f.size * f.price for f in fills)
+        return {
+            "success": order.status != "unmatched",
+            "orderID": order.order_id,
+            "status": order.status,
+            "makingAmount": str(round(cash if order.side == "BUY" else matched, 6)),
+            "takingAmount": str(round(matched if order.side == "BUY" else cash, 6)),
+            "fills": [f.to_dict() for f in fills],
+        }
+
+
+# ─── Synthetic liquidity ─────────────────────────────────────────────────────
+class LiquiditySimulator:
+    """Market-maker ladder that refills toward a target depth around a
+    drifting fair value, plus random taker flow that lifts or hits resting
+    orders. `step()` advances one tick."""
+
+    def __init__(self, engine: MatchingEngine, token_id: str, fair: float = 0.5, tick: float = 0.01,
+                 levels: int = 10, depth: float = 50.0, refill: float = 0.3, taker_rate: float = 0.5,
+                 taker_size: float = 20.0, volatility: float = 0.002, seed: Optional[int] = None):
+        self.engine = engine
+        self.token_id = token_id
+        self.fair = fair
+        self.tick = tick
+        self.levels = levels
+        self.depth = depth
+        self.refill = refill
+        self.taker_rate = taker_rate
+        self.taker_size = taker_size
+        self.volatility = volatility
+        self.rng = random.Random(seed)
+        self.owner = f"mm-{token_id[:8]}"
+        self._live: list = []
+
+    def _ladder(self):
+        center = round(self.fair / self.tick) * self.tick
+        for i in range(1, self.levels + 1):
+            yield "BUY", round(center - i * self.tick, 6)
+            yield "SELL", round(center + i * self.tick, 6)
+
+    def seed(self) -> None:
+        for side, price in self._ladder():
+            if self.tick <= price <= 1 - self.tick:
+                self._quote(side, price, self.depth)
+
+    def _quote(self, side: str, price: float, size: float) -> None:
+        result = self.engine.place(self.token_id, side, price, round(size, 2), "GTC", self.owner)
+        if result["status"] == "live":
+            self._live.append(result["orderID"])
+
+    def step(self) -> None:
+        self.fair = min(0.95, max(0.05, self.fair + self.rng.gauss(0, self.volatility)))
+        ladder = set(self._ladder())
+
+        # Pull quotes the fair value has moved away from, tally the rest
+        resting = {}
+        live = []
+        for order_id in self._live:
+            order = self.engine.get_order(order_id)
+            if order is None or order.status != "live":
+                continue
+            if (order.side, order.price) not in ladder:
+                self.engine.cancel(order_id)
+                continue
+            live.append(order_id)
+            resting[(order.side, order.price)] = resting.get((order.side, order.price), 0.0) + order.remaining
+        self._live = live
+
+        for side, price in ladder:
+            if not self.tick <= price <= 1 - self.tick:
+                continue
+            have = resting.get((side, price), 0.0)
+            gap = self.depth - have
+            if gap > 0.01:
+                self._quote(side, price, gap * self.refill if have else gap)
+        if self.rng.random() < self.taker_rate:
+            side = "BUY" if self.rng.random() < 0.5 else "SELL"
+            size = self.rng.expovariate(1 / self.taker_size)
+            price = 1 - self.tick if side == "BUY" else self.tick
+            # Takers only sweep the touch: cap at one tick through the fair value
+            price = min(price, self.fair + self.tick) if side == "BUY" else max(price, self.fair - self.tick)
+            self.engine.place(self.token_id, side, round(price, 6), round(size, 2), "FAK", "taker-flow")
@@ -0,0 +1,607 @@
+"""
+Mock Polymarket
+Local stand-in for the CLOB REST/websocket API, Gamma /markets and Data API
+/positions, backed by the in-process matching engine and synthetic markets.
+Used for load testing and benchmarks without real money or rate limits.
+
+    python mock_polymarket.py --markets 50000 --latency-ms 20 --error-rate 0.01
+
+Point the services at it with POLYMARKET_MOCK_URL=http://127.0.0.1:9000.
+"""
+
+import json
+import time
+import base64
+import random
+import asyncio
+import hashlib
+import logging
+import argparse
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse
+
+from matching_engine import MatchingEngine, LiquiditySimulator
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("mock-polymarket")
+
+END_CURSOR = "LTE="
+USDC_DECIMALS = 1e6
+SIM_TICK = 0.1  # seconds between liquidity simulator steps
+SIM_TOKENS_PER_TICK = 200  # active books stepped per tick
+
+_WORDS = (
+    "bitcoin ethereum solana fed rate cut inflation recession election senate house "
+    "governor president nba nfl mlb champions league finals oscars grammys spacex tesla "
+    "openai apple nvidia gdp unemployment ceasefire treaty summit tariff approval rating"
+).split()
+
+
+# ─── Synthetic markets ───────────────────────────────────────────────────────
+def generate_markets(count: int, outcomes_per_event: int = 4, neg_risk_share: float = 0.3, seed: int = 7) -> list:
+    """Gamma-shaped market payloads. A share of events are neg-risk groups
+    whose outcome YES prices sum to ~1; the rest hold one binary market."""
+    rng = random.Random(seed)
+    markets = []
+    event_no = 0
+    now = time.time()
+    while len(markets) < count:
+        event_no += 1
+        neg_risk = rng.random() < neg_risk_share
+        members = min(outcomes_per_event if neg_risk else 1, count - len(markets))
+        weights = [rng.random() + 0.05 for _ in range(members)]
+        total = sum(weights)
+        topic = " ".join(rng.sample(_WORDS, 3))
+        tags = [{"id": str(i), "slug": t, "label": t.title()} for i, t in enumerate(rng.sample(("politics", "crypto", "sports", "economy", "tech", "culture"), 2))]
+        event = {"id": str(event_no), "slug": f"event-{event_no}", "title": f"{topic.title()} event {event_no}", "negRisk": neg_risk, "tags": tags}
+        for j in range(members):
+            n = len(markets)
+            yes = weights[j] / total if neg_risk else rng.uniform(0.05, 0.95)
+            yes = round(min(0.97, max(0.03, yes)), 2)
+            token_yes = str(int(hashlib.sha256(f"{seed}-{n}-yes".encode()).hexdigest()[:30], 16))
+            token_no = str(int(hashlib.sha256(f"{seed}-{n}-no".encode()).hexdigest()[:30], 16))
+            question = f"Will {topic} outcome {j + 1} happen by {2026 + n % 3}?"
+            markets.append({
+                "id": str(n + 1),
+                "question": question,
+                "conditionId": "0x" + hashlib.sha256(f"{seed}-{n}".encode()).hexdigest(),
+                "slug": f"market-{n + 1}",
+                "endDate": "2027-12-31T00:00:00Z",
+                "outcomes": json.dumps(["Yes", "No"]),
+                "outcomePrices": json.dumps([str(yes), str(round(1 - yes, 2))]),
+                "clobTokenIds": json.dumps([token_yes, token_no]),
+                "volumeNum": round(rng.paretovariate(1.2) * 1000, 2),
+                "volume24hr": round(rng.paretovariate(1.2) * 100, 2),
+                "liquidityNum": round(rng.uniform(100, 50000), 2),
+                "bestBid": round(yes - 0.01, 2),
+                "bestAsk": round(yes + 0.01, 2),
+                "active": True,
+                "closed": False,
+                "negRisk": neg_risk,
+                "orderPriceMinTickSize": 0.01,
+                "orderMinSize": 5,
+                "takerBaseFee": 0,
+                "makerBaseFee": 0,
+                "updatedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now - rng.uniform(0, 86400))),
+                "events": [event],
+            })
+    return markets
+
+
+# ─── Exchange state ──────────────────────────────────────────────────────────
+class MockExchange:
+    def __init__(self, markets: list, seed: int = 7):
+        self.engine = MatchingEngine()
+        self.markets = markets
+        self.by_condition = {m["conditionId"]: m for m in markets}
+        self.by_event: dict = {}  # event id -> member markets
+        for m in markets:
+            for e in m["events"]:
+                self.by_event.setdefault(e["id"], []).append(m)
+        self.tokens: dict = {}  # token_id -> (market, outcome index, fair)
+        for m in markets:
+            prices = json.loads(m["outcomePrices"])
+            for i, token_id in enumerate(json.loads(m["clobTokenIds"])):
+                self.tokens[token_id] = (m, i, float(prices[i]))
+        self.simulators: dict = {}
+        self.accounts: dict = {}  # address -> api creds
+        self.positions: dict = {}  # address -> token_id -> [size, cost, realized]
+        self.trades: dict = {}  # address -> [trade dicts]
+        self.order_trades: dict = {}  # order id -> trade ids, for /data/order associate_trades
+        self.rng = random.Random(seed)
+        self.latency = 0.0
+        self.jitter = 0.0
+        self.error_rate = 0.0
+        self.engine.listeners.append(self._record_fills)
+
+    def book(self, token_id: str):
+        """Materialize a token's book on first use so 50k+ markets stay cheap."""
+        if token_id not in self.tokens:
+            raise HTTPException(status_code=404, detail="No orderbook exists for the requested token id")
+        if token_id not in self.simulators:
+            _, _, fair = self.tokens[token_id]
+            sim = LiquiditySimulator(self.engine, token_id, fair=fair, seed=self.rng.randrange(1 << 30))
+            sim.seed()
+            self.simulators[token_id] = sim
+        return self.engine.book(token_id)
+
+    def step(self) -> None:
+        sims = list(self.simulators.values())
+        for sim in self.rng.sample(sims, min(len(sims), SIM_TOKENS_PER_TICK)):
+            sim.step()
+
+    def _record_fills(self, token_id: str, fills: list) -> None:
+        if not fills:
+            return
+        market, outcome_index, _ = self.tokens.get(token_id, ({}, 0, 0.5))
+        outcome = json.loads(market.get("outcomes", '["Yes","No"]'))[outcome_index] if market else ""
+        for f in fills:
+            maker_side = "SELL" if f.taker_side == "BUY" else "BUY"
+            maker_entry = {
+                "order_id": f.maker_order_id,
+                "owner": self.accounts.get(f.maker_owner, {}).get("apiKey", ""),
+                "maker_address": f.maker_owner,
+                "matched_amount": str(round(f.size, 6)),
+                "price": str(f.price),
+                "fee_rate_bps": "0",
+                "asset_id": token_id,
+                "outcome": outcome,
+                "side": maker_side,
+            }
+            for owner, side, role, order_id in ((f.taker_owner, f.taker_side, "TAKER", f.taker_order_id),
+                                                (f.maker_owner, maker_side, "MAKER", f.maker_order_id)):
+                if owner not in self.accounts:
+                    continue
+                # as on the CLOB, the top level describes the taker order and a
+                # maker's own side and amounts are in its maker_orders entry
+                self.trades.setdefault(owner, []).append({
+                    "id": f.fill_id,
+                    "taker_order_id": f.taker_order_id,
+                    "market": market.get("conditionId", ""),
+                    "asset_id": token_id,
+                    "side": f.taker_side,
+                    "size": str(round(f.size, 6)),
+                    "fee_rate_bps": "0",
+                    "price": str(f.price),
+                    "status": "MATCHED",
+                    "match_time": str(int(f.ts)),
+                    "last_update": str(int(f.ts)),
+                    "outcome": outcome,
+                    "owner": self.accounts[owner]["apiKey"],
+                    "maker_address": owner,
+                    "maker_orders": [maker_entry],
+                    "transaction_hash": "0x" + hashlib.sha256(f.fill_id.encode()).hexdigest(),
+                    "trader_side": role,
+                })
+                self.order_trades.setdefault(order_id, []).append(f.fill_id)
+                pos = self.positions.setdefault(owner, {}).setdefault(token_id, [0.0, 0.0, 0.0])
+                if side == "BUY":
+                    pos[0] += f.size
+                    pos[1] += f.size * f.price
+                elif pos[0] > 0:
+                    qty = min(f.size, pos[0])
+                    avg = pos[1] / pos[0]
+                    pos[2] += qty * (f.price - avg)
+                    pos[1] -= qty * avg
+                    pos[0] -= qty
+
+    def account(self, address: str) -> dict:
+        creds = self.accounts.get(address)
+        if creds is None:
+            digest = hashlib.sha256(address.lower().encode()).digest()
+            creds = self.accounts[address] = {
+                "apiKey": hashlib.md5(digest).hexdigest(),
+                "secret": base64.urlsafe_b64encode(digest).decode(),
+                "passphrase": digest.hex()[:16],
+            }
+        return creds
+
+    def mid(self, token_id: str) -> Optional[float]:
+        mid = self.book(token_id).midpoint()
+        return mid if mid is not None else self.tokens[token_id][2]
+
+
+def _address(request: Request) -> str:
+    return request.headers.get("POLY_ADDRESS", "anonymous")
+
+
+def _parse_order(order: dict) -> tuple:
+    """(token_id, side, price, size) from a signed order's amounts."""
+    maker = float(order["makerAmount"]) / USDC_DECIMALS
+    taker = float(order["takerAmount"]) / USDC_DECIMALS
+    side = order["side"] if isinstance(order["side"], str) else ("BUY" if order["side"] == 0 else "SELL")
+    if side == "BUY":
+        price, size = maker / taker, taker
+    else:
+        price, size = taker / maker, maker
+    return str(order["tokenId"]), side, round(price, 4), round(size, 6)
+
+
+# ─── Apps ────────────────────────────────────────────────────────────────────
+def create_app(exchange: MockExchange) -> FastAPI:
+    app = FastAPI(title="Mock Polymarket", version="1.0.0")
+    clob = FastAPI()
+    gamma = FastAPI()
+    data = FastAPI()
+
+    @app.middleware("http")
+    async def inject_faults(request: Request, call_next):
+        if request.url.path.startswith("/control"):
+            return await call_next(request)
+        delay = exchange.latency + exchange.rng.uniform(0, exchange.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if exchange.error_rate and exchange.rng.random() < exchange.error_rate:
+            status = exchange.rng.choice((429, 500, 503))
+            return JSONResponse({"error": "injected fault"}, status_code=status)
+        return await call_next(request)
+
+    @app.on_event("startup")
+    async def start_simulation():
+        async def loop():
+            while True:
+                exchange.step()
+                await asyncio.sleep(SIM_TICK)
+        asyncio.create_task(loop())
+
+    # ── control ──
+    @app.get("/control/config")
+    async def get_config():
+        return {
+            "latency_ms": exchange.latency * 1000,
+            "jitter_ms": exchange.jitter * 1000,
+            "error_rate": exchange.error_rate,
+            "markets": len(exchange.markets),
+            "books": len(exchange.simulators),
+            "orders": len(exchange.engine.orders),
+            "fills": len(exchange.engine.fills),
+        }
+
+    @app.post("/control/config")
+    async def set_config(body: dict):
+        if "latency_ms" in body:
+            exchange.latency = float(body["latency_ms"]) / 1000
+        if "jitter_ms" in body:
+            exchange.jitter = float(body["jitter_ms"]) / 1000
+        if "error_rate" in body:
+            exchange.error_rate = float(body["error_rate"])
+        return await get_config()
+
+    # ── CLOB: auth & misc ──
+    @clob.get("/")
+    async def ok():
+        return "OK"
+
+    @clob.get("/time")
+    async def server_time():
+        return int(time.time())
+
+    @clob.post("/auth/api-key")
+    @clob.get("/auth/derive-api-key")
+    async def api_key(request: Request):
+        return exchange.account(_address(request))
+
+    # ── CLOB: market data ──
+    def _price(token_id: str, side: str) -> Optional[float]:
+        book = exchange.book(token_id)
+        return book.best_bid() if side.upper() == "BUY" else book.best_ask()
+
+    def _spread(token_id: str) -> Optional[float]:
+        book = exchange.book(token_id)
+        bid, ask = book.best_bid(), book.best_ask()
+        return round(ask - bid, 6) if bid is not None and ask is not None else None
+
+    @clob.get("/price")
+    async def price(token_id: str, side: str = "BUY"):
+        return {"price": str(_price(token_id, side))}
+
+    @clob.post("/prices")
+    async def prices(body: list[dict]):
+        out = {}
+        for p in body:
+            out.setdefault(p["token_id"], {})[p.get("side", "BUY").upper()] = str(_price(p["token_id"], p.get("side", "BUY")))
+        return out
+
+    @clob.get("/midpoint")
+    async def midpoint(token_id: str):
+        return {"mid": str(exchange.mid(token_id))}
+
+    @clob.post("/midpoints")
+    async def midpoints(body: list[dict]):
+        return {p["token_id"]: str(exchange.mid(p["token_id"])) for p in body}
+
+    @clob.get("/spread")
+    async def spread(token_id: str):
+        return {"spread": str(_spread(token_id))}
+
+    @clob.post("/spreads")
+    async def spreads(body: list[dict]):
+        return {p["token_id"]: str(_spread(p["token_id"])) for p in body}
+
+    def _book(token_id: str) -> dict:
+        exchange.book(token_id)
+        market, _, _ = exchange.tokens[token_id]
+        snap = exchange.engine.snapshot(token_id)
+        snap.update({
+            "market": market["conditionId"],
+            "min_order_size": str(market["orderMinSize"]),
+            "tick_size": str(market["orderPriceMinTickSize"]),
+            "neg_risk": market["negRisk"],
+            "hash": hashlib.sha1(json.dumps(snap, sort_keys=True).encode()).hexdigest(),
+        })
+        return snap
+
+    @clob.get("/book")
+    async def book(token_id: str):
+        return _book(token_id)
+
+    @clob.post("/books")
+    async def books(body: list[dict]):
+        return [_book(p["token_id"]) for p in body]
+
+    @clob.get("/last-trade-price")
+    async def last_trade_price(token_id: str):
+        last = exchange.book(token_id).last_trade_price
+        return {"price": str(last if last is not None else exchange.tokens[token_id][2]), "side": ""}
+
+    @clob.get("/tick-size")
+    async def tick_size(token_id: str):
+        exchange.book(token_id)
+        return {"minimum_tick_size": exchange.tokens[token_id][0]["orderPriceMinTickSize"]}
+
+    @clob.get("/neg-risk")
+    async def neg_risk(token_id: str):
+        exchange.book(token_id)
+        return {"neg_risk": exchange.tokens[token_id][0]["negRisk"]}
+
+    @clob.get("/fee-rate")
+    async def fee_rate(token_id: str):
+        exchange.book(token_id)
+        return {"base_fee": exchange.tokens[token_id][0]["takerBaseFee"]}
+
+    def _clob_market(m: dict) -> dict:
+        prices = json.loads(m["outcomePrices"])
+        return {
+            "condition_id": m["conditionId"],
+            "question": m["question"],
+            "market_slug": m["slug"],
+            "active": m["active"],
+            "closed": m["closed"],
+            "neg_risk": m["negRisk"],
+            "minimum_tick_size": m["orderPriceMinTickSize"],
+            "minimum_order_size": m["orderMinSize"],
+            "maker_base_fee": m["makerBaseFee"],
+            "taker_base_fee": m["takerBaseFee"],
+            "tokens": [
+                {"token_id": t, "outcome": o, "price": float(prices[i])}
+                for i, (t, o) in enumerate(zip(json.loads(m["clobTokenIds"]), json.loads(m["outcomes"])))
+            ],
+        }
+
+    @clob.get("/markets")
+    async def clob_markets(next_cursor: str = "MA=="):
+        offset = int(base64.b64decode(next_cursor).decode() or 0)
+        page = exchange.markets[offset:offset + 1000]
+        nxt = offset + len(page)
+        return {
+            "data": [_clob_market(m) for m in page],
+            "next_cursor": base64.b64encode(str(nxt).encode()).decode() if nxt < len(exchange.markets) else END_CURSOR,
+            "limit": 1000,
+            "count": len(page),
+        }
+
+    @clob.get("/markets/{condition_id}")
+    async def clob_market(condition_id: str):
+        m = exchange.by_condition.get(condition_id)
+        if m is None:
+            raise HTTPException(status_code=404, detail="market not found")
+        return _clob_market(m)
+
+    # ── CLOB: orders ──
+    def _post(body: dict, owner: str) -> dict:
+        token_id, side, px, size = _parse_order(body["order"])
+        exchange.book(token_id)
+        result = exchange.engine.place(token_id, side, px, size, str(body.get("orderType", "GTC")), owner)
+        result.pop("fills", None)
+        result.update({"errorMsg": "" if result["success"] else "order couldn't be fully filled", "transactionsHashes": []})
+        return result
+
+    @clob.post("/order")
+    async def post_order(request: Request, body: dict):
+        return _post(body, _address(request))
+
+    @clob.post("/orders")
+    async def post_orders(request: Request, body: list[dict]):
+        return [_post(b, _address(request)) for b in body]
+
+    def _cancel(order_ids: list, owner: str) -> dict:
+        canceled, not_canceled = [], {}
+        for order_id in order_ids:
+            order = exchange.engine.get_order(order_id)
+            if order is None or order.owner != owner:
+                not_canceled[order_id] = "order not found"
+            elif exchange.engine.cancel(order_id):
+                canceled.append(order_id)
+            else:
+                not_canceled[order_id] = "order can't be found - already canceled or matched"
+        return {"canceled": canceled, "not_canceled": not_canceled}
+
+    @clob.delete("/order")
+    async def cancel_order(request: Request):
+        body = await request.json()
+        return _cancel([body["orderID"]], _address(request))
+
+    @clob.delete("/orders")
+    async def cancel_orders(request: Request):
+        return _cancel(await request.json(), _address(request))
+
+    @clob.delete("/cancel-all")
+    async def cancel_all(request: Request):
+        return {"canceled": exchange.engine.cancel_all(_address(request)), "not_canceled": {}}
+
+    def _order_dict(order) -> dict:
+        d = order.to_dict()
+        d["market"] = exchange.tokens[order.token_id][0]["conditionId"]
+        d["status"] = order.status.upper()
+        d["order_type"] = "GTC"
+        d["associate_trades"] = exchange.order_trades.get(order.order_id, [])
+        return d
+
+    @clob.get("/data/orders")
+    async def open_orders(request: Request, next_cursor: str = "MA=="):
+        orders = [_order_dict(o) for o in exchange.engine.open_orders(_address(request))]
+        return {"data": orders, "next_cursor": END_CURSOR, "limit": len(orders), "count": len(orders)}
+
+    @clob.get("/data/order/{order_id}")
+    async def get_order(order_id: str):
+        order = exchange.engine.get_order(order_id)
+        if order is None:
+            raise HTTPException(status_code=404, detail="order not found")
+        return _order_dict(order)
+
+    @clob.get("/data/trades")
+    async def trades(request: Request, next_cursor: str = "MA==", id: Optional[str] = None,
+                     market: Optional[str] = None, asset_id: Optional[str] = None,
+                     after: Optional[int] = None, before: Optional[int] = None):
+        rows = exchange.trades.get(_address(request), [])
+        if id is not None:
+            rows = [t for t in rows if t["id"] == id]
+        if market is not None:
+            rows = [t for t in rows if t["market"] == market]
+        if asset_id is not None:
+            rows = [t for t in rows if t["asset_id"] == asset_id]
+        if after is not None:
+            rows = [t for t in rows if int(t["match_time"]) >= after]
+        if before is not None:
+            rows = [t for t in rows if int(t["match_time"]) <= before]
+        return {"data": rows, "next_cursor": END_CURSOR, "limit": len(rows), "count": len(rows)}
+
+    # ── CLOB: websocket market channel ──
+    @clob.websocket("/ws/market")
+    async def market_channel(ws: WebSocket):
+        await ws.accept()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=10000)
+        subscribed: set = set()
+
+        def on_change(token_id, fills):
+            if token_id in subscribed and not queue.full():
+                queue.put_nowait((token_id, fills))
+
+        exchange.engine.listeners.append(on_change)
+        try:
+            msg = json.loads(await ws.receive_text())
+            subscribed.update(msg.get("assets_ids", []))
+            await ws.send_text(json.dumps([dict(_book(t), event_type="book") for t in subscribed if t in exchange.tokens]))
+            while True:
+                token_id, fills = await queue.get()
+                events = [dict(_book(token_id), event_type="book")]
+                if fills:
+                    last = fills[-1]
+                    events.append({"event_type": "last_trade_price", "asset_id": token_id, "price": str(last.price),
+                                   "side": last.taker_side, "size": str(last.size), "timestamp": str(int(last.ts * 1000))})
+                await ws.send_text(json.dumps(events))
+        except WebSocketDisconnect:
+            pass
+        finally:
+            exchange.engine.listeners.remove(on_change)
+
+    # ── Gamma ──
+    @gamma.get("/markets")
+    async def gamma_markets(limit: int = Query(100, le=500), offset: int = 0, active: Optional[bool] = None,
+                            closed: Optional[bool] = None, order: Optional[str] = None, ascending: bool = True,
+                            include_tag: bool = False):
+        rows = exchange.markets
+        if active is not None:
+            rows = [m for m in rows if m["active"] == active]
+        if closed is not None:
+            rows = [m for m in rows if m["closed"] == closed]
+        if order in ("volume24hr", "volumeNum", "liquidityNum", "updatedAt"):
+            rows = sorted(rows, key=lambda m: m[order], reverse=not ascending)
+        page = rows[offset:offset + limit]
+        if not include_tag:
+            page = [dict(m, events=[{k: v for k, v in e.items() if k != "tags"} for e in m["events"]]) for m in page]
+        return page
+
+    @gamma.get("/events")
+    async def gamma_events(id: Optional[list[str]] = Query(None), limit: int = Query(100, le=500), offset: int = 0):
+        """Events with every member market, closed ones included, as Gamma nests them."""
+        ids = id if id is not None else list(exchange.by_event)[offset:offset + limit]
+        out = []
+        for event_id in ids[:limit]:
+            members = exchange.by_event.get(event_id)
+            if members:
+                event = members[0]["events"][0]
+                out.append(dict(event, markets=[{k: v for k, v in m.items() if k != "events"} for m in members]))
+        return out
+
+    # ── Data API ──
+    def _positions(user: str, closed: bool) -> list:
+        out = []
+        for token_id, (size, cost, realized) in exchange.positions.get(user, {}).items():
+            if (size > 1e-9) == closed:
+                continue
+            market, index, _ = exchange.tokens[token_id]
+            cur = exchange.mid(token_id)
+            avg = cost / size if size > 1e-9 else 0.0
+            out.append({
+                "proxyWallet": user,
+                "asset": token_id,
+                "conditionId": market["conditionId"],
+                "size": round(size, 6),
+                "avgPrice": round(avg, 6),
+                "initialValue": round(cost, 6),
+                "currentValue": round(size * cur, 6),
+                "cashPnl": round(size * cur - cost, 6),
+                "percentPnl": round((size * cur - cost) / cost * 100, 4) if cost else 0.0,
+                "realizedPnl": round(realized, 6),
+                "curPrice": cur,
+                "redeemable": False,
+                "title": market["question"],
+                "slug": market["slug"],
+                "eventSlug": market["events"][0]["slug"],
+                "outcome": json.loads(market["outcomes"])[index],
+                "outcomeIndex": index,
+                "endDate": market["endDate"],
+                "negativeRisk": market["negRisk"],
+            })
+        return out
+
+    @data.get("/positions")
+    async def positions(user: str):
+        return _positions(user, closed=False)
+
+    @data.get("/closed-positions")
+    async def closed_positions(user: str):
+        return _positions(user, closed=True)
+
+    app.mount("/clob", clob)
+    app.mount("/gamma", gamma)
+    app.mount("/data", data)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of the Polymarket CLOB, Gamma and Data APIs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--markets", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    exchange = MockExchange(generate_markets(args.markets, seed=args.seed), seed=args.seed)
+    exchange.latency = args.latency_ms / 1000
+    exchange.jitter = args.jitter_ms / 1000
+    exchange.error_rate = args.error_rate
+    logger.info(f"Mock Polymarket with {len(exchange.markets)} markets on http://{args.host}:{args.port}")
+
+    import uvicorn
+    uvicorn.run(create_app(exchange), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Paper Trading
+Shadow execution for agents in paper mode. An order is held for a modelled
+submission latency, then filled against the live book as it stands at that
+moment: taker orders walk the levels up to their limit, resting remainders
+fill at their own price against opposite size that shows up at or through
+it after they rest, and every fill pays the market's fee rate. The live book is never consumed, so any number
+of shadow agents can trade the same market side by side.
+"""
+
+import time
+import heapq
+import random
+import logging
+import itertools
+from typing import Optional
+
+logger = logging.getLogger("sovrana-api")
+
+LATENCY = 0.25  # seconds from submit until a paper order reaches the book
+LATENCY_JITTER = 0.10  # mean of the exponential delay added on top
+ORDER_HISTORY = 200_000  # finished orders are pruned, oldest first, past this many
+SIZE_EPSILON = 1e-9
+
+
+def fee_for(price: float, size: float, fee_rate_bps: int) -> float:
+    """Polymarket fee curve: the base rate scaled by min(p, 1 - p) per share."""
+    return fee_rate_bps / 1e4 * min(price, 1 - price) * size
+
+
+class PaperOrder:
+    __slots__ = ("order_id", "agent_id", "token_id", "side", "price", "size", "order_type", "fee_rate_bps",
+                 "source", "filled", "notional", "fees", "status", "submitted_at", "due_at", "completed_at", "seen")
+
+    def __init__(self, order_id: str, agent_id: Optional[str], token_id: str, side: str, price: float, size: float,
+                 order_type: str, fee_rate_bps: int, source: str, submitted_at: float, due_at: float):
+        self.order_id = order_id
+        self.agent_id = agent_id
+        self.token_id = token_id
+        self.side = side
+        self.price = price
+        self.size = size
+        self.order_type = order_type
+        self.fee_rate_bps = fee_rate_bps
+        self.source = source
+        self.filled = 0.0
+        self.notional = 0.0
+        self.fees = 0.0
+        self.status = "delayed"  # -> live (resting), matched, unmatched, canceled
+        self.submitted_at = submitted_at
+        self.due_at = due_at
+        self.completed_at: Optional[float] = None
+        self.seen: dict = {}  # crossing opposite level price -> size already filled against or passed over
+
+    @property
+    def remaining(self) -> float:
+        return self.size - self.filled
+
+    @property
+    def open(self) -> bool:
+        return self.status in ("delayed", "live")
+
+    def result(self) -> dict:
+        """post_order-shaped response, so callers treat paper and live alike."""
+        cash = round(self.notional, 6)
+        return {
+            "success": self.status != "unmatched",
+            "orderID": self.order_id,
+            "status": self.status,
+            "makingAmount": str(cash if self.side == "BUY" else round(self.filled, 6)),
+            "takingAmount": str(round(self.filled, 6) if self.side == "BUY" else cash),
+            "paper": True,
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.order_id,
+            "agent_id": self.agent_id,
+            "asset_id": self.token_id,
+            "side": self.side,
+            "price": self.price,
+            "original_size": self.size,
+            "order_type": self.order_type,
+            "size_matched": round(self.filled, 6),
+            "avg_price": round(self.notional / self.filled, 6) if self.filled else None,
+            "fees": round(self.fees, 6),
+            "status": self.status,
+            "source": self.source,
+            "submitted_at": self.submitted_at,
+            "completed_at": self.completed_at,
+            "paper": True,
+        }
+
+
+class PaperExchange:
+    """Simulated fills for shadow agents. Call process() with fresh books for
+    tokens(); listeners are called with (order, fill) for every fill and
+    with (order, None) when an order finishes without one. Fills use the
+    main.fill_listeners shape plus "fee", "liquidity" ("taker" on arrival,
+    "maker" once resting) and "paper": True."""
+
+    def __init__(self, latency: float = LATENCY, jitter: float = LATENCY_JITTER, seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.orders: dict = {}
+        self.listeners: list = []
+        self.fill_count = 0
+        self._arrivals: list = []  # heap of (due_at, seq, order)
+        self._resting: dict = {}  # token_id -> [order]
+        self._ids = itertools.count(1)
+        self._rng = random.Random(seed)
+
+    def submit(self, token_id: str, side: str, price: float, size: float, order_type: str = "GTC",
+               agent_id: Optional[str] = None, fee_rate_bps: int = 0, source: str = "agent",
+               now: Optional[float] = None) -> dict:
+        now = time.time() if now is None else now
+        seq = next(self._ids)
+        delay = self.latency + (self._rng.expovariate(1 / self.jitter) if self.jitter > 0 else 0.0)
+        order = PaperOrder(f"paper-{seq:010d}", agent_id, token_id, side.upper(), price, size,
+                           order_type.upper(), fee_rate_bps, source, now, now + delay)
+        self.orders[order.order_id] = order
+        if len(self.orders) > ORDER_HISTORY:
+            self._prune()
+        heapq.heappush(self._arrivals, (order.due_at, seq, order))
+        return order.result()
+
+    def cancel(self, order_id: str, now: Optional[float] = None) -> bool:
+        order = self.orders.get(order_id)
+        if order is None or not order.open:
+            return False
+        order.status = "canceled"
+        order.completed_at = time.time() if now is None else now
+        return True
+
+    def cancel_agent(self, agent_id: str) -> list:
+        return [o.order_id for o in list(self.orders.values()) if o.agent_id == agent_id and self.cancel(o.order_id)]
+
+    def get_order(self, order_id: str) -> Optional[PaperOrder]:
+        return self.orders.get(order_id)
+
+    def open_orders(self, agent_id: Optional[str] = None) -> list:
+        return [o for o in self.orders.values() if o.open and (agent_id is None or o.agent_id == agent_id)]
+
+    def tokens(self) -> list:
+        """Tokens whose book the next process() call needs."""
+        return list(dict.fromkeys([o.token_id for _, _, o in self._arrivals] + list(self._resting)))
+
+    def process(self, books: dict, now: Optional[float] = None) -> list:
+        """Advance the simulation to `now`. `books` maps token_id to
+        (bids, asks), each a list of (price, size) best first; tokens
+        missing from it are treated as having an empty book."""
+        now = time.time() if now is None else now
+        events = []
+        # Resting orders first, so a remainder that rests on arrival below is
+        # not filled twice against the liquidity it has just taken
+        for token_id in list(self._resting):
+            book = books.get(token_id)
+            orders = [o for o in self._resting[token_id] if o.status == "live"]
+            if book is not None:
+                for order in orders:
+                    self._cross_resting(order, book, now, events)
+                orders = [o for o in orders if o.status == "live"]
+            if orders:
+                self._resting[token_id] = orders
+            else:
+                del self._resting[token_id]
+        while self._arrivals and self._arrivals[0][0] <= now:
+            order = heapq.heappop(self._arrivals)[2]
+            if order.status == "delayed":
+                self._arrive(order, books.get(order.token_id), now, events)
+
+        for order, fill in events:
+            for listener in self.listeners:
+                try:
+                    listener(order, fill)
+                except Exception as e:
+                    logger.error(f"Paper fill listener failed: {e}")
+        return [fill for _, fill in events if fill is not None]
+
+    def _prune(self) -> None:
+        excess = len(self.orders) - int(ORDER_HISTORY * 0.9)
+        stale = list(itertools.islice((i for i, o in self.orders.items() if not o.open), excess))
+        for order_id in stale:
+            del self.orders[order_id]
+
+    # ── matching ──
+    def _arrive(self, order: PaperOrder, book: Optional[tuple], now: float, events: list) -> None:
+        levels = (book[1] if order.side == "BUY" else book[0]) if book else ()
+        crossing = list(itertools.takewhile(lambda lv: self._crosses(order, lv[0]), levels))
+        if order.order_type == "FOK" and sum(s for _, s in crossing) + SIZE_EPSILON < order.size:
+            self._finish(order, "unmatched", now, events)
+            return
+        qty, cash = 0.0, 0.0
+        for price, size in crossing:
+            take = min(size, order.remaining - qty)
+            qty += take
+            cash += take * price
+            if order.remaining - qty <= SIZE_EPSILON:
+                break
+        if qty > SIZE_EPSILON:
+            events.append((order, self._fill(order, cash / qty, qty, now, "taker")))
+        order.seen = dict(crossing)
+        if order.remaining <= SIZE_EPSILON:
+            self._finish(order, "matched", now, events)
+        elif order.order_type in ("FAK", "FOK"):
+            self._finish(order, "matched" if order.filled else "unmatched", now, events)
+        else:
+            order.status = "live"
+            self._resting.setdefault(order.token_id, []).append(order)
+
+    def _cross_resting(self, order: PaperOrder, book: tuple, now: float, events: list) -> None:
+        """A resting order fills at its own price against opposite liquidity
+        that has moved through it since the last book: crossing levels that
+        are new or have grown. Size it has already filled against or seen
+        rest there is not taken again on the next tick."""
+        levels = book[1] if order.side == "BUY" else book[0]
+        crossing = dict(itertools.takewhile(lambda lv: self._crosses(order, lv[0]), levels))
+        available = sum(max(0.0, size - order.seen.get(price, 0.0)) for price, size in crossing.items())
+        order.seen = crossing
+        qty = min(available, order.remaining)
+        if qty <= SIZE_EPSILON:
+            return
+        events.append((order, self._fill(order, order.price, qty, now, "maker")))
+        if order.remaining <= SIZE_EPSILON:
+            self._finish(order, "matched", now, events)
+
+    @staticmethod
+    def _crosses(order: PaperOrder, price: float) -> bool:
+        return price <= order.price + SIZE_EPSILON if order.side == "BUY" else price >= order.price - SIZE_EPSILON
+
+    def _fill(self, order: PaperOrder, price: float, size: float, now: float, liquidity: str) -> dict:
+        fee = fee_for(price, size, order.fee_rate_bps)
+        order.filled += size
+        order.notional += size * price
+        order.fees += fee
+        self.fill_count += 1
+        return {
+            "order_id": order.order_id,
+            "token_id": order.token_id,
+            "side": order.side,
+            "price": price,
+            "size": size,
+            "fee": fee,
+            "liquidity": liquidity,
+            "agent_id": order.agent_id,
+            "ts": now,
+            "paper": True,
+        }
+
+    def _finish(self, order: PaperOrder, status: str, now: float, events: list) -> None:
+        order.status = status
+        order.completed_at = now
+        if not order.filled:
+            events.append((order, None))
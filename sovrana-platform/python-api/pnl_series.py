@@ -0,0 +1,424 @@
+"""
+PnL Series
+Cumulative realized and unrealized PnL for the wallet, each market and each
+agent, kept as time series at 1m / 1h / 1d resolution. Built once from the
+trade history, then maintained incrementally from fills and price marks.
+Chart queries are downsampled (LTTB or min/max) to a point budget.
+"""
+
+import time
+import bisect
+import logging
+import threading
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger("sovrana-api")
+
+RESOLUTIONS = {"1m": 60, "1h": 3600, "1d": 86400}
+RETENTION = {"1m": 7 * 1440, "1h": 180 * 24, "1d": None}  # buckets kept per series
+SCOPES = ("wallet", "market", "agent", "paper")
+DEFAULT_POINTS = 500
+MAX_POINTS = 5000
+OVERSAMPLE = 20  # a resolution is usable while range/resolution <= points * OVERSAMPLE
+DUST = 1e-9
+SEEN_SECONDS = 3600  # trade ids remembered below the watermark; catch-ups re-deliver from its second
+
+
+def _float(value, default: float = 0.0) -> float:
+    try:
+        return float(value) if value not in (None, "") else default
+    except (TypeError, ValueError):
+        return default
+
+
+def our_side(t: dict, address: str) -> tuple:
+    """(side, price, size, maker entries) of our part of a CLOB trade. Maker
+    fills carry our side and amounts in maker_orders, not at the top level;
+    the entries are empty for taker fills."""
+    if str(t.get("trader_side", "")).upper() == "MAKER" and t.get("maker_orders"):
+        mine = [m for m in t["maker_orders"] if str(m.get("maker_address", "")).lower() == address] or t["maker_orders"][:1]
+        size = sum(_float(m.get("matched_amount")) for m in mine)
+        if size > DUST:
+            price = sum(_float(m.get("price")) * _float(m.get("matched_amount")) for m in mine) / size
+            return str(mine[0].get("side", t.get("side", ""))).upper(), price, size, mine
+    return str(t.get("side", "")).upper(), _float(t.get("price")), _float(t.get("size")), []
+
+
+# ─── Downsampling ────────────────────────────────────────────────────────────
+def lttb(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices of `points` samples that keep
+    the visual shape of (x, y). First and last samples are always kept."""
+    n = len(x)
+    if points >= n or points < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    out = np.empty(points, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], max(edges[i + 1], edges[i] + 1)
+        nlo, nhi = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[nlo:nhi].mean() if nhi > nlo else x[-1]
+        avg_y = y[nlo:nhi].mean() if nhi > nlo else y[-1]
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+
+def minmax(y: np.ndarray, points: int) -> np.ndarray:
+    """Indices of the min and max sample in each of (points - 2) / 2 equal
+    buckets, plus the first and last sample: never more than `points`."""
+    n = len(y)
+    if points >= n or points < 4:
+        return np.arange(n)
+    starts = np.linspace(0, n, (points - 2) // 2, endpoint=False).astype(np.int64)
+    lengths = np.diff(np.append(starts, n))
+    owner = np.repeat(np.arange(len(starts)), lengths)
+    order = np.lexsort((y, owner))  # by bucket, then value
+    ends = np.cumsum(lengths)
+    lows = order[ends - lengths]
+    highs = order[ends - 1]
+    return np.unique(np.concatenate(([0, n - 1], lows, highs)))
+
+
+DOWNSAMPLERS = ("lttb", "minmax")
+
+
+# ─── Series storage ──────────────────────────────────────────────────────────
+class Series:
+    """Bucketed (t, realized, unrealized) samples at one resolution; each
+    bucket holds the last value seen inside it."""
+
+    __slots__ = ("step", "retention", "t", "realized", "unrealized")
+
+    def __init__(self, step: int, retention: Optional[int]):
+        self.step = step
+        self.retention = retention
+        self.t: list = []
+        self.realized: list = []
+        self.unrealized: list = []
+
+    def record(self, ts: float, realized: float, unrealized: float) -> None:
+        bucket = int(ts // self.step) * self.step
+        if self.t and self.t[-1] == bucket:
+            self.realized[-1] = realized
+            self.unrealized[-1] = unrealized
+            return
+        if self.t and bucket < self.t[-1]:
+            return  # late sample for a closed bucket; the next one supersedes it
+        self.t.append(bucket)
+        self.realized.append(realized)
+        self.unrealized.append(unrealized)
+        if self.retention and len(self.t) > self.retention * 5 // 4:
+            cut = len(self.t) - self.retention
+            del self.t[:cut], self.realized[:cut], self.unrealized[:cut]
+
+    def covers(self, start: float) -> bool:
+        return not self.t or self.retention is None or len(self.t) < self.retention or self.t[0] <= start
+
+    def window(self, start: float, end: float) -> tuple:
+        i = bisect.bisect_left(self.t, int(start // self.step) * self.step)
+        j = bisect.bisect_right(self.t, end)
+        return (np.array(self.t[i:j], dtype=np.float64),
+                np.array(self.realized[i:j], dtype=np.float64),
+                np.array(self.unrealized[i:j], dtype=np.float64))
+
+
+class _Ledger:
+    """Average-cost positions and cumulative PnL for one scope key."""
+
+    __slots__ = ("positions", "realized", "unrealized", "series")
+
+    def __init__(self):
+        self.positions: dict = {}  # token_id -> [size, avg, mark]
+        self.realized = 0.0
+        self.unrealized = 0.0
+        self.series = {name: Series(step, RETENTION[name]) for name, step in RESOLUTIONS.items()}
+
+    def fill(self, token_id: str, side: str, price: float, size: float) -> None:
+        pos = self.positions.get(token_id)
+        if pos is None:
+            pos = self.positions[token_id] = [0.0, 0.0, price]
+        held, avg, mark = pos
+        self.unrealized -= held * (mark - avg)
+        if side == "BUY":
+            total = held + size
+            pos[1] = (held * avg + size * price) / total if total > DUST else price
+            pos[0] = total
+        else:
+            qty = min(size, held)
+            self.realized += qty * (price - avg)
+            pos[0] = held - qty
+        pos[2] = price
+        if pos[0] <= DUST:
+            del self.positions[token_id]
+        else:
+            self.unrealized += pos[0] * (pos[2] - pos[1])
+
+    def mark(self, token_id: str, price: float) -> bool:
+        pos = self.positions.get(token_id)
+        if pos is None or pos[2] == price:
+            return False
+        self.unrealized += pos[0] * (price - pos[2])
+        pos[2] = price
+        return True
+
+    def record(self, ts: float) -> None:
+        for s in self.series.values():
+            s.record(ts, self.realized, self.unrealized)
+
+
+# ─── Engine ──────────────────────────────────────────────────────────────────
+class PnLSeriesEngine:
+    """Ledgers keyed by (scope, key). Fills update the wallet, their market
+    (by condition id) and, when attributed, their agent. Paper fills only
+    ever update their agent's "paper" ledger."""
+
+    def __init__(self, address: str = "", market_of=None):
+        self.address = (address or "").lower()
+        self.market_of = market_of  # token_id -> condition id, for live fills
+        self.built_at: Optional[float] = None
+        self.watermark = 0.0  # latest trade match_time ingested
+        self.order_agents: dict = {}  # order_id -> agent_id, for every accepted agent order
+        self._conditions: dict = {}  # token_id -> condition id, learned from the trade history
+        self._unmarketed: dict = {}  # order_id -> live-booked size not yet in a market ledger
+        self._ledgers: dict = {}
+        self._holders: dict = {}  # token_id -> set of ledger keys holding it
+        self._live: dict = {}  # order_id -> size already booked from post_order
+        self._seen: dict = {}  # trade id -> match time
+        self._seen_floor = 0.0  # trades older than this were forgotten by _seen and are not taken again
+        self._lock = threading.Lock()
+
+    def _ledger(self, scope: str, key: str) -> _Ledger:
+        ledger = self._ledgers.get((scope, key))
+        if ledger is None:
+            ledger = self._ledgers[(scope, key)] = _Ledger()
+        return ledger
+
+    def _apply(self, ts: float, token_id: str, side: str, price: float, size: float,
+               market: Optional[str], agent_id: Optional[str]) -> None:
+        keys = [("wallet", "")]
+        if market:
+            keys.append(("market", market))
+        if agent_id:
+            keys.append(("agent", agent_id))
+        self._book(ts, token_id, side, price, size, keys)
+        # same-token holders outside this fill's keys see the new last price
+        for key in self._holders.get(token_id, ()):
+            if key not in keys and self._ledgers[key].mark(token_id, price):
+                self._ledgers[key].record(ts)
+
+    def _book(self, ts: float, token_id: str, side: str, price: float, size: float, keys: list) -> None:
+        for key in keys:
+            ledger = self._ledger(*key)
+            ledger.fill(token_id, side, price, size)
+            ledger.record(ts)
+            holders = self._holders.setdefault(token_id, set())
+            if token_id in ledger.positions:
+                holders.add(key)
+            else:
+                holders.discard(key)
+
+    def _condition_of(self, token_id: str) -> Optional[str]:
+        market = self.market_of(token_id) if self.market_of else None
+        return market or self._conditions.get(token_id)
+
+    # ── Trade history ──
+    def register_order(self, order_id: str, agent_id: str) -> None:
+        """Attribute an accepted agent order, filled or resting, so its later
+        fills in the trade history reach the agent's ledger."""
+        with self._lock:
+            self.order_agents[order_id] = agent_id
+
+    def agent_for(self, t: dict) -> Optional[str]:
+        """Agent that placed our side of a CLOB trade, if one did."""
+        agent = self.order_agents.get(t.get("taker_order_id"))
+        if agent is None:
+            for m in t.get("maker_orders") or ():
+                agent = self.order_agents.get(m.get("order_id"))
+                if agent is not None:
+                    break
+        return agent
+
+    def ingest_trades(self, trades: list) -> int:
+        """Apply trade-history rows not seen yet, oldest first. Fills already
+        booked from a post_order response are skipped up to their size."""
+        applied = 0
+        with self._lock:
+            # filtered under the lock, so concurrent catch-ups cannot both book a trade
+            rows = sorted((t for t in trades if t.get("id") not in self._seen
+                           and _float(t.get("match_time")) >= self._seen_floor),
+                          key=lambda t: _float(t.get("match_time")))
+            for t in rows:
+                self._seen[t.get("id")] = _float(t.get("match_time"))
+                side, price, size, _ = our_side(t, self.address)
+                if size <= DUST or side not in ("BUY", "SELL"):
+                    continue
+                # only taker fills can have been booked from a post_order response
+                maker = str(t.get("trader_side", "")).upper() == "MAKER"
+                order_id = None if maker else t.get("taker_order_id")
+                token_id = str(t.get("asset_id", ""))
+                if t.get("market"):
+                    self._conditions[token_id] = t["market"]
+                market = t.get("market") or self._condition_of(token_id)
+                ts = _float(t.get("match_time")) or time.time()
+                booked = self._live.get(order_id, 0.0)
+                if booked > DUST:
+                    skip = min(booked, size)
+                    self._live[order_id] = booked - skip
+                    size -= skip
+                    # a live fill whose market was unknown then is booked to it now
+                    late = min(self._unmarketed.get(order_id, 0.0), skip)
+                    if late > DUST and market:
+                        self._unmarketed[order_id] -= late
+                        self._book(ts, token_id, side, price, late, [("market", market)])
+                    if size <= DUST:
+                        continue
+                self._apply(ts, token_id, side, price, size, market, self.agent_for(t))
+                self.watermark = max(self.watermark, ts)
+                applied += 1
+            self._prune_seen()
+        return applied
+
+    def _prune_seen(self) -> None:
+        """Forget trade ids well below the watermark, once a tenth of the window has passed."""
+        floor = self.watermark - SEEN_SECONDS
+        if floor - self._seen_floor < SEEN_SECONDS / 10:
+            return
+        self._seen = {i: ts for i, ts in self._seen.items() if ts >= floor}
+        self._seen_floor = floor
+
+    def build(self, trades: list) -> int:
+        """Rebuild every series from the complete trade history. Paper
+        ledgers have no trade history behind them and are kept."""
+        with self._lock:
+            self._ledgers = {k: v for k, v in self._ledgers.items() if k[0] == "paper"}
+            self._holders = {t: {k for k in keys if k[0] == "paper"} for t, keys in self._holders.items()}
+            self._live = {}
+            self._unmarketed = {}
+            self._seen = {}
+            self._seen_floor = 0.0
+            self.watermark = 0.0
+        applied = self.ingest_trades(trades)
+        self.built_at = time.time()
+        return applied
+
+    # ── Live updates ──
+    def on_fill(self, fill: dict) -> None:
+        """Fill listener for fills known before they reach the trade history."""
+        if fill.get("paper"):
+            self._on_paper_fill(fill)
+            return
+        with self._lock:
+            order_id = fill.get("order_id")
+            if order_id:
+                if fill.get("agent_id"):
+                    self.order_agents[order_id] = fill["agent_id"]
+                self._live[order_id] = self._live.get(order_id, 0.0) + fill["size"]
+            token_id = fill["token_id"]
+            market = self._condition_of(token_id)
+            if order_id and not market:
+                self._unmarketed[order_id] = self._unmarketed.get(order_id, 0.0) + fill["size"]
+            self._apply(fill.get("ts") or time.time(), token_id, fill["side"].upper(), fill["price"], fill["size"],
+                        market, fill.get("agent_id"))
+
+    def _on_paper_fill(self, fill: dict) -> None:
+        # fees are folded into the price so paper PnL is net of them
+        size = fill["size"]
+        side = fill["side"].upper()
+        fee_per_share = fill.get("fee", 0.0) / size if size > DUST else 0.0
+        price = fill["price"] + fee_per_share if side == "BUY" else fill["price"] - fee_per_share
+        with self._lock:
+            self._book(fill.get("ts") or time.time(), fill["token_id"], side, price, size,
+                       [("paper", fill.get("agent_id") or "")])
+
+    def mark(self, quotes: dict) -> None:
+        """Price listener: revalue every ledger holding a quoted token."""
+        now = time.time()
+        with self._lock:
+            touched = set()
+            for token_id, quote in quotes.items():
+                mid = getattr(quote, "mid", None) if quote is not None else None
+                if mid is None:
+                    continue
+                for key in self._holders.get(token_id, ()):
+                    if self._ledgers[key].mark(token_id, mid):
+                        touched.add(key)
+            for key in touched:
+                self._ledgers[key].record(now)
+
+    def tokens(self) -> list:
+        return [t for t, holders in self._holders.items() if holders]
+
+    # ── Queries ──
+    def keys(self, scope: str) -> list:
+        with self._lock:
+            return sorted(k for s, k in self._ledgers if s == scope)
+
+    def holdings(self, scope: str, key: str = "") -> dict:
+        """{token_id: (size, avg_price)} held by one ledger."""
+        with self._lock:
+            ledger = self._ledgers.get((scope, key))
+            return {t: (pos[0], pos[1]) for t, pos in ledger.positions.items()} if ledger is not None else {}
+
+    def current(self, scope: str, key: str = "") -> Optional[dict]:
+        with self._lock:
+            ledger = self._ledgers.get((scope, key))
+            if ledger is None:
+                return None
+            return {
+                "realized": round(ledger.realized, 6),
+                "unrealized": round(ledger.unrealized, 6),
+                "total": round(ledger.realized + ledger.unrealized, 6),
+                "open_positions": len(ledger.positions),
+            }
+
+    def series(self, scope: str, key: str = "", start: Optional[float] = None, end: Optional[float] = None,
+               points: int = DEFAULT_POINTS, method: str = "lttb", resolution: Optional[str] = None) -> Optional[dict]:
+        """Chart-ready series for [start, end]. Uses the finest resolution that
+        still covers `start` without oversampling the budget, then downsamples."""
+        if scope not in SCOPES:
+            raise ValueError(f"Unknown scope '{scope}', expected one of {', '.join(SCOPES)}")
+        if method not in DOWNSAMPLERS:
+            raise ValueError(f"Unknown downsampling method '{method}', expected one of {', '.join(DOWNSAMPLERS)}")
+        if resolution is not None and resolution not in RESOLUTIONS:
+            raise ValueError(f"Unknown resolution '{resolution}', expected one of {', '.join(RESOLUTIONS)}")
+        points = max(3, min(points, MAX_POINTS))
+        end = end if end is not None else time.time()
+        with self._lock:
+            ledger = self._ledgers.get((scope, key))
+            if ledger is None:
+                return None
+            if start is None:
+                first = ledger.series["1d"].t
+                start = first[0] if first else end
+            if resolution is None:
+                resolution = "1d"
+                for name, step in RESOLUTIONS.items():
+                    if ledger.series[name].covers(start) and (end - start) / step <= points * OVERSAMPLE:
+                        resolution = name
+                        break
+            t, realized, unrealized = ledger.series[resolution].window(start, end)
+        total = realized + unrealized
+        if method == "lttb":
+            idx = lttb(t, total, points)
+        else:
+            idx = minmax(total, points)
+        return {
+            "scope": scope,
+            "key": key,
+            "resolution": resolution,
+            "method": method,
+            "start": start,
+            "end": end,
+            "source_points": len(t),
+            "count": len(idx),
+            "t": t[idx].astype(np.int64).tolist(),
+            "realized": np.round(realized[idx], 6).tolist(),
+            "unrealized": np.round(unrealized[idx], 6).tolist(),
+            "total": np.round(total[idx], 6).tolist(),
+            "current": self.current(scope, key),
+        }
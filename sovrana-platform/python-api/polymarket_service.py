@@ -14,10 +14,16 @@ from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from py_clob_client.client import ClobClient
 
+from positions_service import PositionsBook
+
 # ─── Configuration ──────────────────────────────────────────────────────────
 
 PRIVATE_KEY = os.environ.get('POLYMARKET_PRIVATE_KEY', '0x7eb24f67779a00768c848f47e277e042e1859972825d56557208c3c69baca585')
-CLOB_HOST = 'https://clob.polymarket.com'
+# POLYMARKET_MOCK_URL points every upstream at a local mock_polymarket.py server
+MOCK_URL = os.environ.get('POLYMARKET_MOCK_URL', '').rstrip('/')
+CLOB_HOST = f'{MOCK_URL}/clob' if MOCK_URL else os.environ.get('CLOB_API_URL', 'https://clob.polymarket.com')
+GAMMA_HOST = f'{MOCK_URL}/gamma' if MOCK_URL else os.environ.get('GAMMA_API_URL', 'https://gamma-api.polymarket.com')
+DATA_HOST = f'{MOCK_URL}/data' if MOCK_URL else os.environ.get('DATA_API_URL', 'https://data-api.polymarket.com')
 CHAIN_ID = 137
 
 logging.basicConfig(level=logging.INFO)
@@ -144,22 +150,20 @@ def portfolio_orders():
 
 # ─── Positions ──────────────────────────────────────────────────────────────
 
+_positions: Optional[PositionsBook] = None
+
+def get_positions_book() -> PositionsBook:
+    global _positions
+    if _positions is None:
+        _positions = PositionsBook(DATA_HOST, get_client().get_address())
+    return _positions
+
 @app.get('/api/portfolio/positions')
 def portfolio_positions(closed: bool = Query(False)):
     try:
-        client = get_client()
-        addr = client.get_address()
-        
-        import requests
-        if closed:
-            url = f'https://data-api.polymarket.com/closed-positions?user={addr}'
-        else:
-            url = f'https://data-api.polymarket.com/positions?user={addr}'
-        
-        resp = requests.get(url, headers={'User-Agent': 'Sovrana/1.0'})
-        positions = resp.json() if resp.ok else []
-        pos_list = positions if isinstance(positions, list) else []
-        return {'positions': pos_list, 'count': len(pos_list)}
+        book = get_positions_book()
+        book.ensure_fresh()
+        return book.snapshot(closed)
     except Exception as e:
         logger.error(f'Error fetching positions: {e}')
         raise HTTPException(status_code=500, detail=str(e))
@@ -191,6 +195,7 @@ def place_order(order: dict):
         
         signed_order = client.create_order(order_args)
         result = client.post_order(signed_order, OrderType.GTC)
+        get_positions_book().apply_order_result(token_id, side, result)
         
         return {
             'success': True,
@@ -240,7 +245,7 @@ def get_markets(limit: int = Query(50)):
     try:
         import requests
         resp = requests.get(
-            f'https://gamma-api.polymarket.com/markets?limit={limit}&active=true&closed=false&order=volume24hr&ascending=false',
+            f'{GAMMA_HOST}/markets?limit={limit}&active=true&closed=false&order=volume24hr&ascending=false',
             headers={'User-Agent': 'Sovrana/1.0'}
         )
         markets = resp.json() if resp.ok else []
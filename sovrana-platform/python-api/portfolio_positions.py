@@ -5,12 +5,13 @@ from http.server import BaseHTTPRequestHandler
 from urllib.request import urlopen, Request
 
 def get_address():
-    from py_clob_client.client import ClobClient
-    host = "https://clob.polymarket.com"
-    chain_id = 137
-    key = os.environ.get("POLYMARKET_PRIVATE_KEY", "")
-    client = ClobClient(host, key=key, chain_id=chain_id)
-    return client.get_address()
+    """Wallet address from POLY_ADDRESS, else derived from the signing key.
+    No CLOB client (and no API-key round trip) is needed for a public read."""
+    address = os.environ.get("POLY_ADDRESS", "")
+    if address:
+        return address
+    from eth_account import Account
+    return Account.from_key(os.environ.get("POLYMARKET_PRIVATE_KEY", "")).address
 
 class handler(BaseHTTPRequestHandler):
     def do_GET(self):
@@ -18,7 +19,9 @@ class handler(BaseHTTPRequestHandler):
             address = get_address()
             
             # Fetch positions from the data API (public, no auth needed)
-            url = f"https://data-api.polymarket.com/positions?user={address}"
+            mock = os.environ.get("POLYMARKET_MOCK_URL", "").rstrip("/")
+            data_host = f"{mock}/data" if mock else os.environ.get("DATA_API_URL", "https://data-api.polymarket.com")
+            url = f"{data_host}/positions?user={address}"
             req = Request(url, headers={"User-Agent": "Mozilla/5.0"})
             resp = urlopen(req, timeout=15)
             positions = json.loads(resp.read().decode())
@@ -5,7 +5,8 @@ from http.server import BaseHTTPRequestHandler
 
 def get_client():
     from py_clob_client.client import ClobClient
-    host = "https://clob.polymarket.com"
+    mock = os.environ.get("POLYMARKET_MOCK_URL", "").rstrip("/")
+    host = f"{mock}/clob" if mock else os.environ.get("CLOB_API_URL", "https://clob.polymarket.com")
     chain_id = 137
     key = os.environ.get("POLYMARKET_PRIVATE_KEY", "")
     client = ClobClient(host, key=key, chain_id=chain_id)
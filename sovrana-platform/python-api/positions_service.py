@@ -0,0 +1,298 @@
+"""
+Positions Service
+In-memory open and closed positions for one wallet. The Data API snapshot is
+cached and refreshed on a TTL; our own fills are applied on top between
+refreshes, and open positions are re-marked to the latest midpoints in a single
+vectorized pass over columnar arrays.
+"""
+
+import json
+import time
+import logging
+import threading
+import urllib.request
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+import numpy as np
+
+logger = logging.getLogger("sovrana-api")
+
+SNAPSHOT_TTL = 30  # seconds before the Data API snapshot is considered stale
+HTTP_TIMEOUT = 15  # seconds per Data API request
+PAGE_LIMITS = {"positions": 500, "closed-positions": 50}  # Data API page caps
+MAX_PAGES = 40
+DUST = 1e-6  # shares below this count as a closed position
+SIZE_TOLERANCE = 1e-3  # shares; Data API sizes are rounded
+INDEX_LAG = 120  # seconds the Data API may take to show a fill
+JOURNAL_MAX_AGE = 600  # seconds an own fill is replayed over snapshots that never show it
+
+
+def _float(value, default: float = 0.0) -> float:
+    try:
+        return float(value) if value not in (None, "") else default
+    except (TypeError, ValueError):
+        return default
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts else None
+
+
+def fill_from_order_result(side: str, result) -> Optional[tuple]:
+    """(price, size) matched immediately by a post_order response, if any.
+    BUY orders make USDC and take shares; SELL orders the reverse."""
+    if not isinstance(result, dict):
+        return None
+    making = _float(result.get("makingAmount"))
+    taking = _float(result.get("takingAmount"))
+    shares, cash = (taking, making) if side.upper() == "BUY" else (making, taking)
+    if shares <= DUST:
+        return None
+    return cash / shares, shares
+
+
+class PositionsBook:
+    """Positions keyed by token_id. Rows keep the Data API field names; size,
+    avgPrice, realizedPnl and the valuation fields are maintained locally."""
+
+    def __init__(self, data_host: str, address: str, ttl: float = SNAPSHOT_TTL,
+                 describe: Optional[Callable[[str], dict]] = None):
+        self.data_host = data_host.rstrip("/")
+        self.address = address
+        self.ttl = ttl
+        self.describe = describe
+        self.snapshot_at: Optional[float] = None
+        self.marked_at: Optional[float] = None
+        self.version = 0
+        self._open: dict = {}
+        self._closed: dict = {}
+        self._pending: dict = {}  # token_id -> own fills, oldest first, the snapshot may not show yet
+        self._basis: dict = {}  # token_id -> snapshot size the pending fills were applied over
+        self._mids: dict = {}
+        self._mark_version = 0
+        self._columns = None
+        self._rendered: dict = {}
+        self._lock = threading.Lock()
+
+    @property
+    def stale(self) -> bool:
+        return self.snapshot_at is None or time.time() - self.snapshot_at > self.ttl
+
+    # ── Upstream ──
+    def _fetch(self, path: str) -> list:
+        """Every page of a Data API positions listing, deduplicated by asset."""
+        limit = PAGE_LIMITS[path]
+        rows = {}
+        for page in range(MAX_PAGES):
+            url = f"{self.data_host}/{path}?user={self.address}&limit={limit}&offset={page * limit}"
+            req = urllib.request.Request(url, headers={"User-Agent": "Sovrana/1.0"})
+            with urllib.request.urlopen(req, timeout=HTTP_TIMEOUT) as resp:
+                data = json.loads(resp.read().decode())
+            batch = data if isinstance(data, list) else []
+            before = len(rows)
+            for row in batch:
+                if row.get("asset"):
+                    rows[str(row["asset"])] = row
+            if len(batch) < limit or len(rows) == before:
+                break
+        return list(rows.values())
+
+    def refresh(self) -> int:
+        """Replace the snapshot from the Data API, then replay the own fills
+        it does not show yet. The Data API indexes fills with a lag, so one
+        that landed before the fetch may be missing and one that landed
+        during it may be present; see _reflected."""
+        open_rows = self._fetch("positions")
+        closed_rows = self._fetch("closed-positions")
+        with self._lock:
+            self._open = {str(r["asset"]): dict(r) for r in open_rows}
+            self._closed = {str(r["asset"]): dict(r) for r in closed_rows}
+            pending, basis = self._pending, self._basis
+            self._pending, self._basis = {}, {}
+            now = time.time()
+            for token_id, fills in pending.items():
+                row = self._open.get(token_id)
+                shown = _float(row.get("size")) if row is not None else 0.0
+                kept = fills[self._reflected(basis[token_id], shown, fills, now):]
+                kept = [f for f in kept if now - f[0] <= JOURNAL_MAX_AGE]
+                if kept:
+                    self._pending[token_id], self._basis[token_id] = kept, shown
+                    for _, side, price, size in kept:
+                        self._apply(token_id, side, price, size)
+            self.snapshot_at = time.time()
+            self._changed()
+        return len(self._open)
+
+    @staticmethod
+    def _reflected(base: float, shown: float, fills: list, now: float) -> int:
+        """How many pending fills, oldest first, a snapshot already includes:
+        the shortest prefix that takes the previous snapshot's size to the
+        new one. When no prefix does (the position also moved through trades
+        made elsewhere), fills older than the indexing lag count as shown."""
+        running = base
+        if abs(shown - running) <= SIZE_TOLERANCE:
+            return 0
+        for i, (_, side, _, size) in enumerate(fills):
+            running = running + size if side == "BUY" else max(0.0, running - size)
+            if abs(shown - running) <= SIZE_TOLERANCE:
+                return i + 1
+        return sum(1 for f in fills if now - f[0] > INDEX_LAG)
+
+    def ensure_fresh(self) -> None:
+        if self.stale:
+            self.refresh()
+
+    # ── Own fills ──
+    def apply_fill(self, token_id: str, side: str, price: float, size: float, ts: Optional[float] = None) -> None:
+        with self._lock:
+            if token_id not in self._pending:
+                row = self._open.get(token_id)
+                self._basis[token_id] = _float(row.get("size")) if row is not None else 0.0
+            self._pending.setdefault(token_id, []).append((ts or time.time(), side.upper(), price, size))
+            self._apply(token_id, side.upper(), price, size)
+            self._changed()
+
+    def on_fill(self, fill: dict) -> None:
+        """Fill listener (see main.fill_listeners). Paper fills hold no inventory."""
+        if fill.get("paper"):
+            return
+        self.apply_fill(fill["token_id"], fill["side"], fill["price"], fill["size"], fill.get("ts"))
+
+    def apply_order_result(self, token_id: str, side: str, result) -> None:
+        """Book whatever a post_order response matched immediately. Resting
+        orders that fill later show up with the next snapshot."""
+        fill = fill_from_order_result(side, result)
+        if fill is not None:
+            self.apply_fill(token_id, side, fill[0], fill[1])
+
+    def _apply(self, token_id: str, side: str, price: float, size: float) -> None:
+        row = self._open.get(token_id)
+        if row is None:
+            row = self._closed.pop(token_id, None) or self._new_row(token_id)
+            row["size"] = 0.0
+            row["avgPrice"] = 0.0
+            self._open[token_id] = row
+        held = _float(row.get("size"))
+        avg = _float(row.get("avgPrice"))
+        if side == "BUY":
+            total = held + size
+            row["avgPrice"] = (held * avg + size * price) / total if total > DUST else price
+            row["size"] = total
+        else:
+            qty = min(size, held)
+            row["realizedPnl"] = round(_float(row.get("realizedPnl")) + qty * (price - avg), 6)
+            row["size"] = held - qty
+            if row["size"] <= DUST:
+                row.update(size=0.0, currentValue=0.0, cashPnl=0.0, percentPnl=0.0)
+                self._closed[token_id] = self._open.pop(token_id)
+        row["initialValue"] = row["size"] * row["avgPrice"]
+
+    def _new_row(self, token_id: str) -> dict:
+        row = {"proxyWallet": self.address, "asset": token_id, "realizedPnl": 0.0, "curPrice": None}
+        if self.describe is not None:
+            try:
+                row.update(self.describe(token_id) or {})
+            except Exception as e:
+                logger.error(f"Position describe failed for {token_id}: {e}")
+        return row
+
+    # ── Marks ──
+    def mark(self, quotes: dict) -> None:
+        """Price listener: record midpoints for tokens we hold. Under the lock,
+        since refresh() swaps the columns from a worker thread."""
+        with self._lock:
+            columns = self._columns
+            touched = False
+            for token_id, quote in quotes.items():
+                mid = getattr(quote, "mid", None) if quote is not None else None
+                if mid is None or token_id not in self._open:
+                    continue
+                self._mids[token_id] = mid
+                if columns is not None:
+                    i = columns["index"].get(token_id)
+                    if i is not None:
+                        columns["mark"][i] = mid
+                touched = True
+            if touched:
+                self.marked_at = time.time()
+                self._mark_version += 1
+
+    def tokens(self) -> list:
+        with self._lock:
+            return list(self._open)
+
+    def holdings(self) -> dict:
+        """{token_id: (size, avg_price)} for every open position."""
+        with self._lock:
+            return {t: (_float(r.get("size")), _float(r.get("avgPrice"))) for t, r in self._open.items()}
+
+    # ── Valuation ──
+    def _changed(self) -> None:
+        self.version += 1
+        self._columns = None
+
+    def _build_columns(self) -> dict:
+        tokens = list(self._open)
+        rows = [self._open[t] for t in tokens]
+        n = len(tokens)
+        return {
+            "tokens": tokens,
+            "rows": rows,
+            "index": {t: i for i, t in enumerate(tokens)},
+            "size": np.fromiter((_float(r.get("size")) for r in rows), float, n),
+            "avg": np.fromiter((_float(r.get("avgPrice")) for r in rows), float, n),
+            "realized": np.fromiter((_float(r.get("realizedPnl")) for r in rows), float, n),
+            "snapshot_price": np.fromiter((_float(r.get("curPrice"), np.nan) for r in rows), float, n),
+            "mark": np.fromiter((self._mids.get(t, np.nan) for t in tokens), float, n),
+        }
+
+    def _value_open(self) -> tuple:
+        columns = self._columns
+        if columns is None:
+            columns = self._columns = self._build_columns()
+        size, avg = columns["size"], columns["avg"]
+        price = np.where(np.isnan(columns["mark"]), columns["snapshot_price"], columns["mark"])
+        price = np.where(np.isnan(price), avg, price)
+        value = size * price
+        cost = size * avg
+        pnl = value - cost
+        pct = np.divide(pnl, cost, out=np.zeros_like(pnl), where=cost > 0) * 100
+        rows = [
+            dict(row, size=s, avgPrice=a, curPrice=p, currentValue=v, initialValue=c, cashPnl=u, percentPnl=q)
+            for row, s, a, p, v, c, u, q in zip(
+                columns["rows"], size.tolist(), avg.tolist(), np.round(price, 6).tolist(),
+                np.round(value, 6).tolist(), np.round(cost, 6).tolist(), np.round(pnl, 6).tolist(),
+                np.round(pct, 4).tolist(),
+            )
+        ]
+        totals = {
+            "currentValue": round(float(value.sum()), 6),
+            "initialValue": round(float(cost.sum()), 6),
+            "cashPnl": round(float(pnl.sum()), 6),
+            "realizedPnl": round(float(columns["realized"].sum()), 6),
+        }
+        return rows, totals
+
+    def snapshot(self, closed: bool = False) -> dict:
+        """Positions from memory, with the snapshot and mark timestamps. The
+        rendered payload is reused until a fill, refresh or new mark."""
+        key = (self.version, self._mark_version)
+        cached = self._rendered.get(closed)
+        if cached is not None and cached[0] == key:
+            return dict(cached[1], stale=self.stale)
+        with self._lock:
+            if closed:
+                rows = list(self._closed.values())
+                totals = {"realizedPnl": round(sum(_float(r.get("realizedPnl")) for r in rows), 6)}
+            else:
+                rows, totals = self._value_open()
+        payload = {
+            "positions": rows,
+            "count": len(rows),
+            "totals": totals,
+            "as_of": _iso(self.snapshot_at),
+            "marked_at": _iso(self.marked_at) if not closed else None,
+        }
+        self._rendered[closed] = (key, payload)
+        return dict(payload, stale=self.stale)
@@ -0,0 +1,168 @@
+"""
+Price Batcher
+Bulk best-price / midpoint / spread lookups. Token requests from concurrent
+callers are coalesced over a short window, deduplicated, and fetched with the
+CLOB's bulk endpoints in chunked, concurrent calls.
+"""
+
+import time
+import asyncio
+import logging
+from typing import Optional
+
+from py_clob_client.clob_types import BookParams
+
+logger = logging.getLogger("sovrana-api")
+
+COALESCE_WINDOW = 0.005  # seconds to collect tokens before a batch fires
+CHUNK_SIZE = 250  # tokens per bulk request
+MAX_CONCURRENCY = 8  # chunk requests in flight per batch
+
+
+def _num(value) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+class Quote:
+    __slots__ = ("buy", "sell", "mid", "spread", "as_of")
+
+    def __init__(self, buy, sell, mid, spread, as_of: float):
+        self.buy = buy
+        self.sell = sell
+        self.mid = mid
+        self.spread = spread
+        self.as_of = as_of
+
+
+class PriceBatcher:
+    """Coalesces price lookups across callers. `latest` keeps the most recent
+    quote per token for consumers that only need a recent mark."""
+
+    def __init__(self, client, window: float = COALESCE_WINDOW, chunk_size: int = CHUNK_SIZE, max_concurrency: int = MAX_CONCURRENCY):
+        self.client = client
+        self.window = window
+        self.chunk_size = chunk_size
+        self.max_concurrency = max_concurrency
+        self.latest: dict = {}
+        self.listeners: list = []
+        self.upstream_requests = 0
+        self._pending: set = set()
+        self._pending_future: Optional[asyncio.Future] = None
+        self._inflight: dict = {}
+        self._flushes: set = set()  # strong refs, so pending flush tasks are not collected
+
+    async def get(self, token_ids: list) -> dict:
+        """Quotes for the given tokens, keyed by token_id (None if unpriced)."""
+        tokens = list(dict.fromkeys(t for t in token_ids if t))
+        waits = set()
+        for token_id in tokens:
+            future = self._inflight.get(token_id)
+            if future is None:
+                if self._pending_future is None:
+                    self._pending_future = asyncio.get_running_loop().create_future()
+                    task = asyncio.create_task(self._flush_after_window(self._pending_future))
+                    self._flushes.add(task)
+                    task.add_done_callback(self._flushes.discard)
+                future = self._pending_future
+                self._pending.add(token_id)
+                self._inflight[token_id] = future
+            waits.add(future)
+
+        merged = {}
+        for batch in await asyncio.gather(*waits):
+            merged.update(batch)
+        return {t: merged.get(t) for t in tokens}
+
+    async def _flush_after_window(self, future: asyncio.Future) -> None:
+        await asyncio.sleep(self.window)
+        tokens = list(self._pending)
+        self._pending = set()
+        self._pending_future = None
+        try:
+            quotes = await self._fetch(tokens)
+            future.set_result(quotes)
+        except Exception as e:
+            logger.error(f"Bulk price fetch failed for {len(tokens)} tokens: {e}")
+            future.set_exception(e)
+        finally:
+            for token_id in tokens:
+                if self._inflight.get(token_id) is future:
+                    del self._inflight[token_id]
+
+    async def _fetch(self, tokens: list) -> dict:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        client = self.client
+
+        async def run_chunk(chunk):
+            params = [BookParams(token_id=t) for t in chunk]
+            sided = [BookParams(token_id=t, side=side) for t in chunk for side in ("BUY", "SELL")]
+            try:
+                async with semaphore:
+                    self.upstream_requests += 3
+                    prices, mids, spreads = await asyncio.gather(
+                        asyncio.to_thread(client.get_prices, sided),
+                        asyncio.to_thread(client.get_midpoints, params),
+                        asyncio.to_thread(client.get_spreads, params),
+                    )
+            except Exception as e:
+                # one unknown or delisted token fails the whole bulk call:
+                # split the chunk until the bad tokens are isolated, so they
+                # come back unpriced instead of failing every batched caller
+                if len(chunk) == 1:
+                    logger.warning(f"Price fetch failed for token {chunk[0]}: {e}")
+                    return {chunk[0]: None}
+                half = len(chunk) // 2
+                merged = {}
+                for part in await asyncio.gather(run_chunk(chunk[:half]), run_chunk(chunk[half:])):
+                    merged.update(part)
+                return merged
+            return _merge(chunk, prices or {}, mids or {}, spreads or {})
+
+        chunks = [tokens[i:i + self.chunk_size] for i in range(0, len(tokens), self.chunk_size)]
+        quotes = {}
+        for part in await asyncio.gather(*(run_chunk(c) for c in chunks)):
+            quotes.update(part)
+        self.publish(quotes)
+        return quotes
+
+    def publish(self, quotes: dict) -> None:
+        """Record quotes as the latest marks and hand them to the listeners,
+        whether fetched here or read from elsewhere (the shared snapshot)."""
+        self.latest.update((t, q) for t, q in quotes.items() if q is not None)
+        for listener in self.listeners:
+            try:
+                listener(quotes)
+            except Exception as e:
+                logger.error(f"Price listener failed: {e}")
+
+
+def _merge(chunk: list, prices: dict, mids: dict, spreads: dict) -> dict:
+    now = time.time()
+    quotes = {}
+    for token_id in chunk:
+        sides = prices.get(token_id) or {}
+        quotes[token_id] = Quote(
+            _num(sides.get("BUY")),
+            _num(sides.get("SELL")),
+            _num(mids.get(token_id)),
+            _num(spreads.get(token_id)),
+            now,
+        )
+    return quotes
+
+
+def to_columns(token_ids: list, quotes: dict) -> dict:
+    """Columnar response body: one list per field, aligned with token_ids."""
+    rows = [quotes.get(t) for t in token_ids]
+    return {
+        "token_ids": token_ids,
+        "buy": [q.buy if q else None for q in rows],
+        "sell": [q.sell if q else None for q in rows],
+        "mid": [q.mid if q else None for q in rows],
+        "spread": [q.spread if q else None for q in rows],
+        "as_of": max((q.as_of for q in rows if q), default=None),
+        "count": len(token_ids),
+    }
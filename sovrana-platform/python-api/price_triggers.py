@@ -0,0 +1,338 @@
+"""
+Price Triggers
+Stop-loss and take-profit thresholds for agent positions. Each token keeps
+its armed thresholds in two sorted ladders, so a price update finds every
+crossed trigger with one bisect per ladder (O(log n + k)) instead of
+checking each position against the price.
+
+Positions are folded from submit-time fills and from the trade history, so
+agent orders that rest and fill later are protected too.
+"""
+
+import time
+import logging
+import itertools
+import threading
+from bisect import bisect_left, bisect_right
+from typing import Callable, Optional
+
+from pnl_series import our_side
+
+logger = logging.getLogger("sovrana-api")
+
+SIZE_EPSILON = 1e-9
+STOP_LOSS = "stop_loss"
+TAKE_PROFIT = "take_profit"
+SEEN_SECONDS = 3600  # trade ids remembered below the newest ingested trade
+
+
+def _float(value, default: float = 0.0) -> float:
+    try:
+        return float(value) if value not in (None, "") else default
+    except (TypeError, ValueError):
+        return default
+
+
+class Trigger:
+    __slots__ = ("id", "agent_id", "token_id", "kind", "threshold", "size", "entry_price", "armed_at", "fired_at", "fired_price")
+
+    def __init__(self, trigger_id: int, agent_id: str, token_id: str, kind: str, threshold: float, size: float, entry_price: float):
+        self.id = trigger_id
+        self.agent_id = agent_id
+        self.token_id = token_id
+        self.kind = kind
+        self.threshold = threshold
+        self.size = size
+        self.entry_price = entry_price
+        self.armed_at = time.time()
+        self.fired_at: Optional[float] = None
+        self.fired_price: Optional[float] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "agent_id": self.agent_id,
+            "token_id": self.token_id,
+            "kind": self.kind,
+            "threshold": round(self.threshold, 6),
+            "size": round(self.size, 6),
+            "entry_price": round(self.entry_price, 6),
+            "armed_at": self.armed_at,
+            "fired_at": self.fired_at,
+            "fired_price": self.fired_price,
+        }
+
+
+class _Ladder:
+    """Armed thresholds for one token. Positions are long outcome tokens, so
+    stops fire when the price falls to or below them and take-profits when
+    it rises to or above them. Prices and ids are kept as parallel sorted
+    lists; crossed triggers are always a contiguous run at one end."""
+
+    __slots__ = ("stop_prices", "stop_ids", "take_prices", "take_ids")
+
+    def __init__(self):
+        self.stop_prices: list = []
+        self.stop_ids: list = []
+        self.take_prices: list = []
+        self.take_ids: list = []
+
+    def __len__(self) -> int:
+        return len(self.stop_ids) + len(self.take_ids)
+
+    def add(self, trigger: Trigger) -> None:
+        prices, ids = self._side(trigger.kind)
+        i = bisect_right(prices, trigger.threshold)
+        prices.insert(i, trigger.threshold)
+        ids.insert(i, trigger.id)
+
+    def remove(self, trigger: Trigger) -> None:
+        prices, ids = self._side(trigger.kind)
+        i = bisect_left(prices, trigger.threshold)
+        while i < len(ids) and prices[i] == trigger.threshold:
+            if ids[i] == trigger.id:
+                del prices[i], ids[i]
+                return
+            i += 1
+
+    def pop_crossed(self, price: float) -> list:
+        """Remove and return the ids of every trigger `price` has crossed."""
+        i = bisect_left(self.stop_prices, price)
+        crossed = self.stop_ids[i:]
+        del self.stop_prices[i:], self.stop_ids[i:]
+        j = bisect_right(self.take_prices, price)
+        if j:
+            crossed += self.take_ids[:j]
+            del self.take_prices[:j], self.take_ids[:j]
+        return crossed
+
+    def _side(self, kind: str) -> tuple:
+        return (self.stop_prices, self.stop_ids) if kind == STOP_LOSS else (self.take_prices, self.take_ids)
+
+
+class _Position:
+    __slots__ = ("size", "cost", "trigger_ids")
+
+    def __init__(self):
+        self.size = 0.0
+        self.cost = 0.0
+        self.trigger_ids: tuple = ()
+
+    @property
+    def entry_price(self) -> float:
+        return self.cost / self.size if self.size > SIZE_EPSILON else 0.0
+
+
+class TriggerEngine:
+    """Tracks each agent's position per token from its fills and keeps a
+    stop-loss / take-profit pair armed around the average entry price. The
+    pair is one-cancels-other: when either side fires both are disarmed
+    and the fired trigger is handed to `listeners` to act on.
+
+    `limits(agent_id)` returns the agent's (stop_loss_pct, take_profit_pct),
+    or None for fills that should not be protected. `agent_of(trade)` names
+    the agent behind our side of a trade-history row.
+
+    Fills arrive on worker threads while prices arrive on the event loop,
+    so state is only touched under the lock; listeners run outside it."""
+
+    def __init__(self, limits: Callable[[str], Optional[tuple]], address: str = "",
+                 agent_of: Optional[Callable[[dict], Optional[str]]] = None):
+        self.limits = limits
+        self.address = address.lower()
+        self.agent_of = agent_of
+        self.triggers: dict = {}
+        self.listeners: list = []
+        self.fired_count = 0
+        self._ladders: dict = {}
+        self._positions: dict = {}
+        self._ids = itertools.count(1)
+        self._live: dict = {}  # order_id -> size already folded from on_fill
+        self._seen: dict = {}  # trade id -> match time
+        self._seen_floor = 0.0  # trades older than this were forgotten by _seen and are not taken again
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.triggers)
+
+    # ── positions ──
+    def on_fill(self, fill: dict) -> None:
+        """fill_listeners hook: fold an agent fill into its position and
+        re-arm the pair at the new entry price and size."""
+        agent_id = fill.get("agent_id")
+        if not agent_id:
+            return
+        with self._lock:
+            order_id = fill.get("order_id")
+            if order_id and not fill.get("paper"):
+                self._live[order_id] = self._live.get(order_id, 0.0) + float(fill["size"])
+            self._fold(agent_id, fill["token_id"], fill["side"].upper(), float(fill["price"]), float(fill["size"]))
+
+    def ingest_trades(self, trades: list) -> int:
+        """Fold agent fills from trade-history rows not seen yet, oldest
+        first. Fills already folded from a post_order response are skipped
+        up to their size."""
+        applied = 0
+        with self._lock:
+            # filtered under the lock, so concurrent catch-ups cannot both fold a fill
+            rows = sorted((t for t in trades if t.get("id") not in self._seen
+                           and _float(t.get("match_time")) >= self._seen_floor),
+                          key=lambda t: _float(t.get("match_time")))
+            for t in rows:
+                self._seen[t.get("id")] = _float(t.get("match_time"))
+                agent_id = self.agent_of(t) if self.agent_of else None
+                side, price, size, _ = our_side(t, self.address)
+                if not agent_id or size <= SIZE_EPSILON or side not in ("BUY", "SELL"):
+                    continue
+                # only taker fills can have been folded from a post_order response
+                if str(t.get("trader_side", "")).upper() != "MAKER":
+                    order_id = t.get("taker_order_id")
+                    booked = self._live.get(order_id, 0.0)
+                    if booked > SIZE_EPSILON:
+                        skip = min(booked, size)
+                        if booked - skip > SIZE_EPSILON:
+                            self._live[order_id] = booked - skip
+                        else:
+                            del self._live[order_id]
+                        size -= skip
+                        if size <= SIZE_EPSILON:
+                            continue
+                self._fold(agent_id, str(t.get("asset_id", "")), side, price, size)
+                applied += 1
+            if self._seen:
+                floor = max(self._seen.values()) - SEEN_SECONDS
+                if floor - self._seen_floor >= SEEN_SECONDS / 10:
+                    self._seen = {i: ts for i, ts in self._seen.items() if ts >= floor}
+                    self._seen_floor = floor
+        return applied
+
+    def _fold(self, agent_id: str, token_id: str, side: str, price: float, size: float) -> None:
+        key = (agent_id, token_id)
+        position = self._positions.get(key)
+        if position is None:
+            position = self._positions[key] = _Position()
+        if side == "BUY":
+            position.size += size
+            position.cost += size * price
+        else:
+            entry = position.entry_price
+            position.size = max(0.0, position.size - size)
+            position.cost = position.size * entry
+        self._rearm(agent_id, token_id)
+
+    def rearm(self, agent_id: str, token_id: str) -> tuple:
+        """(Re)place the pair for a position from its current size and entry."""
+        with self._lock:
+            return self._rearm(agent_id, token_id)
+
+    def _rearm(self, agent_id: str, token_id: str) -> tuple:
+        key = (agent_id, token_id)
+        position = self._positions.get(key)
+        if position is None:
+            return ()
+        self._disarm_position(position)
+        limits = self.limits(agent_id)
+        if position.size <= SIZE_EPSILON or not limits:
+            if position.size <= SIZE_EPSILON:
+                del self._positions[key]
+            return ()
+        entry = position.entry_price
+        stop_pct, take_pct = limits
+        armed = []
+        if stop_pct and stop_pct > 0:
+            armed.append(self._arm(agent_id, token_id, STOP_LOSS, entry * (1 - stop_pct), position))
+        if take_pct and take_pct > 0 and entry * (1 + take_pct) <= 1:
+            armed.append(self._arm(agent_id, token_id, TAKE_PROFIT, entry * (1 + take_pct), position))
+        position.trigger_ids = tuple(t.id for t in armed)
+        return tuple(armed)
+
+    def arm(self, agent_id: str, token_id: str, entry_price: float, size: float) -> tuple:
+        """Protect a position that did not come through on_fill (for
+        example one carried over from before a restart)."""
+        with self._lock:
+            position = self._positions.get((agent_id, token_id))
+            if position is None:
+                position = self._positions[(agent_id, token_id)] = _Position()
+            position.size, position.cost = size, size * entry_price
+            return self._rearm(agent_id, token_id)
+
+    def disarm_agent(self, agent_id: str) -> int:
+        with self._lock:
+            keys = [k for k in self._positions if k[0] == agent_id]
+            for key in keys:
+                self._disarm_position(self._positions.pop(key))
+            return len(keys)
+
+    def _arm(self, agent_id: str, token_id: str, kind: str, threshold: float, position: _Position) -> Trigger:
+        trigger = Trigger(next(self._ids), agent_id, token_id, kind, threshold, position.size, position.entry_price)
+        self.triggers[trigger.id] = trigger
+        ladder = self._ladders.get(token_id)
+        if ladder is None:
+            ladder = self._ladders[token_id] = _Ladder()
+        ladder.add(trigger)
+        return trigger
+
+    def _disarm_position(self, position: _Position) -> None:
+        for trigger_id in position.trigger_ids:
+            trigger = self.triggers.pop(trigger_id, None)
+            if trigger is None:
+                continue
+            ladder = self._ladders.get(trigger.token_id)
+            if ladder is not None:
+                ladder.remove(trigger)
+                if not ladder:
+                    del self._ladders[trigger.token_id]
+        position.trigger_ids = ()
+
+    # ── prices ──
+    def on_price(self, token_id: str, price: float) -> list:
+        """Fire every trigger on `token_id` that `price` has crossed."""
+        with self._lock:
+            ladder = self._ladders.get(token_id)
+            if ladder is None:
+                return []
+            crossed = ladder.pop_crossed(price)
+            if not crossed:
+                return []
+            now = time.time()
+            fired = []
+            for trigger_id in crossed:
+                trigger = self.triggers.pop(trigger_id, None)
+                if trigger is None:
+                    continue
+                trigger.fired_at, trigger.fired_price = now, price
+                fired.append(trigger)
+                position = self._positions.get((trigger.agent_id, token_id))
+                if position is not None:
+                    # One-cancels-other: drop the sibling that did not fire
+                    position.trigger_ids = tuple(i for i in position.trigger_ids if i != trigger_id)
+                    self._disarm_position(position)
+            if not ladder:
+                self._ladders.pop(token_id, None)
+            self.fired_count += len(fired)
+        for listener in self.listeners:
+            try:
+                listener(fired)
+            except Exception as e:
+                logger.error(f"Trigger listener failed: {e}")
+        return fired
+
+    def mark(self, quotes: dict) -> None:
+        """price_batcher listener: evaluate armed tokens at the midpoint."""
+        for token_id, quote in quotes.items():
+            if quote is not None and quote.mid is not None and token_id in self._ladders:
+                self.on_price(token_id, quote.mid)
+
+    # ── queries ──
+    def tokens(self) -> list:
+        with self._lock:
+            return list(self._ladders)
+
+    def armed(self, agent_id: Optional[str] = None) -> list:
+        with self._lock:
+            return [t for t in self.triggers.values() if agent_id is None or t.agent_id == agent_id]
+
+    def position(self, agent_id: str, token_id: str) -> Optional[tuple]:
+        with self._lock:
+            position = self._positions.get((agent_id, token_id))
+            return (position.size, position.entry_price) if position is not None else None
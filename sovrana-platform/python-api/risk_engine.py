@@ -0,0 +1,303 @@
+"""
+Portfolio Risk
+Monte Carlo resolution scenarios for held outcome tokens. Every market
+settles to one outcome with its market-implied probability. Markets of a
+neg-risk event settle together (at most one of them resolves YES), and
+other binary markets that share an event can be tied with a one-factor
+Gaussian copula. Payoffs for the wallet and every agent come out of one
+matrix product per batch of scenarios.
+"""
+
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from statistics import NormalDist
+from typing import Callable, Optional
+
+import numpy as np
+
+logger = logging.getLogger("sovrana-api")
+
+SCENARIOS = 100_000
+MAX_SCENARIOS = 1_000_000
+BATCH = 16_384  # scenarios per matrix product
+PAYOFF_MEMORY = 256 * 2**20  # bytes of float32 payoffs kept per pass over the scenarios
+CONFIDENCE = 0.95
+SEED = 7
+CACHE_SIZE = 8
+PROB_FLOOR = 1e-6
+
+
+class _Market:
+    __slots__ = ("key", "token_ids", "probs", "event_id", "neg_risk", "column")
+
+    def __init__(self, key: str, token_ids: tuple, probs: np.ndarray, event_id: Optional[str], neg_risk: bool):
+        self.key = key
+        self.token_ids = token_ids
+        self.probs = probs
+        self.event_id = event_id
+        self.neg_risk = neg_risk
+        self.column = -1
+
+
+class _Model:
+    """Held markets grouped by how they resolve, with the holdings matrix."""
+
+    def __init__(self, holders: dict, describe: Callable, price_of: Callable, correlation: float):
+        self.correlation = correlation
+        self.holder_keys = list(holders)
+        markets: dict = {}
+        token_slot: dict = {}
+        for positions in holders.values():
+            for token_id in positions:
+                if token_id in token_slot:
+                    continue
+                described = describe(token_id)
+                # unknown tokens settle as a binary market against their complement
+                key, token_ids, event_id, neg_risk = described or (token_id, (token_id, f"{token_id}:other"), None, False)
+                market = markets.get(key)
+                if market is None:
+                    raw = np.array([price_of(t) for t in token_ids], dtype=float)
+                    market = markets[key] = _Market(key, tuple(token_ids), _normalise(raw), event_id, neg_risk)
+                token_slot[token_id] = (key, market.token_ids.index(token_id))
+
+        self.markets = list(markets.values())
+        for column, market in enumerate(self.markets):
+            market.column = column
+        self.tokens = list(token_slot)
+        self.token_market = np.array([markets[token_slot[t][0]].column for t in self.tokens], dtype=np.int64)
+        self.token_outcome = np.array([token_slot[t][1] for t in self.tokens], dtype=np.int8)
+
+        index = {t: i for i, t in enumerate(self.tokens)}
+        self.sizes = np.zeros((len(self.holder_keys), len(self.tokens)))
+        self.cost = np.zeros(len(self.holder_keys))
+        for h, positions in enumerate(holders.values()):
+            for token_id, (size, avg) in positions.items():
+                self.sizes[h, index[token_id]] = size
+                self.cost[h] += size * avg
+        token_prob = np.array([markets[token_slot[t][0]].probs[token_slot[t][1]] for t in self.tokens])
+        self.mark_value = self.sizes @ token_prob if len(self.tokens) else np.zeros(len(self.holder_keys))
+
+    def prepare(self) -> None:
+        """Resolution groups and payoff indicators; only needed on a cache miss."""
+        correlation = self.correlation
+        by_event: dict = {}
+        for market in self.markets:
+            if market.event_id is not None and len(market.token_ids) == 2:
+                by_event.setdefault((market.event_id, market.neg_risk), []).append(market)
+        self.neg_risk_groups = [g for (_, neg), g in by_event.items() if neg and len(g) > 1]
+        grouped = {m.column for g in self.neg_risk_groups for m in g}
+        copula = [g for (_, neg), g in by_event.items() if not neg and len(g) > 1] if correlation > 0 else []
+        self.copula_groups = copula
+        grouped |= {m.column for g in copula for m in g}
+        self.binary = [m for m in self.markets if m.column not in grouped and len(m.token_ids) == 2]
+        self.categorical = [m for m in self.markets if m.column not in grouped and len(m.token_ids) != 2]
+
+        # flattened group members, so each group kind is sampled in one pass
+        self.binary_cols = np.array([m.column for m in self.binary], dtype=np.int64)
+        self.binary_yes = np.array([m.probs[0] for m in self.binary], dtype=np.float32)
+        members = [(g, m) for g, group in enumerate(self.neg_risk_groups) for m in group]
+        self.neg_risk_cols = np.array([m.column for _, m in members], dtype=np.int64)
+        self.neg_risk_group = np.array([g for g, _ in members], dtype=np.int64)
+        self.neg_risk_lower, self.neg_risk_upper = np.empty(len(members)), np.empty(len(members))
+        i = 0
+        for group in self.neg_risk_groups:
+            p_yes = np.array([m.probs[0] for m in group])
+            share = p_yes / max(1.0, p_yes.sum())
+            self.neg_risk_upper[i:i + len(group)] = np.cumsum(share)
+            self.neg_risk_lower[i:i + len(group)] = self.neg_risk_upper[i:i + len(group)] - share
+            i += len(group)
+        members = [(g, m) for g, group in enumerate(copula) for m in group]
+        normal = NormalDist()
+        self.copula_cols = np.array([m.column for _, m in members], dtype=np.int64)
+        self.copula_group = np.array([g for g, _ in members], dtype=np.int64)
+        self.copula_cut = np.array([normal.inv_cdf(min(max(m.probs[0], PROB_FLOOR), 1 - PROB_FLOOR))
+                                    for _, m in members], dtype=np.float32)
+
+        # Settlement value = value if every market resolves to its last
+        # outcome, plus one indicator column per other outcome anyone holds
+        columns: dict = {}
+        for i, column in enumerate(self.token_market.tolist()):
+            columns.setdefault(column, []).append(i)
+        self.held = {}
+        self.base = np.zeros(len(self.holder_keys))
+        ind_market, ind_outcome, deltas = [], [], []
+        for market in self.markets:
+            cols = columns[market.column]
+            held = np.zeros((len(self.holder_keys), len(market.token_ids)))
+            held[:, self.token_outcome[cols]] = self.sizes[:, cols]
+            self.held[market.column] = held
+            last = held[:, -1]
+            self.base += last
+            for j in range(len(market.token_ids) - 1):
+                delta = held[:, j] - last
+                if delta.any():
+                    ind_market.append(market.column)
+                    ind_outcome.append(j)
+                    deltas.append(delta)
+        self.ind_market = np.array(ind_market, dtype=np.int64)
+        self.ind_outcome = np.array(ind_outcome, dtype=np.int8)
+        self.deltas = np.array(deltas, dtype=np.float32).reshape(len(deltas), len(self.holder_keys))
+
+    def fingerprint(self, scenarios: int, confidence: float, seed: int) -> str:
+        digest = hashlib.sha1()
+        digest.update(repr((self.holder_keys, self.tokens, scenarios, confidence, seed, self.correlation)).encode())
+        digest.update(self.sizes.tobytes())
+        digest.update(self.cost.tobytes())
+        for market in self.markets:
+            digest.update(repr((market.key, market.event_id, market.neg_risk)).encode())
+            digest.update(market.probs.tobytes())
+        return digest.hexdigest()
+
+    # ── scenarios ──
+    def sample(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        """Winning outcome index per market, shape (markets, n). Markets are
+        rows so every write and gather below is contiguous."""
+        outcome = np.zeros((len(self.markets), n), dtype=np.int8)
+        if len(self.binary_cols):
+            outcome[self.binary_cols] = rng.random((len(self.binary_cols), n), dtype=np.float32) >= self.binary_yes[:, None]
+        for market in self.categorical:
+            cum = np.cumsum(market.probs)
+            outcome[market.column] = np.minimum(np.searchsorted(cum, rng.random(n), side="right"), len(cum) - 1)
+        if len(self.neg_risk_cols):
+            # one draw per event picks its winner (or none of the held markets)
+            u = rng.random((len(self.neg_risk_groups), n))[self.neg_risk_group]
+            outcome[self.neg_risk_cols] = (u < self.neg_risk_lower[:, None]) | (u >= self.neg_risk_upper[:, None])
+        if len(self.copula_cols):
+            rho = np.float32(self.correlation)
+            z = rng.standard_normal((len(self.copula_cols), n), dtype=np.float32)
+            z *= np.sqrt(1 - rho)
+            z += np.sqrt(rho) * rng.standard_normal((len(self.copula_groups), n), dtype=np.float32)[self.copula_group]
+            outcome[self.copula_cols] = z >= self.copula_cut[:, None]
+        return outcome
+
+    def payoffs(self, outcome: np.ndarray, holders: slice) -> np.ndarray:
+        """Settlement value per scenario for a slice of holders, (holders, n)."""
+        wins = (outcome[self.ind_market] == self.ind_outcome[:, None]).astype(np.float32)
+        return self.deltas[:, holders].T @ wins + self.base[holders].astype(np.float32)[:, None]
+
+    def worst_payoff(self) -> np.ndarray:
+        """Exact minimum settlement value per holder over every outcome the
+        model allows (copula groups can realise any combination)."""
+        worst = np.zeros(len(self.holder_keys))
+        grouped = set()
+        for group in self.neg_risk_groups:
+            yes = np.stack([self.held[m.column][:, 0] for m in group], axis=1)
+            no = np.stack([self.held[m.column][:, 1] for m in group], axis=1)
+            all_no = no.sum(axis=1)
+            cases = all_no[:, None] - no + yes  # market i resolves YES, the rest NO
+            if sum(m.probs[0] for m in group) < 1 - PROB_FLOOR:
+                cases = np.concatenate([cases, all_no[:, None]], axis=1)
+            worst += cases.min(axis=1)
+            grouped |= {m.column for m in group}
+        for column, held in self.held.items():
+            if column not in grouped:
+                worst += held.min(axis=1)
+        return worst
+
+
+def _normalise(raw: np.ndarray) -> np.ndarray:
+    probs = np.where(np.isfinite(raw) & (raw >= 0), raw, np.nan)
+    known = ~np.isnan(probs)
+    if not known.any():
+        return np.full(len(raw), 1 / len(raw))
+    if not known.all():
+        # spread what the priced outcomes leave over the unpriced ones
+        rest = max(0.0, 1 - probs[known].sum())
+        probs[~known] = rest / (~known).sum()
+    total = probs.sum()
+    return probs / total if total > 0 else np.full(len(raw), 1 / len(raw))
+
+
+class RiskEngine:
+    """Scenario risk for named holders. `describe(token_id)` returns
+    (market key, the market's token ids in outcome order, event id or None,
+    neg_risk), or None for unknown tokens; `price_of(token_id)` returns the
+    implied probability or None.
+    Results are cached on a fingerprint of holdings, probabilities and
+    parameters, so they are reused until positions or prices change."""
+
+    def __init__(self, describe: Callable, price_of: Callable):
+        self.describe = describe
+        self.price_of = price_of
+        self.runs = 0
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()  # evaluate() runs in concurrent to_thread calls
+
+    def evaluate(self, holders: dict, scenarios: int = SCENARIOS, confidence: float = CONFIDENCE,
+                 correlation: float = 0.0, seed: int = SEED) -> dict:
+        """holders maps a name to {token_id: (size, avg_price)}."""
+        if not 0 < confidence < 1:
+            raise ValueError("confidence must be between 0 and 1")
+        if not 0 <= correlation < 1:
+            raise ValueError("correlation must be in [0, 1)")
+        if not 1000 <= scenarios <= MAX_SCENARIOS:
+            raise ValueError(f"scenarios must be between 1000 and {MAX_SCENARIOS}")
+        holders = {k: {t: p for t, p in v.items() if p[0] > 0} for k, v in holders.items()}
+        model = _Model(holders, self.describe, self.price_of, correlation)
+        key = model.fingerprint(scenarios, confidence, seed)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return dict(cached, cached=True)
+
+        started = time.perf_counter()
+        model.prepare()
+        stats = {}
+        worst = model.worst_payoff()
+        # as many holders per pass as fit the payoff budget, usually all of them
+        per_pass = max(1, PAYOFF_MEMORY // (4 * scenarios))
+        for lo in range(0, len(model.holder_keys), per_pass):
+            chunk = slice(lo, lo + per_pass)
+            # the same seed replays identical scenarios for every pass
+            rng = np.random.default_rng(seed)
+            payoff = np.concatenate([
+                model.payoffs(model.sample(rng, min(BATCH, scenarios - done)), chunk)
+                for done in range(0, scenarios, BATCH)
+            ], axis=1)
+            for j, name in enumerate(model.holder_keys[chunk]):
+                h = lo + j
+                stats[name] = _summarise(payoff[j].astype(np.float64), model.mark_value[h], model.cost[h],
+                                         worst[h], confidence, int(np.count_nonzero(model.sizes[h])))
+        result = {
+            "holders": stats,
+            "scenarios": scenarios,
+            "confidence": confidence,
+            "correlation": correlation,
+            "markets": len(model.markets),
+            "tokens": len(model.tokens),
+            "groups": {"neg_risk": len(model.neg_risk_groups), "correlated": len(model.copula_groups)},
+            "compute_ms": round((time.perf_counter() - started) * 1000, 2),
+            "computed_at": time.time(),
+        }
+        with self._lock:
+            self.runs += 1
+            self._cache[key] = result
+            while len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return dict(result, cached=False)
+
+
+def _summarise(payoff: np.ndarray, mark_value: float, cost: float, worst: float, confidence: float, positions: int) -> dict:
+    """Losses (var, cvar, worst-case, prob_loss) are measured against today's
+    mark value and reported positive; the *_pnl and prob_below_cost fields
+    are against the cost basis."""
+    cutoff = np.quantile(payoff, 1 - confidence)
+    tail = payoff[payoff <= cutoff]
+    return {
+        "positions": positions,
+        "mark_value": round(float(mark_value), 6),
+        "cost_basis": round(float(cost), 6),
+        "expected_value": round(float(payoff.mean()), 6),
+        "expected_pnl": round(float(payoff.mean() - cost), 6),
+        "std": round(float(payoff.std()), 6),
+        "var": round(float(mark_value - cutoff), 6),
+        "cvar": round(float(mark_value - tail.mean()), 6) if tail.size else None,
+        "worst_case_loss": round(float(mark_value - worst), 6),
+        "sampled_worst_loss": round(float(mark_value - payoff.min()), 6),
+        "prob_loss": round(float((payoff < mark_value).mean()), 6),
+        "prob_below_cost": round(float((payoff < cost).mean()), 6),
+    }
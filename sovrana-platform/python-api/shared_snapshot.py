@@ -0,0 +1,597 @@
+"""
+Shared Market Snapshot
+One publisher process keeps the market catalogue and a price snapshot in a
+shared-memory columnar buffer; every uvicorn worker attaches and reads it as
+zero-copy NumPy views instead of syncing Gamma and polling prices itself.
+
+The buffer holds two slots. The publisher always writes the slot readers are
+not pointed at, guarding it with a per-slot generation counter (odd while a
+write is in progress, a seqlock), then flips the active slot. A reader's view
+stays valid until the publisher comes back around to that slot, which
+Snapshot.valid() detects.
+
+Run the publisher next to the API workers:
+
+    python shared_snapshot.py publish --name sovrana-snapshot
+    SOVRANA_SNAPSHOT=sovrana-snapshot uvicorn main:app --workers 4
+
+Workers that share a snapshot can also elect one of themselves for work that
+should only hit upstream once (claim_role).
+
+Token and market lookups are served from the shared columns, decoding only
+the markets asked for. A worker needs a MarketCatalogue of its own (hydrate)
+only for text and tag search and the event walk, and hydrating costs far
+more than the copies the snapshot replaces: with 20,000 markets and 4
+workers, benchmarks/bench_snapshot.py measures about 117 MiB PSS per
+hydrated worker, 30 MiB for per-worker catalogue and price copies, and 13
+MiB for the shared views plus column lookups.
+"""
+
+import os
+import sys
+import json
+import time
+import fcntl
+import asyncio
+import logging
+import argparse
+import tempfile
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Optional
+
+import numpy as np
+
+from market_catalogue import MarketRecord
+from price_batcher import Quote
+
+logger = logging.getLogger("sovrana-api")
+
+MAGIC = 0x534F5652414E4131  # "SOVRANA1"
+LAYOUT_VERSION = 1
+TOKEN_CAPACITY = int(os.environ.get("SOVRANA_SNAPSHOT_TOKENS", 131072))
+BLOB_CAPACITY = int(os.environ.get("SOVRANA_SNAPSHOT_BLOB_MB", 96)) * 1024 * 1024  # per slot
+TOKEN_ID_WIDTH = 80
+CONDITION_ID_WIDTH = 66
+READ_RETRIES = 1000
+RECORD_CACHE = 4096  # decoded MarketRecords a reader keeps per markets version
+PUBLISH_INTERVAL = 2.0  # seconds between price publishes
+PRICED_TOKENS = 2000  # tokens (by 24h volume) refreshed from the CLOB each publish
+
+# global header words
+H_MAGIC, H_LAYOUT, H_ACTIVE, H_PUBLISHES, H_TOKENS, H_MARKETS, H_BLOB, H_PID, H_MARKETS_VERSION = range(9)
+HEADER_WORDS = 16
+# slot header words (S_PUBLISHED_AT is a float64 monotonic timestamp)
+S_GENERATION, S_TOKENS, S_MARKETS, S_BLOB_LEN, S_MARKETS_VERSION, S_PUBLISHED_AT, S_WALL_TIME = range(7)
+SLOT_HEADER_WORDS = 8
+
+
+def _align(n: int, to: int = 64) -> int:
+    return (n + to - 1) // to * to
+
+
+class Layout:
+    """Byte offsets of every column inside the segment for given capacities."""
+
+    def __init__(self, token_capacity: int, market_capacity: int, blob_capacity: int):
+        self.token_capacity = token_capacity
+        self.market_capacity = market_capacity
+        self.blob_capacity = blob_capacity
+        self.columns = (
+            ("token_id", f"S{TOKEN_ID_WIDTH}", token_capacity),
+            ("market_row", "<i4", token_capacity),
+            ("buy", "<f8", token_capacity),
+            ("sell", "<f8", token_capacity),
+            ("mid", "<f8", token_capacity),
+            ("spread", "<f8", token_capacity),
+            ("quote_as_of", "<f8", token_capacity),  # NaN: catalogue price, not a live quote
+            ("condition_id", f"S{CONDITION_ID_WIDTH}", market_capacity),
+            ("volume_24hr", "<f8", market_capacity),
+            ("liquidity", "<f8", market_capacity),
+            ("tick_size", "<f8", market_capacity),
+            ("neg_risk", "u1", market_capacity),
+            ("first_token", "<i4", market_capacity),
+            ("token_count", "<i4", market_capacity),
+            ("updated_version", "<u8", market_capacity),
+            ("blob_offset", "<i8", market_capacity),
+            ("blob_length", "<i4", market_capacity),
+            ("blob", "u1", blob_capacity),
+        )
+        self.offsets = {}
+        offset = _align(SLOT_HEADER_WORDS * 8)
+        for name, dtype, count in self.columns:
+            self.offsets[name] = offset
+            offset = _align(offset + np.dtype(dtype).itemsize * count)
+        self.slot_bytes = offset
+        self.header_bytes = _align(HEADER_WORDS * 8)
+        self.total_bytes = self.header_bytes + 2 * self.slot_bytes
+
+    def slot_views(self, buf, slot: int) -> dict:
+        base = self.header_bytes + slot * self.slot_bytes
+        views = {"_header": np.ndarray((SLOT_HEADER_WORDS,), np.uint64, buf, base)}
+        views["_header_f"] = views["_header"].view(np.float64)
+        for name, dtype, count in self.columns:
+            views[name] = np.ndarray((count,), dtype, buf, base + self.offsets[name])
+        return views
+
+
+def _attach(name: str) -> SharedMemory:
+    """Open an existing segment without letting this process's resource
+    tracker unlink it at exit (only the publisher owns it)."""
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name, track=False)
+    # Unregistering after the fact would also drop the publisher's entry when
+    # both share a tracker (forked workers), so skip registration instead.
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return SharedMemory(name)
+    finally:
+        resource_tracker.register = register
+
+
+# ─── Publisher side ──────────────────────────────────────────────────────────
+class SnapshotWriter:
+    """Owns the segment. publish() writes catalogue records and the latest
+    quotes into the inactive slot and makes it current."""
+
+    def __init__(self, name: str, token_capacity: int = TOKEN_CAPACITY, market_capacity: Optional[int] = None,
+                 blob_capacity: int = BLOB_CAPACITY):
+        self.name = name
+        self.layout = Layout(token_capacity, market_capacity or token_capacity // 2, blob_capacity)
+        try:
+            stale = _attach(name)
+            stale.close()
+            stale.unlink()
+        except FileNotFoundError:
+            pass
+        self.shm = SharedMemory(name, create=True, size=self.layout.total_bytes)
+        self.header = np.ndarray((HEADER_WORDS,), np.uint64, self.shm.buf, 0)
+        self.header[:] = 0
+        self.header[H_MAGIC] = MAGIC
+        self.header[H_LAYOUT] = LAYOUT_VERSION
+        self.header[H_TOKENS] = self.layout.token_capacity
+        self.header[H_MARKETS] = self.layout.market_capacity
+        self.header[H_BLOB] = self.layout.blob_capacity
+        self.header[H_PID] = os.getpid()
+        self.slots = [self.layout.slot_views(self.shm.buf, i) for i in (0, 1)]
+        for s in self.slots:
+            s["_header"][:] = 0
+        self.markets_version = 0
+        self._changed: set = set()
+        self._present: set = set()
+        self._encoded: dict = {}  # condition_id -> (version, payload bytes)
+        self._tokens: list = []
+        self._token_index: dict = {}
+        self._quotes = {c: np.empty(0) for c in ("buy", "sell", "mid", "spread", "quote_as_of")}
+        self._identity: tuple = ()
+
+    def on_catalogue_update(self, records: list) -> None:
+        """Catalogue listener: remember which markets need re-encoding."""
+        self._changed.update(r.condition_id for r in records)
+
+    def _refresh_markets(self, records: list) -> None:
+        present = {r.condition_id for r in records}
+        if not self._changed and present == self._present:
+            return
+        self.markets_version += 1
+        for r in records:
+            if r.condition_id in self._changed or r.condition_id not in self._encoded:
+                self._encoded[r.condition_id] = (self.markets_version, json.dumps(r.to_gamma(), separators=(",", ":")).encode())
+        for cid in self._present - present:
+            self._encoded.pop(cid, None)
+        self._changed.clear()
+        self._present = present
+
+        cap_t, cap_m = self.layout.token_capacity, self.layout.market_capacity
+        if len(records) > cap_m or sum(len(r.token_ids) for r in records) > cap_t:
+            logger.error(f"Snapshot capacity exceeded ({len(records)} markets); publishing the top markets only")
+            records = sorted(records, key=lambda r: r.volume_24hr, reverse=True)
+            kept, tokens = [], 0
+            for r in records:
+                if len(kept) >= cap_m or tokens + len(r.token_ids) > cap_t:
+                    break
+                kept.append(r)
+                tokens += len(r.token_ids)
+            records = kept
+
+        tokens, market_rows, first, counts = [], [], [], []
+        for row, r in enumerate(records):
+            first.append(len(tokens))
+            counts.append(len(r.token_ids))
+            tokens.extend(r.token_ids)
+            market_rows.extend([row] * len(r.token_ids))
+        index = {t: i for i, t in enumerate(tokens)}
+
+        # carry live quotes across the re-layout; catalogue prices elsewhere
+        old_index, old = self._token_index, self._quotes
+        quotes = {c: np.full(len(tokens), np.nan) for c in old}
+        for t, i in index.items():
+            j = old_index.get(t)
+            if j is not None:
+                for c in quotes:
+                    quotes[c][i] = old[c][j]
+        for r in records:
+            for k, t in enumerate(r.token_ids):
+                i = index[t]
+                if np.isnan(quotes["quote_as_of"][i]) and k < len(r.prices):
+                    quotes["mid"][i] = r.prices[k]
+
+        blob, offsets, lengths, at = [], [], [], 1
+        for r in records:
+            payload = self._encoded[r.condition_id][1]
+            offsets.append(at)
+            lengths.append(len(payload))
+            blob.append(payload)
+            at += len(payload) + 1
+        blob_bytes = b"[" + b",".join(blob) + b"]"
+        if len(blob_bytes) > self.layout.blob_capacity:
+            raise RuntimeError(f"Snapshot blob of {len(blob_bytes)} bytes exceeds capacity {self.layout.blob_capacity}")
+
+        self._tokens, self._token_index, self._quotes = tokens, index, quotes
+        self._identity = (
+            self.markets_version,
+            np.array(tokens, dtype=f"S{TOKEN_ID_WIDTH}"),
+            np.array(market_rows, dtype="<i4"),
+            np.array([r.condition_id for r in records], dtype=f"S{CONDITION_ID_WIDTH}"),
+            np.array([r.volume_24hr for r in records], dtype="<f8"),
+            np.array([r.liquidity for r in records], dtype="<f8"),
+            np.array([r.tick_size for r in records], dtype="<f8"),
+            np.array([r.neg_risk for r in records], dtype="u1"),
+            np.array(first, dtype="<i4"),
+            np.array(counts, dtype="<i4"),
+            np.array([self._encoded[r.condition_id][0] for r in records], dtype="<u8"),
+            np.array(offsets, dtype="<i8"),
+            np.array(lengths, dtype="<i4"),
+            np.frombuffer(blob_bytes, dtype="u1"),
+        )
+
+    def update_quotes(self, quotes: dict) -> int:
+        """Fold PriceBatcher quotes into the pending price columns."""
+        updated = 0
+        cols = self._quotes
+        for token_id, q in quotes.items():
+            i = self._token_index.get(token_id)
+            if i is None or q is None:
+                continue
+            cols["buy"][i] = np.nan if q.buy is None else q.buy
+            cols["sell"][i] = np.nan if q.sell is None else q.sell
+            cols["mid"][i] = np.nan if q.mid is None else q.mid
+            cols["spread"][i] = np.nan if q.spread is None else q.spread
+            cols["quote_as_of"][i] = q.as_of
+            updated += 1
+        return updated
+
+    def publish(self, records: Optional[list] = None) -> int:
+        """Write the inactive slot and flip readers onto it. Pass the current
+        catalogue records whenever markets may have changed."""
+        if records is not None:
+            self._refresh_markets(records)
+        if not self._identity:
+            return 0
+        slot = 1 - int(self.header[H_ACTIVE]) if int(self.header[H_PUBLISHES]) else 0
+        views = self.slots[slot]
+        hdr, hdr_f = views["_header"], views["_header_f"]
+        (version, token_ids, market_rows, conditions, volume, liquidity, tick, neg_risk,
+         first, counts, updated, offsets, lengths, blob) = self._identity
+        n_tokens, n_markets = len(token_ids), len(conditions)
+
+        hdr[S_GENERATION] += 1  # odd: readers must not trust this slot
+        if int(hdr[S_MARKETS_VERSION]) != version or int(hdr[S_TOKENS]) != n_tokens:
+            views["token_id"][:n_tokens] = token_ids
+            views["market_row"][:n_tokens] = market_rows
+            views["condition_id"][:n_markets] = conditions
+            views["volume_24hr"][:n_markets] = volume
+            views["liquidity"][:n_markets] = liquidity
+            views["tick_size"][:n_markets] = tick
+            views["neg_risk"][:n_markets] = neg_risk
+            views["first_token"][:n_markets] = first
+            views["token_count"][:n_markets] = counts
+            views["updated_version"][:n_markets] = updated
+            views["blob_offset"][:n_markets] = offsets
+            views["blob_length"][:n_markets] = lengths
+            views["blob"][:len(blob)] = blob
+        for c, values in self._quotes.items():
+            views[c][:n_tokens] = values
+        hdr[S_TOKENS] = n_tokens
+        hdr[S_MARKETS] = n_markets
+        hdr[S_BLOB_LEN] = len(blob)
+        hdr[S_MARKETS_VERSION] = version
+        hdr_f[S_PUBLISHED_AT] = time.monotonic()
+        hdr_f[S_WALL_TIME] = time.time()
+        hdr[S_GENERATION] += 1  # even: stable
+
+        self.header[H_ACTIVE] = slot
+        self.header[H_MARKETS_VERSION] = version
+        self.header[H_PUBLISHES] += 1
+        return n_tokens
+
+    def tokens(self) -> list:
+        return self._tokens
+
+    def close(self) -> None:
+        self.slots = []
+        self.header = None
+        self.shm.close()
+        self.shm.unlink()
+
+
+# ─── Worker side ─────────────────────────────────────────────────────────────
+class Snapshot:
+    """Zero-copy views of one consistent slot. Check valid() after using
+    them; a False means the publisher has since rewritten the slot."""
+
+    __slots__ = ("columns", "generation", "n_tokens", "n_markets", "markets_version",
+                 "published_at", "wall_time", "_slot_header")
+
+    def __init__(self, views: dict, generation: int):
+        hdr, hdr_f = views["_header"], views["_header_f"]
+        self._slot_header = hdr
+        self.generation = generation
+        self.n_tokens = int(hdr[S_TOKENS])
+        self.n_markets = int(hdr[S_MARKETS])
+        self.markets_version = int(hdr[S_MARKETS_VERSION])
+        self.published_at = float(hdr_f[S_PUBLISHED_AT])
+        self.wall_time = float(hdr_f[S_WALL_TIME])
+        blob_len = int(hdr[S_BLOB_LEN])
+        self.columns = {}
+        for name, view in views.items():
+            if name.startswith("_"):
+                continue
+            if name == "blob":
+                self.columns[name] = view[:blob_len]
+            elif name in _MARKET_COLUMNS:
+                self.columns[name] = view[:self.n_markets]
+            else:
+                self.columns[name] = view[:self.n_tokens]
+
+    def valid(self) -> bool:
+        return int(self._slot_header[S_GENERATION]) == self.generation
+
+    def market_payload(self, row: int) -> dict:
+        start = int(self.columns["blob_offset"][row])
+        return json.loads(self.columns["blob"][start:start + int(self.columns["blob_length"][row])].tobytes())
+
+
+_MARKET_COLUMNS = frozenset({
+    "condition_id", "volume_24hr", "liquidity", "tick_size", "neg_risk", "first_token",
+    "token_count", "updated_version", "blob_offset", "blob_length",
+})
+_QUOTE_COLUMNS = ("buy", "sell", "mid", "spread", "quote_as_of")
+
+
+class SnapshotReader:
+    """Attaches to a publisher's segment by name."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.shm = _attach(name)
+        self.header = np.ndarray((HEADER_WORDS,), np.uint64, self.shm.buf, 0)
+        if int(self.header[H_MAGIC]) != MAGIC or int(self.header[H_LAYOUT]) != LAYOUT_VERSION:
+            raise RuntimeError(f"Shared memory segment '{name}' is not a Sovrana snapshot (layout {LAYOUT_VERSION})")
+        self.layout = Layout(int(self.header[H_TOKENS]), int(self.header[H_MARKETS]), int(self.header[H_BLOB]))
+        self.slots = [self.layout.slot_views(self.shm.buf, i) for i in (0, 1)]
+        self._index_version = -1
+        self._token_index: dict = {}
+        self._market_version = -1
+        self._market_index: dict = {}
+        self._records: dict = {}
+
+    @property
+    def publishes(self) -> int:
+        return int(self.header[H_PUBLISHES])
+
+    def view(self) -> Snapshot:
+        """The current slot, retried until its generation is stable."""
+        for _ in range(READ_RETRIES):
+            if not int(self.header[H_PUBLISHES]):
+                raise LookupError(f"Snapshot '{self.name}' has not been published yet")
+            views = self.slots[int(self.header[H_ACTIVE])]
+            generation = int(views["_header"][S_GENERATION])
+            if generation & 1:
+                continue
+            snap = Snapshot(views, generation)
+            if snap.valid():
+                return snap
+        raise RuntimeError(f"Snapshot '{self.name}' kept changing during {READ_RETRIES} reads")
+
+    def read(self, fn):
+        """Run fn(snapshot) and return its result, retrying if the slot was
+        rewritten while fn was reading it."""
+        for _ in range(READ_RETRIES):
+            snap = self.view()
+            result = fn(snap)
+            if snap.valid():
+                return result
+        raise RuntimeError(f"Snapshot '{self.name}' kept changing during {READ_RETRIES} reads")
+
+    def _index(self, snap: Snapshot) -> dict:
+        if snap.markets_version != self._index_version:
+            ids = snap.columns["token_id"].tolist()
+            self._token_index = {t.decode(): i for i, t in enumerate(ids)}
+            self._index_version = snap.markets_version
+        return self._token_index
+
+    def _markets(self, snap: Snapshot) -> dict:
+        if snap.markets_version != self._market_version:
+            ids = snap.columns["condition_id"].tolist()
+            self._market_index = {c.decode(): i for i, c in enumerate(ids)}
+            self._market_version = snap.markets_version
+        return self._market_index
+
+    def _decode(self, snap: Snapshot, row: int) -> Optional[tuple]:
+        """(cache key, MarketRecord) for a market row, or None for a torn
+        payload, which read() then retries."""
+        key = (snap.markets_version, row)
+        record = self._records.get(key)
+        if record is None:
+            try:
+                record = MarketRecord.from_gamma(snap.market_payload(row))
+            except ValueError:
+                if snap.valid():
+                    raise
+                return None
+        return key, record
+
+    def _keep(self, decoded: list) -> list:
+        """Cache records only once read() has confirmed the slot they came from."""
+        if len(self._records) + len(decoded) > RECORD_CACHE:
+            self._records.clear()
+        self._records.update(decoded[:RECORD_CACHE])
+        return [record for _, record in decoded]
+
+    # ── Lookups served from the shared columns (no hydrated catalogue) ──
+    def __len__(self) -> int:
+        try:
+            return self.view().n_markets
+        except LookupError:
+            return 0
+
+    def by_token(self, token_id: str) -> Optional[MarketRecord]:
+        def collect(snap: Snapshot) -> list:
+            i = self._index(snap).get(token_id)
+            return [] if i is None else [self._decode(snap, int(snap.columns["market_row"][i]))]
+        found = self._keep(self.read(collect))
+        return found[0] if found else None
+
+    def get(self, condition_id: str) -> Optional[MarketRecord]:
+        def collect(snap: Snapshot) -> list:
+            row = self._markets(snap).get(condition_id)
+            return [] if row is None else [self._decode(snap, row)]
+        found = self._keep(self.read(collect))
+        return found[0] if found else None
+
+    def top_by_volume(self, limit: int = 20) -> list:
+        def collect(snap: Snapshot) -> list:
+            rows = np.argsort(-snap.columns["volume_24hr"], kind="stable")[:limit]
+            return [self._decode(snap, int(r)) for r in rows]
+        return self._keep(self.read(collect))
+
+    def quotes(self, token_ids: list, max_age: Optional[float] = None) -> dict:
+        """Live quotes for the tokens the snapshot has, as price_batcher Quotes.
+        Tokens without a quote newer than `max_age` seconds are left out."""
+        def collect(snap: Snapshot) -> dict:
+            index = self._index(snap)
+            rows = np.fromiter((index.get(t, -1) for t in token_ids), dtype=np.int64, count=len(token_ids))
+            positions = np.flatnonzero(rows >= 0)
+            block = np.column_stack([snap.columns[c][rows[positions]] for c in _QUOTE_COLUMNS])
+            fresh = ~np.isnan(block[:, -1])
+            if max_age is not None:
+                fresh &= block[:, -1] >= time.time() - max_age
+            block = block[fresh]
+            gaps = np.isnan(block).any(axis=1).tolist()
+            out = {}
+            for i, row, gap in zip(positions[fresh].tolist(), block.tolist(), gaps):
+                if gap:
+                    row = [None if v != v else v for v in row]
+                out[token_ids[i]] = Quote(row[0], row[1], row[2], row[3], row[4])
+            return out
+        return self.read(collect)
+
+    def hydrate(self, catalogue, since_version: int) -> int:
+        """Bring a worker's MarketCatalogue up to the snapshot's markets
+        version: upsert markets changed after `since_version`, drop the ones
+        no longer published. Returns the version now applied."""
+        def collect(snap: Snapshot) -> tuple:
+            if snap.markets_version == since_version:
+                return snap.markets_version, [], None
+            rows = np.nonzero(snap.columns["updated_version"] > since_version)[0]
+            payloads = [snap.market_payload(int(r)) for r in rows]
+            present = {c.decode() for c in snap.columns["condition_id"].tolist()}
+            return snap.markets_version, payloads, present
+
+        version, payloads, present = self.read(collect)
+        if present is None:
+            return version
+        removed = [{"conditionId": r.condition_id, "closed": True} for r in catalogue.records() if r.condition_id not in present]
+        catalogue.load(payloads + removed)
+        logger.info(f"Catalogue hydrated from snapshot v{version}: {len(payloads)} changed, {len(removed)} removed")
+        return version
+
+    def stats(self) -> dict:
+        snap = self.view()
+        return {
+            "name": self.name,
+            "publishes": self.publishes,
+            "markets_version": snap.markets_version,
+            "tokens": snap.n_tokens,
+            "markets": snap.n_markets,
+            "age_seconds": round(time.time() - snap.wall_time, 3),
+            "segment_bytes": self.layout.total_bytes,
+            "publisher_pid": int(self.header[H_PID]),
+        }
+
+    def close(self) -> None:
+        self.slots = []
+        self.header = None
+        self.shm.close()
+
+
+def claim_role(name: str, role: str) -> Optional[int]:
+    """Try to take the exclusive `role` among the workers of snapshot `name`.
+    Returns the lock's file descriptor, held for the life of the process (the
+    kernel releases it when the holder exits), or None if another worker has it."""
+    path = os.path.join(tempfile.gettempdir(), f"{name}.{role}.lock")
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return fd
+
+
+# ─── Publisher process ───────────────────────────────────────────────────────
+async def run_publisher(name: str, gamma_host: str, clob_host: str, interval: float = PUBLISH_INTERVAL,
+                        priced_tokens: int = PRICED_TOKENS, catalogue_interval: float = 30.0) -> None:
+    """Sync the catalogue and refresh the most traded tokens' prices, then
+    publish, forever. The only process that talks to Gamma for the workers."""
+    from py_clob_client.client import ClobClient
+    from market_catalogue import MarketCatalogue
+    from price_batcher import PriceBatcher
+
+    catalogue = MarketCatalogue(gamma_host)
+    batcher = PriceBatcher(ClobClient(clob_host))
+    writer = SnapshotWriter(name)
+    catalogue.listeners.append(writer.on_catalogue_update)
+    batcher.listeners.append(writer.update_quotes)
+    last_sync = 0.0
+    logger.info(f"Publishing snapshot '{name}' ({writer.layout.total_bytes / 2**20:.1f} MiB segment)")
+    try:
+        while True:
+            records = None
+            if time.time() - last_sync >= catalogue_interval:
+                try:
+                    await asyncio.to_thread(catalogue.sync)
+                    records = catalogue.records()
+                except Exception as e:
+                    logger.error(f"Snapshot catalogue sync failed: {e}")
+                last_sync = time.time()
+            try:
+                if priced_tokens:
+                    top = catalogue.top_by_volume(priced_tokens // 2)
+                    await batcher.get([t for r in top for t in r.token_ids][:priced_tokens])
+            except Exception as e:
+                logger.error(f"Snapshot price refresh failed: {e}")
+            writer.publish(records)
+            await asyncio.sleep(interval)
+    finally:
+        writer.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Shared market snapshot")
+    parser.add_argument("command", choices=("publish", "stats"))
+    parser.add_argument("--name", default=os.environ.get("SOVRANA_SNAPSHOT", "sovrana-snapshot"))
+    parser.add_argument("--interval", type=float, default=PUBLISH_INTERVAL)
+    parser.add_argument("--priced-tokens", type=int, default=PRICED_TOKENS)
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        print(json.dumps(SnapshotReader(args.name).stats(), indent=2))
+    else:
+        mock = os.environ.get("POLYMARKET_MOCK_URL", "").rstrip("/")
+        gamma = f"{mock}/gamma" if mock else os.environ.get("GAMMA_API_URL", "https://gamma-api.polymarket.com")
+        clob = f"{mock}/clob" if mock else os.environ.get("CLOB_API_URL", "https://clob.polymarket.com")
+        asyncio.run(run_publisher(args.name, gamma, clob, args.interval, args.priced_tokens))
@@ -0,0 +1,131 @@
+"""
+Token Registry
+Per-token order parameters (tick size, neg-risk, min size, fee rate) kept in
+memory so orders can be filled in and validated locally before signing.
+"""
+
+import time
+import logging
+import threading
+from typing import Optional
+
+logger = logging.getLogger("sovrana-api")
+
+TICK_SIZES = ("0.1", "0.01", "0.001", "0.0001")
+FALLBACK_TTL = 300  # seconds before a directly-fetched entry is looked up again
+
+
+class OrderValidationError(ValueError):
+    """Order parameters that the exchange would reject."""
+
+
+def normalize_tick(value) -> str:
+    """Map a numeric or string tick size onto the CLOB's TickSize literals."""
+    tick = float(value)
+    for candidate in TICK_SIZES:
+        if abs(tick - float(candidate)) < 1e-9:
+            return candidate
+    raise OrderValidationError(f"Unsupported tick size {value}")
+
+
+class TokenMeta:
+    __slots__ = ("token_id", "tick_size", "neg_risk", "min_order_size", "fee_rate_bps", "source", "updated_at")
+
+    def __init__(self, token_id: str, tick_size: str, neg_risk: bool, min_order_size: float, fee_rate_bps: int, source: str):
+        self.token_id = token_id
+        self.tick_size = tick_size
+        self.neg_risk = neg_risk
+        self.min_order_size = min_order_size
+        self.fee_rate_bps = fee_rate_bps
+        self.source = source
+        self.updated_at = time.time()
+
+    def to_dict(self) -> dict:
+        return {
+            "token_id": self.token_id,
+            "tick_size": self.tick_size,
+            "neg_risk": self.neg_risk,
+            "min_order_size": self.min_order_size,
+            "fee_rate_bps": self.fee_rate_bps,
+            "source": self.source,
+            "updated_at": self.updated_at,
+        }
+
+
+class TokenRegistry:
+    """token_id -> TokenMeta, warmed in bulk from the market catalogue and
+    kept current by its sync listener. Tokens the catalogue has not seen are
+    looked up once through the CLOB client and cached."""
+
+    def __init__(self, client=None):
+        self.client = client
+        self._meta: dict = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._meta)
+
+    def update_from_records(self, records: list) -> None:
+        """Catalogue listener: refresh every token of the given markets."""
+        fresh = {}
+        for rec in records:
+            try:
+                tick = normalize_tick(rec.tick_size)
+            except OrderValidationError:
+                continue
+            for token_id in rec.token_ids:
+                fresh[token_id] = TokenMeta(token_id, tick, rec.neg_risk, rec.min_order_size, rec.taker_fee_bps, "catalogue")
+        with self._lock:
+            self._meta.update(fresh)
+
+    def get(self, token_id: str) -> Optional[TokenMeta]:
+        return self._meta.get(token_id)
+
+    def resolve(self, token_id: str) -> TokenMeta:
+        meta = self._meta.get(token_id)
+        if meta is not None and (meta.source == "catalogue" or time.time() - meta.updated_at < FALLBACK_TTL):
+            return meta
+        if self.client is None:
+            raise OrderValidationError(f"Unknown token {token_id}")
+
+        logger.info(f"Token registry miss for {token_id[:20]}..., fetching from CLOB")
+        meta = TokenMeta(
+            token_id,
+            normalize_tick(self.client.get_tick_size(token_id)),
+            bool(self.client.get_neg_risk(token_id)),
+            0.0,
+            int(self.client.get_fee_rate_bps(token_id) or 0),
+            "clob",
+        )
+        with self._lock:
+            self._meta[token_id] = meta
+        return meta
+
+    def prepare(self, token_id: str, price: float, size: float, tick_size: Optional[str] = None, neg_risk: Optional[bool] = None) -> TokenMeta:
+        """Fill in tick size / neg-risk / fee rate for an order and reject it
+        locally if the exchange would. Returns the effective parameters."""
+        meta = self.resolve(token_id)
+
+        tick = meta.tick_size
+        if tick_size is not None:
+            requested = normalize_tick(tick_size)
+            if float(requested) < float(meta.tick_size):
+                raise OrderValidationError(f"Tick size {requested} is below the market minimum {meta.tick_size}")
+            tick = requested
+
+        if neg_risk is not None and bool(neg_risk) != meta.neg_risk:
+            raise OrderValidationError(f"neg_risk={neg_risk} does not match market (neg_risk={meta.neg_risk})")
+
+        step = float(tick)
+        if price < step or price > 1 - step:
+            raise OrderValidationError(f"Price {price} outside [{step}, {1 - step:.4g}]")
+        if abs(round(price / step) * step - price) > 1e-9:
+            raise OrderValidationError(f"Price {price} is not a multiple of tick size {tick}")
+        if size <= 0:
+            raise OrderValidationError("Order size must be positive")
+        if size < meta.min_order_size:
+            raise OrderValidationError(f"Order size {size} is below the market minimum {meta.min_order_size}")
+
+        if tick == meta.tick_size:
+            return meta
+        return TokenMeta(token_id, tick, meta.neg_risk, meta.min_order_size, meta.fee_rate_bps, meta.source)